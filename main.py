@@ -1,235 +1,170 @@
-import pygame
-import random
+import argparse
 import time
-import numpy as np
-from datetime import datetime
-from simulation.city import CityGrid
-from simulation.warehouse import Warehouse
-from simulation.station import ChargingStation
-from simulation.locker import SmartLocker
-from simulation.weather import WeatherSimulator
-from simulation.dashboard import Dashboard, Button
+import pygame
+from simulation.engine import SimulationEngine
+from simulation.dashboard import Button
+from simulation.snapshot import save_snapshot, load_snapshot
+from simulation.text_cache import render_text
 from simulation.utils import *
-from simulation.ml_model import MLModel
-from simulation.data_collector import DataCollector
-from simulation.drone import Drone
-
-# Initialize pygame
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Swarm Delivery Network Simulation")
-clock = pygame.time.Clock()
-
-# Initialize fonts
-font_small = pygame.font.SysFont("Arial", FONT_SMALL_SIZE)
-font_medium = pygame.font.SysFont("Arial", FONT_MEDIUM_SIZE)
-font_large = pygame.font.SysFont("Arial", FONT_LARGE_SIZE, bold=True)
-
-# Initialize simulation objects
-city = CityGrid(30, 20)
-
-# Create lockers first
-lockers = []
-locker_positions = []
-for i in range(3):
-    x, y = random.randint(5, 25), random.randint(5, 15)
-    while not city.is_valid_position(x, y):
-        x, y = random.randint(5, 25), random.randint(5, 15)
-    lockers.append(SmartLocker(x, y, i+1))
-    locker_positions.append((x, y))
-
-# Pass city to warehouse
-warehouse = Warehouse(2, 2, 1, city)
-
-# Create charging stations
-stations = []
-for i in range(3):
-    x, y = random.randint(5, 25), random.randint(5, 15)
-    while not city.is_valid_position(x, y):
-        x, y = random.randint(5, 25), random.randint(5, 15)
-    stations.append(ChargingStation(x, y, i+1))
-
-# Create drones
-drones = []
-for i in range(1, 11):
-    drones.append(Drone(i, warehouse.x + random.uniform(-0.5, 0.5), 
-                      warehouse.y + random.uniform(-0.5, 0.5), warehouse))
-
-# Initialize weather and dashboard
-weather = WeatherSimulator()
-dashboard = Dashboard()
-
-# Initialize ML and data collection
-data_collector = DataCollector()
-ml_system = MLModel()
-ml_system.load_models()
-
-# Create control buttons
-add_package_btn = Button(10, 10, 200, 40, "Add Package", font_medium)
-add_drone_btn = Button(10, 60, 200, 40, "Add Drone", font_medium)
-storm_btn = Button(10, 110, 200, 40, "Simulate Storm", font_medium)
-retrain_btn = Button(10, 160, 200, 40, "Retrain Models", font_medium)
-
-# Simulation state
-packages_delivered = 0
-running = True
-last_package_time = time.time()
-last_demand_update = time.time()
-last_data_save = time.time()
-package_interval = 5  # seconds
-
-# Main simulation loop
-while running:
-    current_time = time.time()
-    
-    # Handle events
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        
-        # Handle button events
-        mouse_pos = pygame.mouse.get_pos()
-        add_package_btn.check_hover(mouse_pos)
-        add_drone_btn.check_hover(mouse_pos)
-        storm_btn.check_hover(mouse_pos)
-        retrain_btn.check_hover(mouse_pos)
-        
-        if add_package_btn.handle_event(event):
-            warehouse.add_package()
-        
-        if add_drone_btn.handle_event(event):
-            drones.append(Drone(len(drones) + 1, 
-                              warehouse.x + random.uniform(-0.5, 0.5), 
-                              warehouse.y + random.uniform(-0.5, 0.5), 
-                              warehouse))
-        
-        if storm_btn.handle_event(event):
-            weather.current_event = {"name": "Storm", "duration": 50, "wind": (30, 60)}
-            weather.update_counter = 0
-            
-        if retrain_btn.handle_event(event):
-            print("Retraining ML models...")
-            # In a real implementation, we'd retrain models here
-            # This would typically be done in a separate process
-            ml_system.load_models()  # Just reload for now
-    
-    # Update demand based on ML prediction
-    if current_time - last_demand_update > 300:  # Every 5 minutes
-        weather_impact = weather.get_weather_impact()
-        warehouse.generate_packages(weather_impact)
-        last_demand_update = current_time
-    
-    # Assign packages to idle drones
-    for drone in drones:
-        if drone.status == "IDLE":
-            package = warehouse.get_next_package()
-            if package:
-                if drone.assign_package(package):
-                    drone.start_delivery(city)
-    
-    # Update drones
-    for drone in drones:
-        drone.update(city, stations)
-        
-        # Check if drone reached delivery location
-        if (drone.status == "DELIVERING" and drone.current_target and 
-            distance((drone.x, drone.y), drone.destination) < 0.5):
-            # Deliver package to nearest locker
-            delivered = False
-            for locker in lockers:
-                if locker.add_package(drone.package):
-                    packages_delivered += 1
-                    delivery_time = (datetime.now() - drone.package['created_at']).total_seconds()
-                    dashboard.add_delivery_time(delivery_time)
-                    
-                    # Record routing performance
-                    optimal_length = abs(drone.start_pos[0]-drone.destination[0]) + abs(drone.start_pos[1]-drone.destination[1])
-                    data_collector.record_routing(
-                        drone.start_pos, drone.destination, drone.path,
-                        optimal_length, 100, drone.battery, weather.get_weather_impact()
-                    )
-                    
-                    drone.package = None
-                    drone.payload = 0
-                    drone.status = "RETURNING"
-                    drone.find_path(city, (drone.x, drone.y), 
-                                  (drone.warehouse.x, drone.warehouse.y))
-                    delivered = True
-                    break
-            
-            if not delivered:
-                # If lockers are full, return to warehouse
-                drone.status = "RETURNING"
-                drone.find_path(city, (drone.x, drone.y), 
-                              (drone.warehouse.x, drone.warehouse.y))
-    
-    # Update weather
-    weather.update()
-    weather_impact = weather.get_weather_impact()
-    
-    # Apply weather impact to drones
-    for drone in drones:
-        if drone.status in ["DELIVERING", "RETURNING"]:
-            drone.speed = 0.04 * weather_impact
-    
-    # Update dashboard
-    dashboard.update(drones, packages_delivered, len(warehouse.packages))
-    
-    # Save data periodically
-    if current_time - last_data_save > 300:  # Every 5 minutes
-        data_collector.save_all_data()
-        last_data_save = current_time
-    
-    # Detect and display anomalies
-    anomalies = ml_system.detect_anomalies(drones)
-    if anomalies:
-        print("\n--- ANOMALIES DETECTED ---")
-        for anomaly in anomalies:
-            print(anomaly)
-    
-    # Draw everything
-    screen.fill(BACKGROUND)
-    city.draw(screen)
-    
-    # Draw lockers
-    for locker in lockers:
-        locker.draw(screen, city.cell_size, font_small)
-    
-    # Draw charging stations
-    for station in stations:
-        station.draw(screen, city.cell_size, font_small)
-    
-    # Draw warehouse
-    warehouse.draw(screen, city.cell_size, font_small)
-    
-    # Draw drones
-    for drone in drones:
-        drone.draw(screen, city.cell_size, font_small)
-    
-    # Draw weather
-    weather.draw(screen, font_medium)
-    
-    # Draw dashboard
-    dashboard.draw(screen, font_small, font_medium, font_large)
-    
-    # Draw buttons
-    add_package_btn.draw(screen)
-    add_drone_btn.draw(screen)
-    storm_btn.draw(screen)
-    retrain_btn.draw(screen)
-    
-    # Draw title
-    title = font_large.render("Swarm Delivery Network Simulation", True, (100, 200, 255))
-    screen.blit(title, (WIDTH // 2 - title.get_width() // 2, 10))
-    
-    # Draw ML status
-    ml_status = "ML: Active" if ml_system.rl_agent.exploration_rate < 0.1 else "ML: Training"
-    status_text = font_medium.render(ml_status, True, (0, 255, 100))
-    screen.blit(status_text, (WIDTH - 150, HEIGHT - 30))
-    
-    pygame.display.flip()
-    clock.tick(60)
-
-# Save data before exit
-data_collector.save_all_data()
-pygame.quit()
\ No newline at end of file
+
+
+def run_headless(args):
+    """Run the simulation without a display as fast as the CPU allows"""
+    if args.resume:
+        engine = load_snapshot(args.resume, trajectory_path=args.trajectory)
+        print(f"Resumed from {args.resume} at tick {engine.tick}")
+    else:
+        engine = SimulationEngine(args.width, args.height, num_drones=args.drones,
+                                  headless=True, cooperative=args.cooperative,
+                                  trajectory_path=args.trajectory, seed=args.seed)
+    duration = args.hours * 3600
+    start_tick = engine.tick
+
+    print(f"Running {args.hours} simulated hours headless...")
+    start_time = time.time()
+    engine.run(duration)
+    elapsed = time.time() - start_time
+    if args.checkpoint:
+        size = save_snapshot(engine, args.checkpoint)
+        print(f"Saved checkpoint at tick {engine.tick} to {args.checkpoint} ({size} bytes)")
+    engine.shutdown()
+    ticks = engine.tick - start_tick
+
+    print(f"Simulated {duration:.0f}s in {elapsed:.2f}s "
+          f"({ticks} ticks, {ticks / max(elapsed, 1e-9):.0f} ticks/s)")
+    print(f"Packages delivered: {engine.packages_delivered} "
+          f"({engine.throughput():.1f}/hour)")
+
+
+def run_interactive(args):
+    # Initialize pygame
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Swarm Delivery Network Simulation")
+    clock = pygame.time.Clock()
+
+    # Initialize fonts
+    font_small = pygame.font.SysFont("Arial", FONT_SMALL_SIZE)
+    font_medium = pygame.font.SysFont("Arial", FONT_MEDIUM_SIZE)
+    font_large = pygame.font.SysFont("Arial", FONT_LARGE_SIZE, bold=True)
+
+    # Initialize simulation
+    engine = SimulationEngine(args.width, args.height, num_drones=args.drones,
+                              cooperative=args.cooperative, trajectory_path=args.trajectory,
+                              seed=args.seed)
+    camera = engine.camera
+    camera.fit()
+
+    # Create control buttons
+    add_package_btn = Button(10, 10, 200, 40, "Add Package", font_medium)
+    add_drone_btn = Button(10, 60, 200, 40, "Add Drone", font_medium)
+    storm_btn = Button(10, 110, 200, 40, "Simulate Storm", font_medium)
+    retrain_btn = Button(10, 160, 200, 40, "Retrain Models", font_medium)
+    buttons = [add_package_btn, add_drone_btn, storm_btn, retrain_btn]
+
+    running = True
+    accumulator = 0.0
+    last_frame = time.time()
+
+    # Main simulation loop
+    while running:
+        # Handle events
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+
+            # Handle button events
+            mouse_pos = pygame.mouse.get_pos()
+            for button in buttons:
+                button.check_hover(mouse_pos)
+
+            # Zoom with the wheel, pan with a right-button drag, F fits the city
+            if event.type == pygame.MOUSEWHEEL:
+                camera.zoom(event.y, mouse_pos)
+            elif event.type == pygame.MOUSEMOTION and event.buttons[2]:
+                camera.pan(-event.rel[0], -event.rel[1])
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_f:
+                camera.fit()
+
+            if add_package_btn.handle_event(event):
+                engine.add_package()
+
+            if add_drone_btn.handle_event(event):
+                engine.add_drone()
+
+            if storm_btn.handle_event(event):
+                engine.trigger_storm()
+
+            if retrain_btn.handle_event(event):
+                engine.retrain_models()
+
+        # Pan with the arrow keys
+        keys = pygame.key.get_pressed()
+        pan_x = (keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]) * 15
+        pan_y = (keys[pygame.K_DOWN] - keys[pygame.K_UP]) * 15
+        if pan_x or pan_y:
+            camera.pan(pan_x, pan_y)
+
+        # Advance the simulation in fixed steps to keep up with real time
+        current_time = time.time()
+        accumulator += min(current_time - last_frame, 0.25)
+        last_frame = current_time
+        while accumulator >= engine.dt:
+            engine.step()
+            accumulator -= engine.dt
+
+        # Draw everything
+        engine.draw(screen, font_small, font_medium, font_large)
+
+        renderer = engine.renderer
+
+        # Draw buttons
+        for button in buttons:
+            renderer.add(button.draw(screen))
+
+        # Draw title
+        title = render_text(font_large, "Swarm Delivery Network Simulation", (100, 200, 255))
+        renderer.add(screen.blit(title, (WIDTH // 2 - title.get_width() // 2, 10)))
+
+        # Draw ML status
+        ml_status = "ML: Active" if engine.ml_system.rl_agent.exploration_rate < 0.1 else "ML: Training"
+        status_text = render_text(font_medium, ml_status, (0, 255, 100))
+        renderer.add(screen.blit(status_text, (WIDTH - 150, HEIGHT - 30)))
+
+        # Only push the regions that changed to the display
+        pygame.display.update(renderer.end_frame())
+        clock.tick(60)
+
+    # Save data before exit
+    engine.shutdown()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Swarm Delivery Network Simulation")
+    parser.add_argument("--headless", action="store_true",
+                        help="run without a display on a fixed simulated timestep")
+    parser.add_argument("--hours", type=float, default=1.0,
+                        help="simulated hours to run in headless mode")
+    parser.add_argument("--width", type=int, default=30,
+                        help="city width in cells")
+    parser.add_argument("--height", type=int, default=20,
+                        help="city height in cells")
+    parser.add_argument("--drones", type=int, default=10,
+                        help="initial fleet size")
+    parser.add_argument("--cooperative", action="store_true",
+                        help="plan drone paths around each other's reservations")
+    parser.add_argument("--trajectory", default=None,
+                        help="record every drone's position per tick to this replay log")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed every random source for a reproducible run")
+    parser.add_argument("--resume", default=None,
+                        help="continue a headless run from this snapshot")
+    parser.add_argument("--checkpoint", default=None,
+                        help="save a snapshot here when the headless run ends")
+    args = parser.parse_args()
+
+    if args.headless:
+        run_headless(args)
+    else:
+        run_interactive(args)
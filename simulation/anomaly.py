@@ -0,0 +1,312 @@
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+
+from .fleet import STATUS_NAMES
+
+# Telemetry columns, named as in the anomaly training data
+FEATURE_COLUMNS = ['speed', 'battery_drain', 'payload', 'distance']
+
+def fleet_features(fleet):
+    """(n, 4) telemetry matrix straight from the fleet columns; 0 distance without a destination"""
+    n = fleet.size
+    trip = np.hypot(fleet.x[:n] - fleet.dest_x[:n], fleet.y[:n] - fleet.dest_y[:n])
+    return np.column_stack([fleet.speed[:n], fleet.battery_decrease_rate[:n],
+                            fleet.payload[:n], np.where(fleet.has_dest[:n], trip, 0.0)])
+
+def fit_forest(sample, false_alarm_rate=0.001, random_state=42):
+    """Fit an IsolationForest on a telemetry sample (runs in a worker process)
+
+    Returns the forest and the alert threshold on its scores: the score that
+    only `false_alarm_rate` of the sample falls below. A contamination-based
+    cut would flag that fixed share of every live scan by construction.
+    """
+    frame = pd.DataFrame(sample, columns=FEATURE_COLUMNS)
+    forest = IsolationForest(random_state=random_state).fit(frame)
+    threshold = float(np.quantile(forest.score_samples(frame), false_alarm_rate))
+    return forest, threshold
+
+class Reservoir:
+    """Uniform fixed-size sample of an unbounded stream of rows (Algorithm R)"""
+
+    def __init__(self, capacity=5000, width=len(FEATURE_COLUMNS), seed=None):
+        self.capacity = capacity
+        self.rows = np.zeros((capacity, width))
+        self.seen = 0
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return min(self.seen, self.capacity)
+
+    def add(self, batch):
+        # Fill the free slots first
+        filled = len(self)
+        take = min(self.capacity - filled, len(batch))
+        self.rows[filled:filled + take] = batch[:take]
+        self.seen += take
+        rest = batch[take:]
+        if len(rest) == 0:
+            return
+
+        # Row number i then replaces a random slot with probability capacity / i
+        numbers = self.seen + np.arange(1, len(rest) + 1)
+        slots = (self.rng.random(len(rest)) * numbers).astype(np.int64)
+        keep = slots < self.capacity
+        self.rows[slots[keep]] = rest[keep]
+        self.seen += len(rest)
+
+    def sample(self):
+        return self.rows[:len(self)].copy()
+
+class StreamingDetector:
+    """Per-drone EWMA baselines updated every tick, flagging robust z-score outliers"""
+
+    def __init__(self, columns=(0, 1), alpha=0.05, threshold=6.0, warmup=30,
+                 floors=(0.005, 0.1), min_peers=5):
+        # Payload and trip distance jump at every assignment, so only the
+        # per-drone rates are scored by default; all columns feed the reservoir
+        self.columns = list(columns)
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup                        # ticks of history before scoring
+        self.floors = np.asarray(floors, dtype=np.float64)  # smallest sigma per column
+        self.min_peers = min_peers                  # drones needed to estimate a shared shift
+        self.mean = np.zeros((0, len(self.columns)))
+        self.deviation = np.zeros((0, len(self.columns)))
+        self.count = np.zeros(0, dtype=np.int64)
+        self.status = np.zeros(0, dtype=np.int8)
+        self.z = np.zeros((0, len(self.columns)))
+
+    def resize(self, n):
+        """Grow the per-drone state for drones added since the last tick"""
+        old = len(self.count)
+        if n <= old:
+            return
+        width = len(self.columns)
+        self.mean = np.vstack([self.mean, np.zeros((n - old, width))])
+        self.deviation = np.vstack([self.deviation, np.zeros((n - old, width))])
+        self.count = np.concatenate([self.count, np.zeros(n - old, dtype=np.int64)])
+        self.status = np.concatenate([self.status, np.zeros(n - old, dtype=np.int8)])
+
+    def update(self, features, status):
+        """Score, then absorb, one telemetry row per drone; returns flagged fleet indices"""
+        n = len(features)
+        self.resize(n)
+        values = features[:, self.columns]
+
+        # A new activity is a new regime: restart the baseline
+        self.count[:n][status != self.status[:n]] = 0
+        self.status[:n] = status
+
+        # Residuals against each drone's baseline, minus the shift shared by
+        # drones in the same activity (weather changes move everyone at once)
+        residual = values - self.mean[:n]
+        warm = self.count[:n] >= self.warmup
+        for code in range(len(STATUS_NAMES)):
+            peers = warm & (status == code)
+            if peers.sum() >= self.min_peers:
+                residual[peers] -= np.median(residual[peers], axis=0)
+
+        # Mean absolute deviation times 1.2533 estimates a normal sigma
+        scale = np.maximum(1.2533 * self.deviation[:n], self.floors)
+        self.z = np.abs(residual) / scale
+        flagged = np.flatnonzero(warm & (self.z > self.threshold).any(axis=1))
+
+        # Absorb after scoring so an outlier cannot hide itself
+        fresh = self.count[:n] == 0
+        self.mean[:n][fresh] = values[fresh]
+        self.deviation[:n][fresh] = 0.0
+        delta = values - self.mean[:n]
+        self.mean[:n] += self.alpha * delta
+        self.deviation[:n] += self.alpha * (np.abs(delta) - self.deviation[:n])
+        self.count[:n] += 1
+        return flagged
+
+class AnomalyMonitor:
+    """Fleet anomaly alerts: streaming z-scores every tick, forest scans on a cadence
+
+    Forest flags only become alerts when the drone's own streaming
+    statistics corroborate them (a z-score above `confirm`). A refit is
+    swapped in `refit_delay` simulated seconds after it starts, whatever the
+    worker's wall-clock speed, so seeded runs raise the same alerts.
+    """
+
+    def __init__(self, ml_system, interval=1.0, cooldown=60.0, background=False,
+                 streaming=True, sample_every=10, reservoir_size=5000,
+                 refit_interval=600.0, min_refit_samples=1000, false_alarm_rate=0.001,
+                 confirm=3.0, refit_delay=60.0, seed=None):
+        self.ml_system = ml_system
+        self.interval = interval        # simulated seconds between forest scans
+        self.cooldown = cooldown        # simulated seconds before a drone can alert again
+        self.background = background
+        self.last_scan = float('-inf')
+        self.confirm = confirm          # streaming z-score that confirms a forest flag
+        self.last_alert = {}            # drone id -> time of its last alert, from either path
+        self.flagged = np.empty(0, dtype=np.int64)
+        self.alerts = []
+        self.scans = 0
+
+        # Streaming statistics and the live sample the forest is refit on
+        self.streaming = StreamingDetector() if streaming else None
+        self.reservoir = Reservoir(reservoir_size, seed=seed)
+        self.sample_every = sample_every
+        self.ticks = 0
+        self.refit_interval = refit_interval
+        self.min_refit_samples = min_refit_samples
+        self.false_alarm_rate = false_alarm_rate
+        self.forest = None              # (forest, alert threshold) fit on live telemetry
+        self.refit_delay = refit_delay
+        self.last_refit = 0.0
+        self.refits = 0
+        self.executor = None
+        self.refit_job = None
+        self.refit_sample = None        # sample of the refit in progress, until it is swapped in
+
+        self.start_worker()
+
+    def start_worker(self):
+        # Background scoring: at most one pending snapshot, the newest wins
+        self.requests = queue.Queue(maxsize=1)
+        self.results = queue.Queue()
+        self.worker = None
+        if self.background:
+            self.worker = threading.Thread(target=self.run, daemon=True)
+            self.worker.start()
+
+    def __getstate__(self):
+        # Snapshots keep the statistics, the sample and the refit forest; a
+        # refit in progress is started again from its saved sample
+        state = self.__dict__.copy()
+        for name in ('requests', 'results', 'worker', 'executor', 'refit_job'):
+            state[name] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.start_worker()
+
+    def score(self, ids, features):
+        """Ids of the anomalous drones in a feature snapshot"""
+        if self.forest is None:
+            return ids[self.ml_system.predict_anomalies(features)]
+        forest, threshold = self.forest
+        scores = forest.score_samples(pd.DataFrame(features, columns=FEATURE_COLUMNS))
+        return ids[scores < threshold]
+
+    def run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            sim_time, ids, features = request
+            self.results.put((sim_time, self.score(ids, features)))
+
+    def submit(self, request):
+        """Hand a request to the worker, replacing one it has not started yet"""
+        try:
+            self.requests.get_nowait()
+        except queue.Empty:
+            pass
+        self.requests.put_nowait(request)
+
+    def update(self, fleet, sim_time):
+        """Ingest this tick's telemetry; returns alerts for drones newly flagged or out of cooldown"""
+        self.alerts = []
+        features = fleet_features(fleet)
+        ids = None
+
+        # Streaming z-scores flag a drone within ticks of it misbehaving
+        if self.streaming is not None:
+            flagged = self.streaming.update(features, fleet.status[:fleet.size])
+            if len(flagged):
+                ids = np.array([drone.id for drone in fleet.drones])
+                self.report(sim_time, ids[flagged], "Unusual speed or battery drain")
+
+            self.ticks += 1
+            if self.ticks % self.sample_every == 0:
+                self.reservoir.add(features)
+            self.refit(sim_time)
+
+        # Forest scans on the cadence, inline or on the worker thread
+        has_forest = self.forest is not None or self.ml_system.anomaly_detector is not None
+        if has_forest and sim_time - self.last_scan >= self.interval:
+            self.last_scan = sim_time
+            self.scans += 1
+            if ids is None:
+                ids = np.array([drone.id for drone in fleet.drones])
+            if self.background:
+                self.submit((sim_time, ids, features))
+            else:
+                self.flagged = self.score(ids, features)
+                self.report(sim_time, self.corroborate(ids, self.flagged))
+
+        # Collect finished background scans
+        while not self.results.empty():
+            sim_time, self.flagged = self.results.get_nowait()
+            if ids is None:
+                ids = np.array([drone.id for drone in fleet.drones])
+            self.report(sim_time, self.corroborate(ids, self.flagged))
+        return self.alerts
+
+    def corroborate(self, ids, flagged):
+        """Forest-flagged ids whose own streaming statistics also stand out"""
+        if self.streaming is None:
+            return flagged
+        detector = self.streaming
+        n = len(detector.z)
+        suspect = (detector.count[:n] >= detector.warmup) & (detector.z.max(axis=1) > self.confirm)
+        return flagged[np.isin(flagged, ids[:n][suspect])]
+
+    def refit(self, sim_time):
+        """Swap in a forest refit on the live sample; start the next refit when due"""
+        # The refit forest stays with this monitor; the shared model is never replaced
+        if self.refit_sample is not None and sim_time - self.last_refit >= self.refit_delay:
+            try:
+                self.forest = self.submit_refit().result()
+                self.refits += 1
+            except Exception as e:
+                print(f"Anomaly detector refit failed: {e}")
+            self.refit_job = None
+            self.refit_sample = None
+
+        if (self.refit_interval and self.refit_sample is None and
+                sim_time - self.last_refit >= self.refit_interval and
+                len(self.reservoir) >= self.min_refit_samples):
+            self.refit_sample = self.reservoir.sample()
+            self.last_refit = sim_time
+            self.submit_refit()
+
+    def submit_refit(self):
+        """The refit job for `refit_sample`, started now if it is not running yet"""
+        if self.refit_job is None:
+            # Spawned, not forked: the parent has threads (and TensorFlow) running
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+            self.refit_job = self.executor.submit(fit_forest, self.refit_sample,
+                                                  self.false_alarm_rate)
+        return self.refit_job
+
+    def report(self, sim_time, flagged, reason="Anomalous behavior detected"):
+        """Turn flagged ids into alerts, skipping drones still in cooldown"""
+        for drone_id in flagged.tolist():
+            last = self.last_alert.get(drone_id)
+            if last is not None and sim_time - last < self.cooldown:
+                continue
+            self.last_alert[drone_id] = sim_time
+            self.alerts.append(f"Drone {drone_id} - {reason}")
+
+    def close(self):
+        """Stop the background worker and any refit in progress"""
+        if self.worker is not None:
+            self.submit(None)
+            self.worker.join(timeout=1.0)
+            self.worker = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
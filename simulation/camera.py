@@ -0,0 +1,140 @@
+import numpy as np
+import pygame
+
+from .utils import *
+
+class Camera:
+    """Pan/zoom viewport mapping city cells to screen pixels"""
+
+    def __init__(self, city_width, city_height, view=(WIDTH, HEIGHT), scale=40,
+                 min_scale=1, max_scale=80):
+        self.city_width = city_width
+        self.city_height = city_height
+        self.view_width, self.view_height = view
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.scale = int(scale)     # whole pixels per cell keep the grid aligned
+        self.x = 0.0                # top-left corner, in cells
+        self.y = 0.0
+
+    def key(self):
+        """Changes whenever the static layer must be re-rendered"""
+        return (self.x, self.y, self.scale)
+
+    def to_screen(self, x, y):
+        return int((x - self.x) * self.scale), int((y - self.y) * self.scale)
+
+    def to_world(self, px, py):
+        return self.x + px / self.scale, self.y + py / self.scale
+
+    def clamp(self):
+        """Keep at least half of the view over the city"""
+        half_w = self.view_width / self.scale / 2
+        half_h = self.view_height / self.scale / 2
+        self.x = min(max(self.x, -half_w), max(self.city_width - half_w, -half_w))
+        self.y = min(max(self.y, -half_h), max(self.city_height - half_h, -half_h))
+
+    def pan(self, dx, dy):
+        """Move the view by (dx, dy) screen pixels"""
+        self.x += dx / self.scale
+        self.y += dy / self.scale
+        self.clamp()
+
+    def zoom(self, steps, anchor=None):
+        """Zoom in (steps > 0) or out, keeping the cell under `anchor` in place"""
+        if anchor is None:
+            anchor = (self.view_width // 2, self.view_height // 2)
+        world = self.to_world(*anchor)
+        scale = self.scale * 1.25 ** steps
+        scale = int(round(scale)) if steps > 0 else int(scale)
+        if steps > 0 and scale == self.scale:
+            scale += 1
+        self.scale = min(max(scale, self.min_scale), self.max_scale)
+        self.x = world[0] - anchor[0] / self.scale
+        self.y = world[1] - anchor[1] / self.scale
+        self.clamp()
+
+    def fit(self):
+        """Show the whole city"""
+        scale = min(self.view_width // max(self.city_width, 1),
+                    self.view_height // max(self.city_height, 1))
+        self.scale = min(max(int(scale), self.min_scale), self.max_scale)
+        self.x = self.y = 0.0
+        self.clamp()
+
+    def visible_cells(self):
+        """Integer cell range (x0, y0, x1, y1) on screen, clipped to the city"""
+        x0 = max(int(np.floor(self.x)), 0)
+        y0 = max(int(np.floor(self.y)), 0)
+        x1 = min(int(np.ceil(self.x + self.view_width / self.scale)), self.city_width)
+        y1 = min(int(np.ceil(self.y + self.view_height / self.scale)), self.city_height)
+        return x0, y0, x1, y1
+
+    def contains(self, x, y, margin=0):
+        """Whether a point is on screen, `margin` pixels around the view included"""
+        px, py = (x - self.x) * self.scale, (y - self.y) * self.scale
+        return (-margin <= px < self.view_width + margin and
+                -margin <= py < self.view_height + margin)
+
+    def visible(self, xs, ys, margin=0):
+        """Indices of the points on screen (vectorized contains)"""
+        px = (np.asarray(xs) - self.x) * self.scale
+        py = (np.asarray(ys) - self.y) * self.scale
+        return np.flatnonzero((px >= -margin) & (px < self.view_width + margin) &
+                              (py >= -margin) & (py < self.view_height + margin))
+
+class DetailLevel:
+    """Level-of-detail rules for drawing drones at a given zoom and crowding"""
+
+    def __init__(self, label_scale=24, path_scale=12, tile_size=24, cluster_size=4,
+                 max_sprites=1500, margin=60):
+        self.label_scale = label_scale      # pixels per cell needed to show labels
+        self.path_scale = path_scale        # ... and remaining paths
+        self.tile_size = tile_size          # heat tile edge in pixels
+        self.cluster_size = cluster_size    # drones per tile drawn as a heat tile instead
+        self.max_sprites = max_sprites      # above this every visible drone is aggregated
+        self.margin = margin                # culling slack so labels don't pop at the edges
+
+    def split(self, camera, xs, ys):
+        """Visible drones as (sprite indices, heat tiles as (tx, ty, count))"""
+        idx = camera.visible(xs, ys, self.margin)
+        empty = np.empty(0, dtype=np.int64)
+        if len(idx) == 0:
+            return idx, (empty, empty, empty)
+
+        # Bucket on-screen positions into tiles; margin drones fall into edge tiles
+        cols = self.view_tiles(camera.view_width)
+        rows = self.view_tiles(camera.view_height)
+        px = (xs[idx] - camera.x) * camera.scale
+        py = (ys[idx] - camera.y) * camera.scale
+        tx = np.clip((px // self.tile_size).astype(np.int64), 0, cols - 1)
+        ty = np.clip((py // self.tile_size).astype(np.int64), 0, rows - 1)
+        tiles = tx * rows + ty
+        counts = np.bincount(tiles, minlength=cols * rows)
+
+        if len(idx) > self.max_sprites:
+            dense = np.ones(len(idx), dtype=bool)
+        else:
+            dense = counts[tiles] >= self.cluster_size
+        heat = np.bincount(tiles[dense], minlength=cols * rows)
+        occupied = np.flatnonzero(heat)
+        return idx[~dense], (occupied // rows, occupied % rows, heat[occupied])
+
+    def view_tiles(self, pixels):
+        return -(-pixels // self.tile_size)
+
+    def draw_heat(self, surface, tiles):
+        """Draw heat tiles shaded by drone count; returns the covered rect"""
+        tx, ty, counts = tiles
+        if len(counts) == 0:
+            return None
+        # Log shading so a few crowded tiles don't wash out the rest
+        level = np.log1p(counts) / np.log1p(counts.max())
+        low, high = np.array(GRID_COLOR), np.array(PACKAGE_COLOR)
+        colors = (low + (high - low) * level[:, None]).astype(int)
+        size = self.tile_size
+        rect = None
+        for x, y, color in zip(tx.tolist(), ty.tolist(), colors.tolist()):
+            tile = pygame.draw.rect(surface, color, (x * size + 1, y * size + 1, size - 2, size - 2))
+            rect = tile if rect is None else rect.union(tile)
+        return rect
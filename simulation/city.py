@@ -2,6 +2,7 @@ import random
 import numpy as np
 import pygame
 from .utils import *
+from .navigation import Navigator
 
 class CityGrid:
     def __init__(self, width, height, cell_size=40):
@@ -11,8 +12,29 @@ class CityGrid:
         self.grid = np.zeros((width, height), dtype=int)
         self.buildings = []
         self.roads = []
+        self.navigator = None
+        self.planner = None
+        self.action_mask = None
+        self.layout_image = None
+        self.listeners = []
         self.generate_city_layout()
         
+    @classmethod
+    def from_grid(cls, grid, cell_size=40):
+        """Rebuild a city from an existing cell grid instead of a random layout"""
+        city = cls.__new__(cls)
+        city.width, city.height = grid.shape
+        city.cell_size = cell_size
+        city.grid = np.array(grid, dtype=int)
+        city.roads = [(int(i), int(j)) for i, j in np.argwhere(city.grid == 1)]
+        city.buildings = [(int(i), int(j), 1, 1) for i, j in np.argwhere(city.grid == 2)]
+        city.navigator = None
+        city.planner = None
+        city.action_mask = None
+        city.layout_image = None
+        city.listeners = []
+        return city
+        
     def generate_city_layout(self):
         # Create main roads
         for i in range(0, self.width, 5):
@@ -37,27 +59,101 @@ class CityGrid:
                             for y in range(j, j + size):
                                 self.grid[x][y] = 2
                         self.buildings.append((i, j, size, size))
+        
+        self.notify_changed()
+    
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+    
+    def notify_changed(self, cells=None):
+        """Tell dependent structures which cells changed (None means all)"""
+        self.action_mask = None
+        self.layout_image = None
+        for listener in self.listeners:
+            listener(cells)
+    
+    def set_cells(self, cells, value):
+        changed = []
+        for (x, y) in cells:
+            if self.grid[x][y] != value:
+                self.grid[x][y] = value
+                changed.append((x, y))
+        if changed:
+            self.notify_changed(changed)
+        return changed
+    
+    def add_building(self, i, j, w, h):
+        self.buildings.append((i, j, w, h))
+        return self.set_cells([(x, y) for x in range(i, i + w)
+                               for y in range(j, j + h)], 2)
+    
+    def remove_building(self, building):
+        self.buildings.remove(building)
+        i, j, w, h = building
+        roads = set(self.roads)
+        changed = []
+        for x in range(i, i + w):
+            for y in range(j, j + h):
+                value = 1 if (x, y) in roads else 0
+                if self.grid[x][y] != value:
+                    self.grid[x][y] = value
+                    changed.append((x, y))
+        if changed:
+            self.notify_changed(changed)
+        return changed
     
     def is_valid_position(self, x, y):
         if 0 <= x < self.width and 0 <= y < self.height:
             return self.grid[x][y] != 2
         return False
     
-    def draw(self, surface):
-        # Draw background grid
-        for i in range(0, WIDTH, self.cell_size):
-            pygame.draw.line(surface, GRID_COLOR, (i, 0), (i, HEIGHT), 1)
-        for j in range(0, HEIGHT, self.cell_size):
-            pygame.draw.line(surface, GRID_COLOR, (0, j), (WIDTH, j), 1)
+    def get_navigator(self):
+        """Navigation graph for this layout, built on first use"""
+        if self.navigator is None:
+            self.navigator = Navigator(self)
+        return self.navigator
+    
+    def get_action_mask(self):
+        """(width, height, 8) boolean mask of valid moves, in RLAgent.actions order"""
+        if self.action_mask is None:
+            bits = self.get_navigator().neighbor_mask
+            self.action_mask = ((bits[..., None] >> np.arange(8, dtype=np.uint8)) & 1).astype(bool)
+        return self.action_mask
+    
+    def layout_surface(self):
+        """One pixel per cell: roads and buildings colored, empty cells transparent"""
+        if self.layout_image is None:
+            colors = np.array([BACKGROUND, ROAD_COLOR, BUILDING_COLOR], dtype=np.uint8)
+            image = pygame.surfarray.make_surface(colors[self.grid])
+            image.set_colorkey(BACKGROUND)
+            self.layout_image = image
+        return self.layout_image
+    
+    def draw(self, surface, camera=None):
+        """Draw the layout, or the part of it inside a camera's view"""
+        if camera is None:
+            scale, origin = self.cell_size, (0, 0)
+            x0, y0, x1, y1 = 0, 0, self.width, self.height
+        else:
+            scale, origin = camera.scale, (camera.x, camera.y)
+            x0, y0, x1, y1 = camera.visible_cells()
+        if x1 <= x0 or y1 <= y0:
+            return
+        left = int((x0 - origin[0]) * scale)
+        top = int((y0 - origin[1]) * scale)
+        width, height = (x1 - x0) * scale, (y1 - y0) * scale
         
-        # Draw roads
-        for (i, j) in self.roads:
-            pygame.draw.rect(surface, ROAD_COLOR, 
-                            (i * self.cell_size, j * self.cell_size, 
-                             self.cell_size, self.cell_size))
+        # Draw background grid, unless it would be denser than the cells
+        if scale >= 4:
+            for i in range(x1 - x0 + 1):
+                x = left + i * scale
+                pygame.draw.line(surface, GRID_COLOR, (x, top), (x, top + height), 1)
+            for j in range(y1 - y0 + 1):
+                y = top + j * scale
+                pygame.draw.line(surface, GRID_COLOR, (left, y), (left + width, y), 1)
         
-        # Draw buildings
-        for (i, j, w, h) in self.buildings:
-            pygame.draw.rect(surface, BUILDING_COLOR, 
-                            (i * self.cell_size, j * self.cell_size, 
-                             w * self.cell_size, h * self.cell_size))
\ No newline at end of file
+        # Draw roads and buildings by scaling the visible part of the layout image
+        region = self.layout_surface().subsurface((x0, y0, x1 - x0, y1 - y0))
+        cells = pygame.transform.scale(region, (width, height))
+        cells.set_colorkey(BACKGROUND)
+        surface.blit(cells, (left, top))
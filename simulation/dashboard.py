@@ -2,6 +2,7 @@ import time
 import pygame
 import numpy as np
 from .utils import *
+from .text_cache import render_text
 
 class Dashboard:
     def __init__(self):
@@ -17,12 +18,22 @@ class Dashboard:
         }
         self.delivery_times = []
         self.start_time = time.time()
+        self.panel = None
     
-    def update(self, drones, packages_delivered, total_packages):
+    def update(self, drones, packages_delivered, total_packages, sim_time=None):
         # Update metrics
-        delivering = sum(1 for d in drones if d.status in ["DELIVERING", "LOADING"])
-        charging = sum(1 for d in drones if d.status == "CHARGING")
-        available = sum(1 for d in drones if d.status == "IDLE")
+        if sim_time is None:
+            sim_time = time.time() - self.start_time
+        if hasattr(drones, "status_counts"):
+            # Fleet store: count statuses in one pass over the array
+            counts = drones.status_counts()
+            delivering = counts["DELIVERING"] + counts["LOADING"]
+            charging = counts["CHARGING"]
+            available = counts["IDLE"]
+        else:
+            delivering = sum(1 for d in drones if d.status in ["DELIVERING", "LOADING"])
+            charging = sum(1 for d in drones if d.status == "CHARGING")
+            available = sum(1 for d in drones if d.status == "IDLE")
         
         self.metrics = {
             "total_deliveries": packages_delivered,
@@ -34,7 +45,7 @@ class Dashboard:
             "drones_charging": charging,
             "drones_delivering": delivering,
             "total_packages": total_packages,
-            "simulation_time": int(time.time() - self.start_time)
+            "simulation_time": int(sim_time)
         }
     
     def add_delivery_time(self, delivery_time):
@@ -43,13 +54,14 @@ class Dashboard:
             self.delivery_times.pop(0)
     
     def draw(self, surface, font_small, font_medium, font_large):
-        # Draw semi-transparent panel
-        panel = pygame.Surface((300, 250), pygame.SRCALPHA)
-        panel.fill(PANEL_BG)
-        surface.blit(panel, (WIDTH - 310, 10))
+        # Draw semi-transparent panel, allocated once
+        if self.panel is None:
+            self.panel = pygame.Surface((300, 250), pygame.SRCALPHA)
+            self.panel.fill(PANEL_BG)
+        rect = surface.blit(self.panel, (WIDTH - 310, 10))
         
         # Draw title
-        title = font_large.render("Swarm Delivery Dashboard", True, TEXT_COLOR)
+        title = render_text(font_large, "Swarm Delivery Dashboard", TEXT_COLOR)
         surface.blit(title, (WIDTH - 300, 15))
         
         # Draw metrics
@@ -62,7 +74,7 @@ class Dashboard:
             else:
                 text = f"{key.replace('_', ' ').title()}: {value}"
             
-            text_surf = font_small.render(text, True, TEXT_COLOR)
+            text_surf = render_text(font_small, text, TEXT_COLOR)
             surface.blit(text_surf, (WIDTH - 300, y_pos))
             y_pos += 20
         
@@ -79,8 +91,9 @@ class Dashboard:
             pygame.draw.rect(surface, STATION_COLOR, (WIDTH - 300 + avail_width, y_pos + 10, charg_width, 25))
             pygame.draw.rect(surface, PACKAGE_COLOR, (WIDTH - 300 + avail_width + charg_width, y_pos + 10, deliv_width, 25))
             
-            status_text = font_small.render("Drone Status: Available | Charging | Delivering", True, TEXT_COLOR)
+            status_text = render_text(font_small, "Drone Status: Available | Charging | Delivering", TEXT_COLOR)
             surface.blit(status_text, (WIDTH - 300, y_pos + 40))
+        return rect.union(pygame.Rect(WIDTH - 300, y_pos + 10, 280, 80))
 
 class Button:
     def __init__(self, x, y, width, height, text, font_medium):
@@ -96,9 +109,10 @@ class Button:
         pygame.draw.rect(surface, color, self.rect, border_radius=5)
         pygame.draw.rect(surface, TEXT_COLOR, self.rect, 2, border_radius=5)
         
-        text_surf = self.font_medium.render(self.text, True, TEXT_COLOR)
+        text_surf = render_text(self.font_medium, self.text, TEXT_COLOR)
         text_rect = text_surf.get_rect(center=self.rect.center)
         surface.blit(text_surf, text_rect)
+        return self.rect
     
     def check_hover(self, pos):
         self.is_hovered = self.rect.collidepoint(pos)
@@ -1,133 +1,82 @@
-import csv
-from datetime import datetime
-import os
-import pandas as pd
+import numpy as np
+from .utils import distance
+from .telemetry import ColumnBuffer, TelemetryWriter, to_seconds
+
+# Column names and types per stream, in file order. Rows are stamped with the
+# simulated time and tick, so they line up with the trajectory log.
+SCHEMAS = {
+    'routing_data': [
+        ('timestamp', np.float64), ('tick', np.int64), ('start_x', np.float64), ('start_y', np.float64),
+        ('end_x', np.float64), ('end_y', np.float64), ('path_length', np.int64),
+        ('optimal_length', np.float64), ('battery_start', np.float64),
+        ('battery_end', np.float64), ('weather_impact', np.float64)
+    ],
+    'demand_data': [
+        ('timestamp', np.float64), ('tick', np.int64), ('actual_demand', np.float64),
+        ('predicted_demand', np.float64), ('weather_impact', np.float64),
+        ('hour', np.int8), ('day_of_week', np.int8)
+    ],
+    'battery_data': [
+        ('timestamp', np.float64), ('tick', np.int64), ('drone_id', np.int64), ('distance', np.float64),
+        ('payload', np.float64), ('wind_speed', np.float64), ('weather_impact', np.float64),
+        ('actual_battery_used', np.float64), ('predicted_battery_used', np.float64)
+    ],
+    'anomaly_data': [
+        ('timestamp', np.float64), ('tick', np.int64), ('drone_id', np.int64), ('speed', np.float64),
+        ('battery_drain', np.float64), ('payload', np.float64), ('distance', np.float64),
+        ('is_anomaly', np.int8)
+    ],
+}
 
 class DataCollector:
-    def __init__(self):
-        self.routing_data = []
-        self.demand_data = []
-        self.battery_data = []
-        self.anomaly_data = []
-        
-        self.routing_file = "data/routing_data.csv"
-        self.demand_file = "data/demand_data.csv"
-        self.battery_file = "data/battery_data.csv"
-        self.anomaly_file = "data/anomaly_data.csv"
-        
-        self.create_files()
-    
-    def create_files(self):
-        """Create data files with headers"""
-        os.makedirs("data", exist_ok=True)
-        
-        # Routing data
-        if not os.path.exists(self.routing_file):
-            with open(self.routing_file, 'w') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    'timestamp', 'start_x', 'start_y', 'end_x', 'end_y',
-                    'path_length', 'optimal_length', 'battery_start',
-                    'battery_end', 'weather_impact'
-                ])
-        
-        # Demand data
-        if not os.path.exists(self.demand_file):
-            with open(self.demand_file, 'w') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    'timestamp', 'actual_demand', 'predicted_demand',
-                    'weather_impact', 'hour', 'day_of_week'
-                ])
-                
-        # Battery data
-        if not os.path.exists(self.battery_file):
-            with open(self.battery_file, 'w') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    'timestamp', 'drone_id', 'distance', 'payload',
-                    'wind_speed', 'weather_impact', 'actual_battery_used',
-                    'predicted_battery_used'
-                ])
-                
-        # Anomaly data
-        if not os.path.exists(self.anomaly_file):
-            with open(self.anomaly_file, 'w') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    'timestamp', 'drone_id', 'speed', 'battery_drain',
-                    'payload', 'distance', 'is_anomaly'
-                ])
-    
-    def record_routing(self, start, end, path, optimal_path, 
+    def __init__(self, directory="data", format=None, row_group_size=4096, max_pending=8):
+        # Rows accumulate in typed column buffers; full row groups go to the writer thread
+        self.writer = TelemetryWriter(directory, format, max_pending)
+        self.buffers = {stream: ColumnBuffer(schema, row_group_size)
+                        for stream, schema in SCHEMAS.items()}
+
+        self.routing_file = self.writer.path('routing_data')
+        self.demand_file = self.writer.path('demand_data')
+        self.battery_file = self.writer.path('battery_data')
+        self.anomaly_file = self.writer.path('anomaly_data')
+
+    def record(self, stream, *values):
+        """Append one row to a stream, handing off the row group once it is full"""
+        buffer = self.buffers[stream]
+        if buffer.append(*values):
+            self.writer.submit(stream, buffer.take())
+
+    def record_routing(self, now, tick, start, end, path, optimal_path,
                       battery_start, battery_end, weather_impact):
-        """Record routing performance data"""
-        self.routing_data.append({
-            'timestamp': datetime.now(),
-            'start_x': start[0], 'start_y': start[1],
-            'end_x': end[0], 'end_y': end[1],
-            'path_length': len(path),
-            'optimal_length': optimal_path,
-            'battery_start': battery_start,
-            'battery_end': battery_end,
-            'weather_impact': weather_impact
-        })
-    
-    def record_demand(self, actual_demand, predicted_demand, weather_impact):
+        """Record routing performance data at simulated time `now`, tick `tick`"""
+        self.record('routing_data', to_seconds(now), tick, start[0], start[1], end[0], end[1],
+                    len(path), optimal_path, battery_start, battery_end, weather_impact)
+
+    def record_demand(self, now, tick, actual_demand, predicted_demand, weather_impact):
         """Record demand prediction data"""
-        now = datetime.now()
-        self.demand_data.append({
-            'timestamp': now,
-            'actual_demand': actual_demand,
-            'predicted_demand': predicted_demand,
-            'weather_impact': weather_impact,
-            'hour': now.hour,
-            'day_of_week': now.weekday()
-        })
-    
-    def record_battery(self, drone_id, distance, payload, wind_speed, 
+        self.record('demand_data', to_seconds(now), tick, actual_demand, predicted_demand,
+                    weather_impact, now.hour, now.weekday())
+
+    def record_battery(self, now, tick, drone_id, distance, payload, wind_speed,
                       weather_impact, actual_used, predicted_used):
         """Record battery performance data"""
-        self.battery_data.append({
-            'timestamp': datetime.now(),
-            'drone_id': drone_id,
-            'distance': distance,
-            'payload': payload,
-            'wind_speed': wind_speed,
-            'weather_impact': weather_impact,
-            'actual_battery_used': actual_used,
-            'predicted_battery_used': predicted_used
-        })
-    
-    def record_anomaly_features(self, drone):
+        self.record('battery_data', to_seconds(now), tick, drone_id, distance, payload,
+                    wind_speed, weather_impact, actual_used, predicted_used)
+
+    def record_anomaly_features(self, now, tick, drone):
         """Record features for anomaly detection"""
-        self.anomaly_data.append({
-            'timestamp': datetime.now(),
-            'drone_id': drone.id,
-            'speed': drone.speed,
-            'battery_drain': drone.battery_decrease_rate,
-            'payload': drone.payload,
-            'distance': distance((drone.x, drone.y), drone.destination),
-            'is_anomaly': 0  # Will be labeled during training
-        })
-    
+        trip = distance((drone.x, drone.y), drone.destination) if drone.destination else 0.0
+        self.record('anomaly_data', to_seconds(now), tick, drone.id, drone.speed,
+                    drone.battery_decrease_rate, drone.payload, trip,
+                    0)  # Will be labeled during training
+
     def save_all_data(self):
-        """Save all collected data to files"""
-        self.append_to_csv(self.routing_file, self.routing_data)
-        self.append_to_csv(self.demand_file, self.demand_data)
-        self.append_to_csv(self.battery_file, self.battery_data)
-        self.append_to_csv(self.anomaly_file, self.anomaly_data)
-        
-        self.routing_data = []
-        self.demand_data = []
-        self.battery_data = []
-        self.anomaly_data = []
-    
-    def append_to_csv(self, filename, data):
-        """Append data to CSV file"""
-        if not data:
-            return
-            
-        with open(filename, 'a', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=data[0].keys())
-            writer.writerows(data)
\ No newline at end of file
+        """Hand every partly filled buffer to the writer thread"""
+        for stream, buffer in self.buffers.items():
+            if len(buffer):
+                self.writer.submit(stream, buffer.take())
+
+    def close(self):
+        """Write everything collected and stop the writer thread"""
+        self.save_all_data()
+        self.writer.close()
@@ -0,0 +1,126 @@
+import numpy as np
+
+from .fleet import DELIVERING, RETURNING
+
+# Half of the 3x3 neighborhood, so every pair of adjacent buckets is visited once
+HALF_NEIGHBORHOOD = [(0, 0), (1, -1), (1, 0), (1, 1), (0, 1)]
+
+def expand_ranges(starts, counts):
+    """Concatenate the integer ranges [start, start + count) without a Python loop"""
+    total = int(counts.sum())
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + offsets
+
+class Deconfliction:
+    """Predicts losses of separation between flying drones and resolves them"""
+
+    def __init__(self, separation=0.5, horizon=1.0, layers=3, slow_factor=0.5,
+                 slow_threshold=0.5, hold_time=1.0, adjust_time=2.0):
+        self.separation = separation
+        self.horizon = horizon              # seconds of look-ahead
+        self.layers = layers                # altitude layers available
+        self.slow_factor = slow_factor
+        self.slow_threshold = slow_threshold
+        self.hold_time = hold_time
+        self.adjust_time = adjust_time
+        self.conflicts = 0
+        self.total_conflicts = 0
+        self.losses = 0
+
+    def flying(self, fleet):
+        n = fleet.size
+        status = fleet.status[:n]
+        return np.flatnonzero(((status == DELIVERING) | (status == RETURNING)) & fleet.has_target[:n])
+
+    def velocities(self, fleet, idx):
+        """Current velocity in cells per second, towards each drone's waypoint"""
+        dx = fleet.target_x[idx] - fleet.x[idx]
+        dy = fleet.target_y[idx] - fleet.y[idx]
+        dist = np.hypot(dx, dy)
+        speed = fleet.speed[idx] * fleet.speed_scale[idx] * 60
+        scale = np.where(dist > 0, speed / np.where(dist > 0, dist, 1.0), 0.0)
+        return np.stack([dx * scale, dy * scale], axis=1)
+
+    def candidate_pairs(self, positions, reach):
+        """Broad phase: index pairs in the same or adjacent buckets of size `reach`"""
+        cells = np.floor(positions / reach).astype(np.int64)
+        span = int(cells[:, 1].max() - cells[:, 1].min()) + 3
+        keys = cells[:, 0] * span + (cells[:, 1] - cells[:, 1].min() + 1)
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+
+        firsts, seconds = [], []
+        for dx, dy in HALF_NEIGHBORHOOD:
+            target = keys + dx * span + dy
+            lo = np.searchsorted(sorted_keys, target, 'left')
+            hi = np.searchsorted(sorted_keys, target, 'right')
+            counts = hi - lo
+            i = np.repeat(np.arange(len(keys)), counts)
+            j = order[expand_ranges(lo, counts)]
+            if (dx, dy) == (0, 0):
+                keep = i < j
+                i, j = i[keep], j[keep]
+            firsts.append(i)
+            seconds.append(j)
+        return np.concatenate(firsts), np.concatenate(seconds)
+
+    def closest_approach(self, p, v):
+        """Narrow phase: time in [0, horizon] and distance of closest approach"""
+        vv = (v * v).sum(axis=1)
+        t = np.where(vv > 0, -(p * v).sum(axis=1) / np.where(vv > 0, vv, 1.0), 0.0)
+        t = np.clip(t, 0.0, self.horizon)
+        d = np.hypot(p[:, 0] + v[:, 0] * t, p[:, 1] + v[:, 1] * t)
+        return t, d
+
+    def detect(self, fleet):
+        """Predicted conflicts as fleet indices (a, b) with time and miss distance"""
+        idx = self.flying(fleet)
+        empty = np.empty(0, dtype=np.intp)
+        if len(idx) < 2:
+            return empty, empty, np.empty(0), np.empty(0)
+
+        positions = np.stack([fleet.x[idx], fleet.y[idx]], axis=1)
+        velocities = self.velocities(fleet, idx)
+        max_speed = np.hypot(velocities[:, 0], velocities[:, 1]).max()
+        reach = self.separation + 2 * max_speed * self.horizon
+
+        i, j = self.candidate_pairs(positions, reach)
+        same_layer = fleet.altitude[idx[i]] == fleet.altitude[idx[j]]
+        i, j = i[same_layer], j[same_layer]
+        t, d = self.closest_approach(positions[j] - positions[i], velocities[j] - velocities[i])
+
+        # Separation already lost
+        now = np.hypot(*(positions[j] - positions[i]).T)
+        self.losses += int((now < self.separation).sum())
+
+        conflict = d < self.separation
+        return idx[i[conflict]], idx[j[conflict]], t[conflict], d[conflict]
+
+    def resolve(self, fleet, a, b, t):
+        """The higher-indexed drone of each pair yields: slow down, change layer, or hold"""
+        yielder = np.maximum(a, b)
+        other = np.minimum(a, b)
+
+        # Distant conflicts: slow down
+        slow = t > self.slow_threshold
+        fleet.speed_scale[yielder[slow]] = np.minimum(
+            fleet.speed_scale[yielder[slow]], self.slow_factor)
+        fleet.resolve_timer[yielder[slow]] = self.adjust_time
+
+        # Imminent conflicts: climb to another layer, or hold position for a time slot
+        urgent = ~slow
+        if self.layers > 1:
+            fleet.altitude[yielder[urgent]] = (fleet.altitude[other[urgent]] + 1) % self.layers
+            fleet.resolve_timer[yielder[urgent]] = self.adjust_time
+        else:
+            fleet.speed_scale[yielder[urgent]] = 0.0
+            fleet.resolve_timer[yielder[urgent]] = self.hold_time
+
+    def update(self, fleet):
+        """Detect and resolve conflicts for this tick; returns the number found"""
+        a, b, t, _ = self.detect(fleet)
+        self.conflicts = len(a)
+        self.total_conflicts += len(a)
+        if len(a):
+            self.resolve(fleet, a, b, t)
+        return self.conflicts
@@ -1,11 +1,13 @@
 import numpy as np
 import pandas as pd
 from sklearn.preprocessing import MinMaxScaler
+import tensorflow as tf
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense
 import joblib
 import os
 from datetime import datetime
+from .telemetry import read_table
 
 class DemandPredictor:
     def __init__(self, sequence_length=24, n_features=4):
@@ -13,6 +15,8 @@ class DemandPredictor:
         self.n_features = n_features
         self.scaler = MinMaxScaler()
         self.model = None
+        self.inference_fn = None
+        self.inference_model = None
         self.model_path = "models/demand_model.h5"
         self.scaler_path = "models/demand_scaler.pkl"
         
@@ -34,10 +38,41 @@ class DemandPredictor:
             return True
         return False
     
+    def get_inference_fn(self):
+        """Traced forward pass, rebuilt only when the model object changes"""
+        if self.inference_fn is None or self.inference_model is not self.model:
+            model = self.model
+            self.inference_fn = tf.function(
+                lambda X: model(X, training=False),
+                input_signature=[tf.TensorSpec(
+                    (None, self.sequence_length, self.n_features), tf.float32)],
+                reduce_retracing=True)
+            self.inference_model = model
+        return self.inference_fn
+    
+    def scale_features(self, X):
+        """Vectorized MinMaxScaler.transform over the last axis"""
+        return (X * self.scaler.scale_ + self.scaler.min_).astype(np.float32)
+    
+    def inverse_demand(self, y):
+        """Undo the scaling of the demand column"""
+        return (y - self.scaler.min_[0]) / self.scaler.scale_[0]
+    
+    def predict_batch(self, X):
+        """Unscaled next-step demand for a (batch, sequence_length, n_features) array"""
+        if not self.model:
+            self.load_model()
+            if not self.model:
+                return np.full(len(X), 5.0)  # Default if no model
+        
+        scaled = self.scale_features(X)
+        prediction = np.asarray(self.get_inference_fn()(scaled))[:, 0]
+        return self.inverse_demand(prediction)
+    
     def train_model(self, data_file, epochs=50, batch_size=32):
         """Train LSTM model on historical data"""
         # Load and preprocess data
-        df = pd.read_csv(data_file)
+        df = read_table(data_file)
         df['timestamp'] = pd.to_datetime(df['timestamp'])
         df.set_index('timestamp', inplace=True)
         
@@ -92,7 +127,10 @@ class DemandPredictor:
                 return 5  # Default if no model
         
         # Prepare input data
-        df = historical_data.copy()
+        if hasattr(historical_data, 'to_frame'):
+            df = historical_data.to_frame(self.sequence_length)
+        else:
+            df = historical_data.copy()
         df['timestamp'] = pd.to_datetime(df['timestamp'])
         df.set_index('timestamp', inplace=True)
         
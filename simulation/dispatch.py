@@ -0,0 +1,156 @@
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from .fleet import IDLE
+from .package_queue import PRIORITY_RANK
+from .sortie import plan_sortie
+from .utils import SQRT2, octile
+
+INFEASIBLE = 1e9
+
+class Dispatcher:
+    """Assigns queued packages to idle drones in one batch (Hungarian method)"""
+
+    def __init__(self, warehouse, city, stations=(), candidate_factor=4,
+                 battery_reserve=20, priority_weight=50.0, max_stops=4, stop_penalty=100.0):
+        self.warehouse = warehouse
+        self.city = city
+        self.stations = stations
+        self.candidate_factor = candidate_factor
+        self.battery_reserve = battery_reserve
+        self.priority_weight = priority_weight
+        self.max_stops = max_stops
+        self.stop_penalty = stop_penalty    # cost of each charging stop a trip needs
+        self.cruise_speed = None    # current flying speed; idle drones keep a stale one
+        self.last_state = None
+        self.solves = 0
+
+    def speeds(self, fleet, idx):
+        if self.cruise_speed is None:
+            return fleet.speed[idx]
+        return np.full(np.shape(idx), self.cruise_speed)
+
+    def charging_stops(self, battery, energy):
+        """Recharges needed to fly `energy` starting from `battery`, recharging at the reserve"""
+        shortfall = np.maximum(energy - (battery - self.battery_reserve), 0.0)
+        return np.ceil(shortfall / (100 - self.battery_reserve))
+
+    def cost_matrix(self, fleet, idx, packages):
+        """Battery cost of each (idle drone, package) round trip plus stop and priority penalties"""
+        navigator = self.city.get_navigator()
+        home = (self.warehouse.x, self.warehouse.y)
+        if not navigator.has_distance_field(home):
+            navigator.precompute(home)
+
+        destinations = np.array([p['destination'] for p in packages], dtype=np.float64)
+        weights = np.array([p['weight'] for p in packages])
+        ranks = np.array([PRIORITY_RANK.get(p['priority'], len(PRIORITY_RANK)) for p in packages])
+        max_payload = np.array([fleet.drones[i].max_payload for i in idx])
+        positions = np.stack([fleet.x[idx], fleet.y[idx]], axis=1)
+
+        # Path distances to the warehouse from both ends of the trip
+        to_home = navigator.distance_to(home, positions)
+        back = navigator.distance_to(home, destinations)
+
+        # Octile lower bound on the outbound leg, tightened by the triangle inequality
+        delta = np.abs(positions[:, None, :] - destinations[None, :, :])
+        outbound = delta.max(axis=2) + (SQRT2 - 1) * delta.min(axis=2)
+        outbound = np.maximum(outbound, back[None, :] - to_home[:, None])
+        trip = outbound + back[None, :]
+
+        # Battery spent per cell flown is consumption per tick over cells per tick
+        per_cell = fleet.battery_consumption[idx] / np.maximum(self.speeds(fleet, idx), 1e-6)
+        energy = trip * per_cell[:, None]
+
+        # Trips beyond the battery budget are planned with charging stops: a drone
+        # that reaches the reserve books a station and recharges, then flies on
+        battery = fleet.battery[idx, None]
+        stops = self.charging_stops(battery, np.where(np.isfinite(energy), energy, 0.0))
+        feasible = (np.isfinite(trip) & (battery > self.battery_reserve) &
+                    (weights[None, :] <= max_payload[:, None]))
+        cost = energy + self.stop_penalty * stops + self.priority_weight * ranks[None, :]
+        return np.where(feasible, cost, INFEASIBLE)
+
+    def build_sortie(self, fleet, i, first, pool):
+        """Bundle pool packages near `first` within max_payload and the battery budget"""
+        drone = fleet.drones[i]
+        if self.max_stops <= 1 or not pool:
+            return [first]
+
+        # Closest extra stops to the first destination that still fit
+        sortie = [first]
+        capacity = drone.max_payload - first['weight']
+        for package in sorted(pool, key=lambda p: octile(p['destination'], first['destination'])):
+            if len(sortie) >= self.max_stops:
+                break
+            if package['weight'] <= capacity:
+                sortie.append(package)
+                capacity -= package['weight']
+        if len(sortie) == 1:
+            return sortie
+
+        # Drop the farthest additions until the ordered tour is affordable
+        navigator = self.city.get_navigator()
+        start = (fleet.x[i], fleet.y[i])
+        home = (self.warehouse.x, self.warehouse.y)
+        per_cell = fleet.battery_consumption[i] / max(self.speeds(fleet, i), 1e-6)
+        budget = (fleet.battery[i] - self.battery_reserve) / per_cell
+        while True:
+            ordered, length = plan_sortie(navigator, start, home, sortie)
+            if length <= budget or len(sortie) == 1:
+                return ordered
+            sortie.pop()
+
+    def dispatch(self, fleet):
+        """Assign packages to idle drones; re-solves only when drones or queue changed"""
+        queue = self.warehouse.packages
+        idle = fleet.indices(IDLE)
+        if len(idle) == 0 or not queue:
+            return 0
+        state = (queue.version, idle.tobytes())
+        if state == self.last_state:
+            return 0
+
+        # Look past packages no idle drone can serve (too heavy, or a destination
+        # cut off since it was queued) instead of stalling behind them
+        wanted = len(idle) * self.candidate_factor
+        k = wanted
+        while True:
+            packages = queue.candidates(k)
+            cost = self.cost_matrix(fleet, idle, packages)
+            servable = (cost < INFEASIBLE).any(axis=0)
+            if servable.sum() >= wanted or len(packages) == len(queue):
+                break
+            k *= 2
+        packages = [package for package, ok in zip(packages, servable) if ok]
+        cost = cost[:, servable]
+        rows, cols = linear_sum_assignment(cost)
+        self.solves += 1
+
+        # Each matched package seeds a sortie; unmatched candidates fill spare capacity
+        pairs = [(row, col) for row, col in zip(rows, cols) if cost[row, col] < INFEASIBLE]
+        matched = {packages[col]['id'] for _, col in pairs}
+        pool = [package for package in packages if package['id'] not in matched]
+        assigned = 0
+        for row, col in pairs:
+            sortie = self.build_sortie(fleet, idle[row], packages[col], pool)
+            loaded = {package['id'] for package in sortie}
+            pool = [package for package in pool if package['id'] not in loaded]
+            drone = fleet.drones[idle[row]]
+            # Packages leave the queue only once the drone has taken them
+            if drone.assign_packages(sortie):
+                for package in sortie:
+                    queue.remove(package['id'])
+                drone.start_delivery(self.city)
+                assigned += len(sortie)
+            else:
+                pool.extend(sortie)
+
+        # Drones that cannot serve any candidate go and recharge
+        for row in np.flatnonzero((cost >= INFEASIBLE).all(axis=1)):
+            drone = fleet.drones[idle[row]]
+            if drone.battery < 100:
+                drone.find_nearest_station(self.city, self.stations)
+
+        self.last_state = (queue.version, fleet.indices(IDLE).tobytes())
+        return assigned
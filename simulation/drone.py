@@ -1,29 +1,33 @@
-import math
-import heapq
-import time
-from datetime import datetime
+from collections import deque
 
 import pygame
 
-from simulation import city
-from .utils import distance, heuristic
 from .utils import *
-from .ml_model import MLModel
-
-import math
-import heapq
-import time
-import pygame
-import numpy as np
-from datetime import datetime
-from .utils import distance, heuristic
-from .ml_model import MLModel
+from .text_cache import render_text
+from .spatial import SpatialIndex
+from .fleet import (FleetState, STATUS_NAMES, STATUS_CODES,
+                    fleet_attribute, fleet_point)
 
 class Drone:
-    def __init__(self, id, x, y, warehouse):
+    """Thin view over one slot of a FleetState"""
+
+    x = fleet_attribute("x")
+    y = fleet_attribute("y")
+    speed = fleet_attribute("speed")
+    battery = fleet_attribute("battery")
+    battery_consumption = fleet_attribute("battery_consumption")
+    battery_decrease_rate = fleet_attribute("battery_decrease_rate")
+    last_battery = fleet_attribute("last_battery")
+    payload = fleet_attribute("payload")
+    battery_warning_sent = fleet_attribute("battery_warning_sent")
+    stuck_timer = fleet_attribute("stuck_timer")
+    current_target = fleet_point("target_x", "target_y", "has_target")
+    destination = fleet_point("dest_x", "dest_y", "has_dest")
+
+    def __init__(self, id, x, y, warehouse, fleet=None):
+        self.fleet = fleet if fleet is not None else FleetState(capacity=1)
+        self.index = self.fleet.add(self, x, y)
         self.id = id
-        self.x = x
-        self.y = y
         self.warehouse = warehouse
         self.color = DRONE_COLOR
         self.radius = 8
@@ -34,91 +38,77 @@ class Drone:
         self.payload = 0
         self.status = "IDLE"
         self.package = None
-        self.path = []
+        self.manifest = deque()
+        self.path = deque()
         self.current_target = None
-        self.next_target = None
         self.destination = None
         self.charging_station = None
         self.battery_warning_sent = False
-        self.last_update = time.time()
         self.start_pos = (x, y)
         self.battery_decrease_rate = 0
         self.last_battery = 100
-        self.ml_model = MLModel()
-        self.ml_model.load_models()
+        self.ml_model = warehouse.ml_model     # held by the engine that owns the warehouse
         self.stuck_timer = 0
-        self.last_position = (x, y)
-    
-    def update(self, city, stations):
-        current_time = time.time()
-        delta_time = current_time - self.last_update
-        self.last_update = current_time
-        
-        # Check if drone is stuck
-        current_pos = (self.x, self.y)
-        if distance(current_pos, self.last_position) < 0.01:
-            self.stuck_timer += delta_time
-            if self.stuck_timer > 5:  # Stuck for 5 seconds
-                self.recover_from_stuck(city, stations)
-        else:
-            self.stuck_timer = 0
-        self.last_position = current_pos
-        
-        # Consume battery based on activity
-        if self.status in ["DELIVERING", "RETURNING"]:
-            self.battery -= self.battery_consumption * delta_time * 60
-        elif self.status == "CHARGING":
-            self.battery += 0.5 * delta_time * 60
-            
-            if self.battery >= 100:
-                self.battery = 100
-                self.status = "IDLE"
-                if self.charging_station:
-                    self.charging_station.remove_drone(self)
-                self.charging_station = None
-        
-        # Track battery decrease rate
-        battery_decrease = self.last_battery - self.battery
-        if delta_time > 0:
-            self.battery_decrease_rate = battery_decrease / delta_time
-        self.last_battery = self.battery
-        
-        # Check for low battery
-        if self.battery < 20 and not self.battery_warning_sent:
-            self.battery_warning_sent = True
-            if self.status != "CHARGING":
-                self.find_nearest_station(city, stations)
-        
-        # Handle movement
-        if self.path and self.status in ["DELIVERING", "RETURNING"]:
-            if not self.current_target:
-                self.current_target = self.path.pop(0)
-            
-            dx = self.current_target[0] - self.x
-            dy = self.current_target[1] - self.y
-            dist = math.sqrt(dx*dx + dy*dy)
-            
-            if dist < self.speed:
-                self.x, self.y = self.current_target
-                if self.path:
-                    self.current_target = self.path.pop(0)
-                else:
-                    self.current_target = None
-                    
-                    # Reached destination
-                    if self.status == "DELIVERING":
-                        self.status = "RETURNING"
-                        self.find_path(city, (self.x, self.y), 
-                                      (self.warehouse.x, self.warehouse.y))
-                    elif self.status == "RETURNING":
-                        self.status = "IDLE"
-                        self.payload = 0
-                        self.package = None
-            else:
-                # Move toward target
-                self.x += dx * self.speed / dist
-                self.y += dy * self.speed / dist
-    
+
+    @property
+    def status(self):
+        return STATUS_NAMES[self.fleet.status[self.index]]
+
+    @status.setter
+    def status(self, value):
+        self.fleet.status[self.index] = STATUS_CODES[value]
+
+    @property
+    def last_position(self):
+        return (self.fleet.last_x[self.index].item(), self.fleet.last_y[self.index].item())
+
+    def update(self, city, stations, delta_time):
+        """Advance this drone alone by `delta_time`; engines should batch through FleetState.update"""
+        self.fleet.update(city, stations, delta_time, [self.index])
+
+    def finish_charging(self, city=None):
+        self.status = "IDLE"
+        self.battery_warning_sent = False
+        if self.charging_station:
+            self.charging_station.remove_drone(self)
+        self.charging_station = None
+
+        if city is None:
+            return
+
+        # Resume an interrupted sortie, or the flight home after one
+        if self.package is not None:
+            self.status = "DELIVERING"
+            self.find_path(city, (self.x, self.y), self.destination)
+            return
+        self.unload()
+        if distance((self.x, self.y), (self.warehouse.x, self.warehouse.y)) > 1.0:
+            self.status = "RETURNING"
+            self.find_path(city, (self.x, self.y), (self.warehouse.x, self.warehouse.y))
+
+    def advance_waypoint(self, city):
+        """Called by the fleet when the current waypoint has been reached"""
+        if self.path:
+            target = self.path.popleft()
+            # A repeated cell is a planned wait: hold for one reservation slot
+            if city.planner is not None and target == self.current_target:
+                self.fleet.speed_scale[self.index] = 0.0
+                self.fleet.resolve_timer[self.index] = city.planner.slot_duration
+            self.current_target = target
+            return
+
+        self.current_target = None
+
+        # Reached destination
+        if self.status == "DELIVERING":
+            self.status = "RETURNING"
+            self.find_path(city, (self.x, self.y),
+                           (self.warehouse.x, self.warehouse.y))
+        elif self.status == "RETURNING":
+            self.status = "IDLE"
+            self.package = None
+            self.unload()
+
     def recover_from_stuck(self, city, stations):
         """Recover when drone is stuck"""
         print(f"Drone {self.id} is stuck! Attempting recovery...")
@@ -138,83 +128,92 @@ class Drone:
         self.stuck_timer = 0
 
     def assign_package(self, package):
-        if self.status == "IDLE" and self.payload == 0:
-            self.package = package
-            self.payload = package['weight']
-            self.destination = package['destination']
+        return self.assign_packages([package])
+
+    def assign_packages(self, packages):
+        """Load a sortie; packages are delivered in the given order"""
+        if self.status == "IDLE" and self.payload == 0 and packages:
+            self.package = packages[0]
+            self.manifest = deque(packages[1:])
+            self.payload = sum(package['weight'] for package in packages)
+            self.destination = self.package['destination']
             self.status = "LOADING"
             self.battery_warning_sent = False
             return True
         return False
 
+    def unload(self):
+        """Empty the hold once no package is left, dropping float leftovers of the payload"""
+        if self.package is None:
+            self.manifest.clear()
+            self.payload = 0
+
+    def next_stop(self, city):
+        """Head for the next package of the sortie; False when the sortie is done"""
+        if not self.manifest:
+            self.unload()
+            return False
+        self.package = self.manifest.popleft()
+        self.destination = self.package['destination']
+        self.start_pos = (self.x, self.y)
+        self.find_path(city, (self.x, self.y), self.destination)
+        return True
+
     def start_delivery(self, city):
         if self.status == "LOADING":
             self.status = "DELIVERING"
             self.find_path(city, (self.x, self.y), self.destination)
 
     def find_path(self, city, start, end):
-        # Try ML optimized path
-        ml_path = self.ml_model.get_optimized_route(start, end, self.battery, city)
-        if ml_path:
-            self.path = ml_path
-            if self.path:
-                self.current_target = self.path.pop(0)
-            return
-
-        # Fallback to A*
-        open_set = []
-        closed_set = set()
-        came_from = {}
+        navigator = city.get_navigator()
 
-        g_score = {start: 0}
-        f_score = {start: heuristic(start, end)}
-
-        heapq.heappush(open_set, (f_score[start], start))
-
-        while open_set:
-            current = heapq.heappop(open_set)[1]
-
-            if current == end:
-                self.path = []
-                while current in came_from:
-                    self.path.append(current)
-                    current = came_from[current]
-                self.path.reverse()
-                if self.path:
-                    self.current_target = self.path.pop(0)
+        # Plan around other drones' reserved trajectories when cooperative planning is on
+        if city.planner is not None:
+            path = city.planner.plan(self.id, start, end)
+            if path is not None:
+                self.follow_path(path, end)
                 return
 
-            closed_set.add(current)
-
-            for dx, dy in [(0,1), (1,0), (0,-1), (-1,0), (1,1), (1,-1), (-1,1), (-1,-1)]:
-                neighbor = (current[0]+dx, current[1]+dy)
-
-                if not city.is_valid_position(int(neighbor[0]), int(neighbor[1])):
-                    continue
-                if neighbor in closed_set:
-                    continue
+        # Fixed goals (warehouse, stations) are a walk down a distance field
+        if navigator.has_distance_field(end):
+            path = navigator.find_path(start, end)
+            if path is not None:
+                self.follow_path(path, end)
+                return
 
-                tentative_g = g_score[current] + 1
+        # Try the trained RL route, as long as it actually reaches the target
+        ml_path = self.ml_model.get_optimized_route(start, end, self.battery, city)
+        if ml_path and ml_path[-1] == tuple(end):
+            self.path = deque(ml_path)
+            if self.path:
+                self.current_target = self.path.popleft()
+            return
 
-                if neighbor not in g_score or tentative_g < g_score[neighbor]:
-                    came_from[neighbor] = current
-                    g_score[neighbor] = tentative_g
-                    f_score[neighbor] = tentative_g + heuristic(neighbor, end)
-                    heapq.heappush(open_set, (f_score[neighbor], neighbor))
+        # Fallback to the navigator (Jump Point Search by default)
+        path = navigator.find_path(start, end)
+        self.follow_path(path or [], end)
 
-        self.path = [end]
-        self.current_target = end
+    def follow_path(self, path, end):
+        self.path = deque(path)
+        if self.path:
+            self.current_target = self.path.popleft()
+        else:
+            self.current_target = end
 
     def find_nearest_station(self, city, stations):
-        min_dist = float('inf')
-        nearest = None
+        if isinstance(stations, SpatialIndex):
+            nearest = stations.nearest_one(self.x, self.y,
+                                          lambda station: station.can_charge())
+        else:
+            min_dist = float('inf')
+            nearest = None
 
-        for station in stations:
-            if station.can_charge():
-                dist = distance((self.x, self.y), (station.x, station.y))
-                if dist < min_dist:
-                    min_dist = dist
-                    nearest = station
+            for station in stations:
+                if station.can_charge():
+                    dist = distance((self.x, self.y), (station.x, station.y))
+                    if dist < min_dist:
+                        min_dist = dist
+                        nearest = station
 
         if nearest:
             self.charging_station = nearest
@@ -224,28 +223,29 @@ class Drone:
             return True
         return False
 
-    def draw(self, surface, cell_size, font_small):
-        pygame.draw.circle(surface, self.color, 
-                          (int(self.x * cell_size), int(self.y * cell_size)), 
-                          self.radius)
+    def draw(self, surface, camera, font_small, labels=True, path=True):
+        sx, sy = camera.to_screen(self.x, self.y)
+        rect = pygame.draw.circle(surface, self.color, (sx, sy), self.radius)
 
-        text = font_small.render(f"D{self.id}", True, TEXT_COLOR)
-        surface.blit(text, (int(self.x * cell_size) - 5, int(self.y * cell_size) - 20))
+        if labels:
+            text = render_text(font_small, f"D{self.id}", TEXT_COLOR)
+            rect.union_ip(surface.blit(text, (sx - 5, sy - 20)))
 
-        status_text = f"{self.status[:4]} | {int(self.battery)}%"
-        if self.payload > 0:
-            status_text += f" | {self.payload}kg"
-        text = font_small.render(status_text, True, TEXT_COLOR)
-        surface.blit(text, (int(self.x * cell_size) - 25, int(self.y * cell_size) - 35))
+            status_text = f"{self.status[:4]} | {int(self.battery)}%"
+            if self.payload > 0:
+                status_text += f" | {self.payload:.1f}kg"
+            text = render_text(font_small, status_text, TEXT_COLOR)
+            rect.union_ip(surface.blit(text, (sx - 25, sy - 35)))
 
-        if self.path and self.status in ["DELIVERING", "RETURNING"]:
-            points = [(int(self.x * cell_size), int(self.y * cell_size))]
-            points.extend((int(x * cell_size), int(y * cell_size)) for x, y in self.path)
+        if path and self.path and self.status in ["DELIVERING", "RETURNING"]:
+            points = [(sx, sy)]
+            points.extend(camera.to_screen(x, y) for x, y in self.path)
 
             if len(points) > 1:
-                pygame.draw.lines(surface, DRONE_PATH, False, points, 2)
+                rect.union_ip(pygame.draw.lines(surface, DRONE_PATH, False, points, 2))
                 dest_x, dest_y = points[-1]
-                pygame.draw.circle(surface, (200, 100, 100), (dest_x, dest_y), 6, 2)
+                rect.union_ip(pygame.draw.circle(surface, (200, 100, 100), (dest_x, dest_y), 6, 2))
+        return rect
 
     def get_predicted_battery_life(self):
         return self.ml_model.predict_battery_life(self)
@@ -0,0 +1,311 @@
+import random
+import numpy as np
+from datetime import datetime, timedelta
+
+from .city import CityGrid
+from .warehouse import Warehouse
+from .station import ChargingStation
+from .locker import SmartLocker
+from .weather import WeatherSimulator
+from .dashboard import Dashboard
+from .model_registry import acquire_model, release_model, reload_models
+from .data_collector import DataCollector
+from .drone import Drone
+from .fleet import FleetState
+from .dispatch import Dispatcher
+from .spatial import SpatialIndex
+from .deconfliction import Deconfliction
+from .reservation import CooperativePlanner
+from .renderer import Renderer
+from .camera import Camera, DetailLevel
+from .anomaly import AnomalyMonitor
+from .trajectory import TrajectoryWriter
+from .utils import *
+
+# Seeded runs start at a fixed time so time-of-day demand features repeat too
+SEEDED_START = datetime(2024, 1, 1, 8)
+
+class SimulationEngine:
+    """Fixed-timestep simulation core, usable with or without a display"""
+
+    def __init__(self, width=30, height=20, num_drones=10, num_lockers=3,
+                 num_stations=3, headless=False, dt=1 / 60,
+                 demand_interval=300, save_interval=300, cooperative=False,
+                 pickup_interval=300, trajectory_path=None, seed=None, start_datetime=None):
+        # Seed every random source before anything draws from it, so runs repeat
+        self.seed = seed
+        if seed is not None:
+            random.seed(seed)
+            np.random.seed(seed)
+        self.headless = headless
+        self.dt = dt
+        self.demand_interval = demand_interval
+        self.save_interval = save_interval
+        self.pickup_interval = pickup_interval
+
+        # Simulated clock
+        self.tick = 0
+        self.sim_time = 0.0
+        if start_datetime is None:
+            start_datetime = datetime.now() if seed is None else SEEDED_START
+        self.start_datetime = start_datetime
+
+        self.city = CityGrid(width, height)
+
+        # One reference to the shared model for this grid size, released at shutdown
+        self.grid_size = (width, height)
+        self.ml_system = acquire_model(self.grid_size)
+
+        # Create lockers first
+        self.lockers = []
+        for i in range(num_lockers):
+            x, y = self.random_position()
+            self.lockers.append(SmartLocker(x, y, i + 1))
+
+        # Pass city to warehouse, on an open cell near the corner
+        self.warehouse = Warehouse(*self.nearest_open_position(2, 2), 1, self.city,
+                                   self.ml_system, demand_interval=demand_interval)
+
+        # Create charging stations
+        self.stations = []
+        for i in range(num_stations):
+            x, y = self.random_position()
+            self.stations.append(ChargingStation(x, y, i + 1))
+
+        # Spatial indexes for nearest-facility queries
+        self.locker_index = SpatialIndex(items=self.lockers)
+        self.station_index = SpatialIndex(items=self.stations)
+
+        # Precompute routes to the fixed goals
+        navigator = self.city.get_navigator()
+        navigator.precompute((self.warehouse.x, self.warehouse.y))
+        for station in self.stations:
+            navigator.precompute((station.x, station.y))
+
+        # Cooperative space-time planning around other drones' reservations
+        if cooperative:
+            depots = [(self.warehouse.x, self.warehouse.y)]
+            depots += [(station.x, station.y) for station in self.stations]
+            self.city.planner = CooperativePlanner(navigator, shared_cells=depots)
+
+        self.dispatcher = Dispatcher(self.warehouse, self.city, self.station_index)
+
+        # Create drones
+        self.fleet = FleetState()
+        self.drones = self.fleet.drones
+        for _ in range(num_drones):
+            self.add_drone()
+
+        self.deconfliction = Deconfliction()
+        self.weather = WeatherSimulator()
+        self.dashboard = Dashboard()
+        self.camera = Camera(width, height, scale=self.city.cell_size)
+        self.detail = DetailLevel()
+
+        # Simulation state
+        self.packages_delivered = 0
+        self.last_demand_update = 0.0
+        self.last_data_save = 0.0
+        self.last_pickup = 0.0
+        self.cruise_speed = 0.04
+        self.anomalies = []
+        self.anomaly_monitor = AnomalyMonitor(self.ml_system, background=not self.headless,
+                                              seed=self.seed)
+
+        self.start_services(trajectory_path)
+
+    def start_services(self, trajectory_path=None):
+        """Rendering, data collection and replay logging (not snapshotted)"""
+        self.renderer = None if self.headless else Renderer(self.city, self.camera)
+        self.data_collector = DataCollector()
+
+        # Optional per-tick replay log of the whole fleet
+        self.trajectory = TrajectoryWriter(trajectory_path) if trajectory_path else None
+
+    @property
+    def now(self):
+        """Simulated wall-clock time"""
+        return self.start_datetime + timedelta(seconds=self.sim_time)
+
+    def random_position(self):
+        """Pick a random passable cell away from the map edges"""
+        max_x = max(5, self.city.width - 5)
+        max_y = max(5, self.city.height - 5)
+        x, y = random.randint(5, max_x), random.randint(5, max_y)
+        while not self.city.is_valid_position(x, y):
+            x, y = random.randint(5, max_x), random.randint(5, max_y)
+        return x, y
+
+    def nearest_open_position(self, x, y):
+        """Closest passable cell to (x, y)"""
+        open_cells = np.argwhere(self.city.get_navigator().passable)
+        best = open_cells[np.abs(open_cells - (x, y)).sum(axis=1).argmin()]
+        return int(best[0]), int(best[1])
+
+    def add_drone(self):
+        return Drone(len(self.drones) + 1,
+                     self.warehouse.x + random.uniform(-0.5, 0.5),
+                     self.warehouse.y + random.uniform(-0.5, 0.5),
+                     self.warehouse, self.fleet)
+
+    def add_package(self):
+        self.warehouse.add_package(self.now)
+
+    def trigger_storm(self):
+        self.weather.current_event = {"name": "Storm", "duration": 50, "wind": (30, 60)}
+        self.weather.update_counter = 0
+
+    def retrain_models(self):
+        print("Retraining ML models...")
+        # In a real implementation, we'd retrain models here
+        # This would typically be done in a separate process
+        reload_models()  # Just reload the shared models for now
+
+    def step(self, dt=None):
+        """Advance the simulation by one fixed timestep"""
+        if dt is None:
+            dt = self.dt
+        self.tick += 1
+        self.sim_time += dt
+
+        if self.city.planner is not None:
+            self.city.planner.advance(dt, self.cruise_speed)
+
+        # Update demand based on ML prediction
+        if self.sim_time - self.last_demand_update > self.demand_interval:
+            weather_impact = self.weather.get_weather_impact()
+            self.warehouse.generate_packages(weather_impact, self.now)
+            self.last_demand_update = self.sim_time
+
+        # Assign packages to idle drones in one batch
+        self.dispatcher.dispatch(self.fleet)
+
+        # Keep flying drones separated
+        self.deconfliction.update(self.fleet)
+
+        # Update all drones in one batch
+        self.fleet.update(self.city, self.station_index, dt)
+
+        # Check if drones reached their delivery locations
+        for i in self.fleet.arrivals(0.5):
+            self.deliver(self.drones[i])
+
+        # Update weather
+        self.weather.update()
+        weather_impact = self.weather.get_weather_impact()
+
+        # Apply weather impact to drones
+        self.cruise_speed = 0.04 * weather_impact
+        self.fleet.set_flying_speed(self.cruise_speed)
+        self.dispatcher.cruise_speed = self.cruise_speed
+
+        # Update dashboard
+        self.dashboard.update(self.fleet, self.packages_delivered,
+                              len(self.warehouse.packages), self.sim_time)
+
+        # Customers empty the lockers periodically
+        if self.sim_time - self.last_pickup > self.pickup_interval:
+            for locker in self.lockers:
+                locker.collect()
+            self.last_pickup = self.sim_time
+
+        # Save data periodically
+        if self.sim_time - self.last_data_save > self.save_interval:
+            self.data_collector.save_all_data()
+            self.last_data_save = self.sim_time
+
+        # Detect anomalies on the monitor's cadence; only new alerts are reported
+        self.anomalies = self.anomaly_monitor.update(self.fleet, self.sim_time)
+        if self.anomalies:
+            print("\n--- ANOMALIES DETECTED ---")
+            for anomaly in self.anomalies:
+                print(anomaly)
+
+        # Log the fleet for replay
+        if self.trajectory is not None:
+            self.trajectory.record(self.tick, self.fleet)
+
+    def deliver(self, drone):
+        """Hand the drone's package to a locker, then fly to the next stop or home"""
+        # Deliver package to nearest locker with space
+        locker = self.locker_index.nearest_one(drone.x, drone.y, SmartLocker.has_space)
+        if locker and locker.add_package(drone.package):
+            self.packages_delivered += 1
+            delivery_time = (self.now - drone.package['created_at']).total_seconds()
+            self.dashboard.add_delivery_time(delivery_time)
+
+            # Record routing performance
+            optimal_length = abs(drone.start_pos[0]-drone.destination[0]) + abs(drone.start_pos[1]-drone.destination[1])
+            self.data_collector.record_routing(
+                self.now, self.tick, drone.start_pos, drone.destination, drone.path,
+                optimal_length, 100, drone.battery, self.weather.get_weather_impact()
+            )
+
+            drone.payload = max(0, drone.payload - drone.package['weight'])
+            drone.package = None
+        elif drone.package:
+            # Every locker is full: the package goes back into the warehouse queue
+            self.warehouse.packages.push(drone.package)
+            drone.payload = max(0, drone.payload - drone.package['weight'])
+            drone.package = None
+
+        # Continue the sortie, then return to warehouse (also when all lockers are full)
+        if drone.next_stop(self.city):
+            return
+        drone.status = "RETURNING"
+        drone.find_path(self.city, (drone.x, drone.y),
+                        (drone.warehouse.x, drone.warehouse.y))
+
+    def throughput(self):
+        """Deliveries per simulated hour so far"""
+        return self.packages_delivered * 3600 / max(self.sim_time, 1e-9)
+
+    def run(self, duration, callback=None):
+        """Step headlessly for `duration` simulated seconds, rounded to whole ticks"""
+        # Count ticks: comparing accumulated float time overshoots by one
+        for _ in range(int(round(duration / self.dt))):
+            self.step()
+            if callback:
+                callback(self)
+        return self.tick
+
+    def shutdown(self):
+        """Flush collected data and stop background work"""
+        # A telemetry write error still propagates, after everything else has stopped
+        try:
+            self.data_collector.close()
+        finally:
+            self.warehouse.historical_data.close()
+            self.anomaly_monitor.close()
+            if self.trajectory is not None:
+                self.trajectory.close()
+            release_model(self.grid_size)
+
+    def draw(self, screen, font_small, font_medium, font_large):
+        """Draw sprites over the cached city layer; finish with renderer.end_frame()"""
+        if self.headless:
+            return
+        renderer = self.renderer
+        camera = self.camera
+        detail = self.detail
+        renderer.begin_frame(screen)
+        labels = camera.scale >= detail.label_scale
+
+        # Draw lockers, charging stations and the warehouse that are on screen
+        for site in self.lockers + self.stations + [self.warehouse]:
+            if camera.contains(site.x, site.y, detail.margin):
+                renderer.add(site.draw(screen, camera, font_small, labels))
+
+        # Draw drones: individually where sparse, as heat tiles where crowded
+        n = self.fleet.size
+        sprites, tiles = detail.split(camera, self.fleet.x[:n], self.fleet.y[:n])
+        renderer.add(detail.draw_heat(screen, tiles))
+        paths = camera.scale >= detail.path_scale
+        for i in sprites.tolist():
+            renderer.add(self.drones[i].draw(screen, camera, font_small, labels, paths))
+
+        # Draw weather
+        renderer.add(self.weather.draw(screen, font_medium))
+
+        # Draw dashboard
+        renderer.add(self.dashboard.draw(screen, font_small, font_medium, font_large))
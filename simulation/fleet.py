@@ -0,0 +1,191 @@
+import numpy as np
+
+# Drone status codes stored in the fleet arrays
+STATUS_NAMES = ["IDLE", "LOADING", "DELIVERING", "RETURNING", "CHARGING"]
+STATUS_CODES = {name: code for code, name in enumerate(STATUS_NAMES)}
+IDLE, LOADING, DELIVERING, RETURNING, CHARGING = range(len(STATUS_NAMES))
+
+# Per-drone columns: name, dtype, default value
+FIELDS = [
+    ("x", np.float64, 0.0),
+    ("y", np.float64, 0.0),
+    ("speed", np.float64, 0.04),
+    ("battery", np.float64, 100.0),
+    ("battery_consumption", np.float64, 0.05),
+    ("battery_decrease_rate", np.float64, 0.0),
+    ("last_battery", np.float64, 100.0),
+    ("payload", np.float64, 0.0),
+    ("status", np.int8, IDLE),
+    ("battery_warning_sent", np.bool_, False),
+    ("stuck_timer", np.float64, 0.0),
+    ("last_x", np.float64, 0.0),
+    ("last_y", np.float64, 0.0),
+    ("target_x", np.float64, 0.0),
+    ("target_y", np.float64, 0.0),
+    ("has_target", np.bool_, False),
+    ("dest_x", np.float64, 0.0),
+    ("dest_y", np.float64, 0.0),
+    ("has_dest", np.bool_, False),
+    # Deconfliction adjustments and the time left before they lapse
+    ("speed_scale", np.float64, 1.0),
+    ("altitude", np.int8, 0),
+    ("resolve_timer", np.float64, 0.0),
+]
+
+def fleet_attribute(name):
+    """Expose one fleet column as a scalar attribute on a drone view"""
+    def getter(self):
+        return getattr(self.fleet, name)[self.index].item()
+
+    def setter(self, value):
+        getattr(self.fleet, name)[self.index] = value
+
+    return property(getter, setter)
+
+def fleet_point(x_name, y_name, flag_name):
+    """Expose an optional (x, y) pair of fleet columns as a tuple attribute"""
+    def getter(self):
+        if getattr(self.fleet, flag_name)[self.index]:
+            return (getattr(self.fleet, x_name)[self.index].item(),
+                    getattr(self.fleet, y_name)[self.index].item())
+        return None
+
+    def setter(self, value):
+        if value is None:
+            getattr(self.fleet, flag_name)[self.index] = False
+        else:
+            getattr(self.fleet, x_name)[self.index] = value[0]
+            getattr(self.fleet, y_name)[self.index] = value[1]
+            getattr(self.fleet, flag_name)[self.index] = True
+
+    return property(getter, setter)
+
+class FleetState:
+    """Structure-of-arrays store for drone state with a batched update"""
+
+    def __init__(self, capacity=64):
+        self.size = 0
+        self.capacity = 0
+        self.drones = []
+        self._grow(max(1, capacity))
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self, capacity):
+        for name, dtype, default in FIELDS:
+            array = np.full(capacity, default, dtype=dtype)
+            if self.capacity:
+                array[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    def add(self, drone, x, y):
+        """Reserve a slot for `drone` and return its index"""
+        if self.size == self.capacity:
+            self._grow(self.capacity * 2)
+        index = self.size
+        self.size += 1
+        self.drones.append(drone)
+        self.x[index] = self.last_x[index] = x
+        self.y[index] = self.last_y[index] = y
+        return index
+
+    def indices(self, status):
+        """Indices of drones currently in `status`"""
+        return np.flatnonzero(self.status[:self.size] == status)
+
+    def status_counts(self):
+        """Number of drones per status name"""
+        counts = np.bincount(self.status[:self.size], minlength=len(STATUS_NAMES))
+        return {name: int(counts[code]) for code, name in enumerate(STATUS_NAMES)}
+
+    def flying_mask(self, idx):
+        status = self.status[idx]
+        return (status == DELIVERING) | (status == RETURNING)
+
+    def set_flying_speed(self, speed):
+        """Set the speed of every delivering or returning drone"""
+        n = self.size
+        self.speed[:n][self.flying_mask(slice(0, n))] = speed
+
+    def arrivals(self, radius):
+        """Indices of delivering drones within `radius` of their destination"""
+        n = self.size
+        mask = (self.status[:n] == DELIVERING) & self.has_target[:n] & self.has_dest[:n]
+        idx = np.flatnonzero(mask)
+        dist = np.hypot(self.x[idx] - self.dest_x[idx], self.y[idx] - self.dest_y[idx])
+        return idx[dist < radius]
+
+    def update(self, city, stations, delta_time, indices=None):
+        """Advance movement, battery and arrival detection for many drones"""
+        if indices is None:
+            idx = np.arange(self.size)
+        else:
+            idx = np.asarray(indices, dtype=np.intp)
+        if len(idx) == 0:
+            return
+
+        # Lapse expired deconfliction adjustments
+        timer = self.resolve_timer[idx]
+        expired = idx[(timer > 0) & (timer <= delta_time)]
+        self.resolve_timer[idx] = np.maximum(timer - delta_time, 0.0)
+        self.speed_scale[expired] = 1.0
+        self.altitude[expired] = 0
+
+        # Check if flying drones are stuck (holding drones are waiting, not stuck)
+        x, y = self.x[idx], self.y[idx]
+        still = np.hypot(x - self.last_x[idx], y - self.last_y[idx]) < 0.01
+        still &= self.flying_mask(idx) & (self.speed_scale[idx] > 0)
+        self.stuck_timer[idx] = np.where(still, self.stuck_timer[idx] + delta_time, 0.0)
+        self.last_x[idx] = x
+        self.last_y[idx] = y
+        for i in idx[still & (self.stuck_timer[idx] > 5)]:  # Stuck for 5 seconds
+            self.drones[i].recover_from_stuck(city, stations)
+
+        # Consume battery based on activity
+        status = self.status[idx]
+        flying = (status == DELIVERING) | (status == RETURNING)
+        charging = status == CHARGING
+        battery = self.battery[idx]
+        battery -= np.where(flying, self.battery_consumption[idx] * delta_time * 60, 0.0)
+        battery += np.where(charging, 0.5 * delta_time * 60, 0.0)
+        full = charging & (battery >= 100)
+        battery[full] = 100
+        self.battery[idx] = battery
+        for i in idx[full]:
+            self.drones[i].finish_charging(city)
+
+        # Track battery decrease rate
+        if delta_time > 0:
+            self.battery_decrease_rate[idx] = (self.last_battery[idx] - battery) / delta_time
+        self.last_battery[idx] = battery
+
+        # Check for low battery
+        low = (battery < 20) & ~self.battery_warning_sent[idx]
+        for i in idx[low]:
+            # Keep trying each tick until a station has room
+            if self.status[i] == CHARGING or self.drones[i].find_nearest_station(city, stations):
+                self.battery_warning_sent[i] = True
+
+        # Pick up the first waypoint of freshly planned paths
+        flying = self.flying_mask(idx)
+        for i in idx[flying & ~self.has_target[idx]]:
+            drone = self.drones[i]
+            if drone.path:
+                drone.current_target = drone.path.popleft()
+
+        # Handle movement
+        m = idx[flying & self.has_target[idx]]
+        if len(m) == 0:
+            return
+        dx = self.target_x[m] - self.x[m]
+        dy = self.target_y[m] - self.y[m]
+        dist = np.hypot(dx, dy)
+        step = self.speed[m] * self.speed_scale[m] * delta_time * 60
+        arrived = dist < step
+        scale = np.where(arrived, 0.0, step / np.where(dist > 0, dist, 1.0))
+        self.x[m] = np.where(arrived, self.target_x[m], self.x[m] + dx * scale)
+        self.y[m] = np.where(arrived, self.target_y[m], self.y[m] + dy * scale)
+        for i in m[arrived]:
+            self.drones[i].advance_waypoint(city)
@@ -0,0 +1,75 @@
+import numpy as np
+
+# Warehouse demand history; the forecaster reads its windows straight from these columns
+HISTORY_COLUMNS = {
+    'timestamp': 'datetime64[us]',
+    'demand': np.int64,
+    'weather_impact': np.float64,
+    'hour': np.int8,
+    'day_of_week': np.int8
+}
+
+# Feature order expected by DemandPredictor
+FEATURE_COLUMNS = ('demand', 'hour', 'day_of_week', 'weather_impact')
+
+# The demand model is trained on hourly rows
+MODEL_STEP = 3600
+
+def history_stride(interval):
+    """History rows per model step when observations arrive every `interval` seconds"""
+    return max(1, int(round(MODEL_STEP / interval)))
+
+class DemandForecaster:
+    """Batched, multi-horizon demand inference over warehouse history buffers"""
+
+    def __init__(self, predictor):
+        self.predictor = predictor
+        self.sequence_length = predictor.sequence_length
+        self.n_features = predictor.n_features
+
+    def window(self, history, interval=MODEL_STEP):
+        """Latest `sequence_length` model-step feature rows of a history buffer, oldest first"""
+        # Each column window is a strided view into the ring; stacking is the only copy
+        stride = history_stride(interval)
+        X = np.stack([history.window(name, self.sequence_length, stride)
+                      for name in FEATURE_COLUMNS], axis=1).astype(np.float32)
+
+        # Warm up a short history by repeating its first observation
+        missing = self.sequence_length - len(X)
+        if missing > 0 and len(X):
+            X = np.concatenate([np.repeat(X[:1], missing, axis=0), X])
+        return X
+
+    def windows(self, histories, interval=MODEL_STEP):
+        return np.stack([self.window(history, interval) for history in histories])
+
+    def predict(self, histories, horizon=1, interval=MODEL_STEP):
+        """Forecast `horizon` model steps for each history; returns (len(histories), horizon)
+
+        `interval` is the seconds between history rows. Windows sample the
+        history at the model's hourly step, and each horizon step is one
+        such step (the whole interval when it is longer than an hour).
+        """
+        histories = list(histories)
+        forecasts = np.zeros((len(histories), horizon))
+        if len(histories) == 0:
+            return forecasts
+
+        hours = history_stride(interval) * interval / 3600
+        X = self.windows(histories, interval)
+        for step in range(horizon):
+            forecasts[:, step] = self.predictor.predict_batch(X)
+            if step + 1 == horizon:
+                break
+
+            # Roll every window forward one step with the predicted demand
+            last = X[:, -1]
+            hour = last[:, 1] + hours
+            day = (last[:, 2] + hour // 24) % 7
+            row = np.stack([forecasts[:, step], hour % 24, day, last[:, 3]], axis=1)
+            X = np.concatenate([X[:, 1:], row[:, None, :].astype(np.float32)], axis=1)
+        return np.maximum(forecasts, 0)
+
+    def predict_one(self, history, interval=MODEL_STEP):
+        """Next-step demand for a single history buffer"""
+        return float(self.predict([history], interval=interval)[0, 0])
@@ -0,0 +1,298 @@
+import heapq
+from collections import OrderedDict
+
+from .utils import octile
+
+class HierarchicalPathfinder:
+    """HPA* abstraction over a Navigator: clusters, entrances and intra-cluster costs"""
+
+    def __init__(self, navigator, cluster_size=16, max_entrance_width=6, cache_size=2048):
+        self.navigator = navigator
+        self.cluster_size = cluster_size
+        self.max_entrance_width = max_entrance_width
+        self.cache_size = cache_size
+        self.segment_cache = OrderedDict()
+        self.build()
+        navigator.add_listener(self.update_cells)
+
+    def build(self):
+        """Build the abstract graph for the whole grid"""
+        nav = self.navigator
+        size = self.cluster_size
+        self.clusters_x = -(-nav.width // size)
+        self.clusters_y = -(-nav.height // size)
+        self.borders = {}       # (cluster_a, cluster_b) -> [(cell_a, cell_b, cost)]
+        self.transitions = {}   # entrance cell -> {cell across the border: cost}
+        self.intra_edges = {}   # cluster -> {entrance: {entrance: cost}}
+        self.segment_cache.clear()
+
+        for cx in range(self.clusters_x):
+            for cy in range(self.clusters_y):
+                for border in self.cluster_borders((cx, cy)):
+                    if border[0] == (cx, cy):
+                        self.set_border(border, self.find_entrances(*border))
+
+        for cx in range(self.clusters_x):
+            for cy in range(self.clusters_y):
+                self.build_cluster((cx, cy))
+
+    def cluster_of(self, cell):
+        return (cell[0] // self.cluster_size, cell[1] // self.cluster_size)
+
+    def bounds(self, cluster):
+        x0 = cluster[0] * self.cluster_size
+        y0 = cluster[1] * self.cluster_size
+        return (x0, y0,
+                min(x0 + self.cluster_size, self.navigator.width),
+                min(y0 + self.cluster_size, self.navigator.height))
+
+    def cluster_borders(self, cluster):
+        """Borders shared with the (up to eight) adjacent clusters"""
+        cx, cy = cluster
+        borders = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                other = (cx + dx, cy + dy)
+                if other == cluster:
+                    continue
+                if not (0 <= other[0] < self.clusters_x and 0 <= other[1] < self.clusters_y):
+                    continue
+                # Borders are keyed west-to-east, then south-to-north
+                if dx > 0 or (dx == 0 and dy > 0):
+                    borders.append((cluster, other))
+                else:
+                    borders.append((other, cluster))
+        return borders
+
+    def find_entrances(self, a, b):
+        """Entrance pairs on the border from cluster `a` to its neighbor `b`"""
+        nav = self.navigator
+        passable = nav.passable
+        straight_cost = nav.costs[0]
+        diagonal_cost = nav.costs[4]
+        ax0, ay0, ax1, ay1 = self.bounds(a)
+
+        # Diagonal neighbors only touch at one corner
+        if b[0] != a[0] and b[1] != a[1]:
+            if b[1] > a[1]:
+                cell_a, cell_b = (ax1 - 1, ay1 - 1), (ax1, ay1)
+            else:
+                cell_a, cell_b = (ax1 - 1, ay0), (ax1, ay0 - 1)
+            if passable[cell_a] and passable[cell_b]:
+                return [(cell_a, cell_b, diagonal_cost)]
+            return []
+
+        if b[0] != a[0]:
+            def side_a(t): return (ax1 - 1, t)
+            def side_b(t): return (ax1, t)
+            lo, hi = ay0, ay1
+        else:
+            def side_a(t): return (t, ay1 - 1)
+            def side_b(t): return (t, ay1)
+            lo, hi = ax0, ax1
+
+        straight = [passable[side_a(t)] and passable[side_b(t)] for t in range(lo, hi)]
+        entrances = []
+
+        # One entrance per run of open border, two for wide runs
+        t = lo
+        while t < hi:
+            if not straight[t - lo]:
+                t += 1
+                continue
+            run_start = t
+            while t < hi and straight[t - lo]:
+                t += 1
+            if t - run_start > self.max_entrance_width:
+                picks = [run_start, t - 1]
+            else:
+                picks = [(run_start + t - 1) // 2]
+            for p in picks:
+                entrances.append((side_a(p), side_b(p), straight_cost))
+
+        # Crossings that are only possible diagonally
+        for t in range(lo, hi - 1):
+            if straight[t - lo] or straight[t + 1 - lo]:
+                continue
+            if passable[side_a(t)] and passable[side_b(t + 1)]:
+                entrances.append((side_a(t), side_b(t + 1), diagonal_cost))
+            elif passable[side_a(t + 1)] and passable[side_b(t)]:
+                entrances.append((side_a(t + 1), side_b(t), diagonal_cost))
+        return entrances
+
+    def set_border(self, border, entrances):
+        """Replace a border's entrance pairs and their transition edges"""
+        for cell_a, cell_b, _ in self.borders.get(border, []):
+            self.transitions.get(cell_a, {}).pop(cell_b, None)
+            self.transitions.get(cell_b, {}).pop(cell_a, None)
+        self.borders[border] = entrances
+        for cell_a, cell_b, cost in entrances:
+            self.transitions.setdefault(cell_a, {})[cell_b] = cost
+            self.transitions.setdefault(cell_b, {})[cell_a] = cost
+
+    def entrances(self, cluster):
+        cells = set()
+        for border in self.cluster_borders(cluster):
+            for cell_a, cell_b, _ in self.borders.get(border, []):
+                cells.add(cell_a if border[0] == cluster else cell_b)
+        return cells
+
+    def build_cluster(self, cluster):
+        """Precompute entrance-to-entrance costs inside one cluster"""
+        entrances = self.entrances(cluster)
+        edges = {}
+        for entrance in entrances:
+            dist, _ = self.cluster_search(entrance, cluster)
+            edges[entrance] = {other: dist[other] for other in entrances
+                               if other != entrance and other in dist}
+        self.intra_edges[cluster] = edges
+
+    def cluster_search(self, start, cluster, goal=None):
+        """Dijkstra (A* when `goal` is given) restricted to one cluster"""
+        nav = self.navigator
+        x0, y0, x1, y1 = self.bounds(cluster)
+        start_node = nav.node(start)
+        goal_node = nav.node(goal) if goal is not None else None
+
+        dist = {start_node: 0}
+        came_from = {}
+        open_set = [(0, 0, start_node)]
+        while open_set:
+            _, g, current = heapq.heappop(open_set)
+            if current == goal_node:
+                break
+            if g > dist[current]:
+                continue
+            for neighbor, cost in nav.neighbors(current):
+                cell = nav.cell(neighbor)
+                if not (x0 <= cell[0] < x1 and y0 <= cell[1] < y1):
+                    continue
+                tentative_g = g + cost
+                if tentative_g < dist.get(neighbor, float('inf')):
+                    dist[neighbor] = tentative_g
+                    came_from[neighbor] = current
+                    f = tentative_g
+                    if goal is not None:
+                        f += octile(cell, goal)
+                    heapq.heappush(open_set, (f, tentative_g, neighbor))
+
+        return {nav.cell(node): d for node, d in dist.items()}, came_from
+
+    def refine(self, start, goal, cluster):
+        """Cell path between two cells of the same cluster"""
+        key = (start, goal)
+        path = self.segment_cache.get(key)
+        if path is not None:
+            self.segment_cache.move_to_end(key)
+            return list(path)
+
+        nav = self.navigator
+        dist, came_from = self.cluster_search(start, cluster, goal)
+        if goal not in dist:
+            return None
+        path = []
+        current = nav.node(goal)
+        while current in came_from:
+            path.append(nav.cell(current))
+            current = came_from[current]
+        path.reverse()
+
+        self.segment_cache[key] = tuple(path)
+        if len(self.segment_cache) > self.cache_size:
+            self.segment_cache.popitem(last=False)
+        return path
+
+    def connect(self, cell, cluster):
+        """Costs from `cell` to the reachable entrances of its cluster"""
+        entrances = self.entrances(cluster)
+        dist, _ = self.cluster_search(cell, cluster)
+        return {entrance: dist[entrance] for entrance in entrances if entrance in dist}
+
+    def find_path(self, start, goal):
+        """Refined cell path from `start` to `goal` (start excluded), or None"""
+        nav = self.navigator
+        start = nav.clamp(start)
+        goal = (int(round(goal[0])), int(round(goal[1])))
+        if not nav.in_bounds(goal) or not nav.passable[goal]:
+            return None
+        if start == goal:
+            return []
+
+        start_cluster = self.cluster_of(start)
+        goal_cluster = self.cluster_of(goal)
+        if start_cluster == goal_cluster:
+            path = self.refine(start, goal, start_cluster)
+            if path is not None:
+                return path
+
+        # Temporarily attach start and goal to the abstract graph
+        start_edges = self.connect(start, start_cluster)
+        goal_edges = self.connect(goal, goal_cluster)
+
+        open_set = [(octile(start, goal), 0, start)]
+        g_score = {start: 0}
+        came_from = {}
+        closed_set = set()
+        while open_set:
+            _, g, current = heapq.heappop(open_set)
+            if current == goal:
+                break
+            if current in closed_set:
+                continue
+            closed_set.add(current)
+
+            edges = []
+            if current == start:
+                edges.extend(start_edges.items())
+            edges.extend(self.intra_edges[self.cluster_of(current)].get(current, {}).items())
+            edges.extend(self.transitions.get(current, {}).items())
+            if current in goal_edges:
+                edges.append((goal, goal_edges[current]))
+
+            for neighbor, cost in edges:
+                tentative_g = g + cost
+                if tentative_g < g_score.get(neighbor, float('inf')):
+                    came_from[neighbor] = current
+                    g_score[neighbor] = tentative_g
+                    f = tentative_g + octile(neighbor, goal)
+                    heapq.heappush(open_set, (f, tentative_g, neighbor))
+        else:
+            return None
+
+        abstract_path = [goal]
+        while abstract_path[-1] in came_from:
+            abstract_path.append(came_from[abstract_path[-1]])
+        abstract_path.reverse()
+
+        # Refine each abstract edge into cells
+        path = []
+        for u, v in zip(abstract_path, abstract_path[1:]):
+            if v in self.transitions.get(u, {}):
+                path.append(v)
+                continue
+            cluster = self.cluster_of(v if u == start else u)
+            segment = self.refine(u, v, cluster)
+            if segment is None:
+                return None
+            path.extend(segment)
+        return path
+
+    def update_cells(self, cells):
+        """Rebuild only the clusters touched by changed cells (None rebuilds all)"""
+        if cells is None:
+            self.build()
+            return
+
+        changed = {self.cluster_of(cell) for cell in cells}
+        touched = set(changed)
+        refreshed = set()
+        for cluster in changed:
+            for border in self.cluster_borders(cluster):
+                if border not in refreshed:
+                    refreshed.add(border)
+                    self.set_border(border, self.find_entrances(*border))
+                    touched.update(border)
+
+        for cluster in touched:
+            self.build_cluster(cluster)
+        self.segment_cache.clear()
@@ -1,5 +1,6 @@
 import pygame
 from .utils import *
+from .text_cache import render_text
 
 class SmartLocker:
     def __init__(self, x, y, id):
@@ -10,17 +11,29 @@ class SmartLocker:
         self.packages = []
         self.color = (180, 100, 220)
     
+    def has_space(self):
+        return len(self.packages) < self.capacity
+    
     def add_package(self, package):
-        if len(self.packages) < self.capacity:
+        if self.has_space():
             self.packages.append(package)
             return True
         return False
     
-    def draw(self, surface, cell_size, font_small):
+    def collect(self):
+        """Customers pick up everything waiting; returns how many packages left"""
+        collected = len(self.packages)
+        self.packages = []
+        return collected
+    
+    def draw(self, surface, camera, font_small, labels=True):
+        sx, sy = camera.to_screen(self.x, self.y)
+        
         # Draw locker
-        pygame.draw.rect(surface, self.color, 
-                        (self.x * cell_size - 8, self.y * cell_size - 8, 16, 16))
+        rect = pygame.draw.rect(surface, self.color, (sx - 8, sy - 8, 16, 16))
         
         # Draw package count
-        text = font_small.render(f"L{self.id}: {len(self.packages)}", True, TEXT_COLOR)
-        surface.blit(text, (self.x * cell_size - 15, self.y * cell_size - 20))
\ No newline at end of file
+        if labels:
+            text = render_text(font_small, f"L{self.id}: {len(self.packages)}", TEXT_COLOR)
+            rect.union_ip(surface.blit(text, (sx - 15, sy - 20)))
+        return rect
\ No newline at end of file
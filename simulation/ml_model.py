@@ -6,10 +6,15 @@ import joblib
 import os
 from .rl_agent import RLAgent
 from .demand_predictor import DemandPredictor
+from .forecast import DemandForecaster
+from .anomaly import fleet_features
+from .telemetry import read_table
+from .utils import distance
 
 class MLModel:
     def __init__(self, grid_size=(30, 20)):
         self.demand_predictor = DemandPredictor()
+        self.forecaster = DemandForecaster(self.demand_predictor)
         self.rl_agent = RLAgent(grid_size)
         self.battery_model = None
         self.anomaly_detector = None
@@ -39,12 +44,15 @@ class MLModel:
         return 0.0
     
     def get_optimized_route(self, start, end, battery, city):
-        """Get RL-optimized route"""
+        """Get RL-optimized route; None without a trained Q-table"""
+        # An untrained agent only random-walks, so don't spend its 1000 steps
+        if not self.rl_agent.trained:
+            return None
         return self.rl_agent.get_path(start, end, battery, city)
     
     def train_battery_model(self, data_file):
         """Train battery prediction model"""
-        df = pd.read_csv(data_file)
+        df = read_table(data_file)
         X = df[['distance', 'payload', 'wind_speed', 'weather_impact']]
         y = df['battery_used']
         
@@ -69,7 +77,7 @@ class MLModel:
     
     def train_anomaly_detector(self, data_file):
         """Train anomaly detection model"""
-        df = pd.read_csv(data_file)
+        df = read_table(data_file)
         features = df[['speed', 'battery_drain', 'payload', 'distance']]
         
         # Train model
@@ -80,28 +88,45 @@ class MLModel:
         joblib.dump(self.anomaly_detector, "models/anomaly_detector.pkl")
         return self.anomaly_detector
     
+    def anomaly_features(self, drones):
+        """Drone ids and an (n, 4) matrix of speed, battery drain, payload and distance to destination"""
+        if hasattr(drones, "status_counts"):
+            # Fleet store: read the columns directly
+            return np.array([drone.id for drone in drones.drones]), fleet_features(drones)
+        
+        # Drones without a destination are not on a trip
+        ids = np.array([drone.id for drone in drones])
+        features = np.array([[
+            drone.speed,
+            drone.battery_decrease_rate,
+            drone.payload,
+            distance((drone.x, drone.y), drone.destination) if drone.destination else 0.0
+        ] for drone in drones], dtype=np.float64).reshape(-1, 4)
+        return ids, features
+    
+    def predict_anomalies(self, features):
+        """Boolean anomaly flag per row, in one detector call"""
+        if not self.anomaly_detector or len(features) == 0:
+            return np.zeros(len(features), dtype=bool)
+        names = getattr(self.anomaly_detector, "feature_names_in_", None)
+        if names is not None:
+            features = pd.DataFrame(features, columns=names)
+        return self.anomaly_detector.predict(features) == -1
+    
     def detect_anomalies(self, drones):
-        """Detect anomalous drones using ML model"""
+        """Detect anomalous drones using ML model, scoring every drone in one call"""
         if not self.anomaly_detector:
             return []
-            
-        anomalies = []
-        for drone in drones:
-            # Create feature vector
-            features = np.array([[
-                drone.speed,
-                drone.battery_decrease_rate,
-                drone.payload,
-                distance((drone.x, drone.y), (drone.destination[0], drone.destination[1]))
-            ]])
-            
-            # Predict anomaly
-            prediction = self.anomaly_detector.predict(features)
-            if prediction[0] == -1:  # Anomaly detected
-                anomalies.append(f"Drone {drone.id} - Anomalous behavior detected")
-                
-        return anomalies
+        
+        ids, features = self.anomaly_features(drones)
+        return [f"Drone {drone_id} - Anomalous behavior detected"
+                for drone_id in ids[self.predict_anomalies(features)]]
     
     def predict_demand(self, historical_data, current_weather):
         """Predict package demand"""
-        return self.demand_predictor.predict_demand(historical_data, current_weather)
\ No newline at end of file
+        return self.demand_predictor.predict_demand(historical_data, current_weather)
+    
+    def forecast_demand(self, warehouses, horizon=1):
+        """Batched demand forecast for several warehouses"""
+        interval = warehouses[0].demand_interval if warehouses else 3600
+        return self.forecaster.predict([w.historical_data for w in warehouses], horizon, interval)
\ No newline at end of file
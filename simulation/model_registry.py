@@ -0,0 +1,56 @@
+import threading
+from .ml_model import MLModel
+
+DEFAULT_GRID_SIZE = (30, 20)
+
+class ModelRegistry:
+    """Process-wide, lazily loaded MLModels, one per city grid size"""
+
+    def __init__(self, factory=MLModel):
+        self.factory = factory
+        self.models = {}        # grid size -> model
+        self.ref_counts = {}    # grid size -> holders
+        self._lock = threading.Lock()
+
+    def acquire(self, grid_size=DEFAULT_GRID_SIZE):
+        """Return the shared model for a grid size, loading it on first use"""
+        grid_size = tuple(grid_size)
+        with self._lock:
+            model = self.models.get(grid_size)
+            if model is None:
+                model = self.factory(grid_size)
+                model.load_models()
+                self.models[grid_size] = model
+            self.ref_counts[grid_size] = self.ref_counts.get(grid_size, 0) + 1
+            return model
+
+    def release(self, grid_size=DEFAULT_GRID_SIZE):
+        """Drop one reference; a model is freed when nobody holds it"""
+        grid_size = tuple(grid_size)
+        with self._lock:
+            count = self.ref_counts.get(grid_size, 0) - 1
+            if count > 0:
+                self.ref_counts[grid_size] = count
+                return
+            self.ref_counts.pop(grid_size, None)
+            self.models.pop(grid_size, None)
+
+    def reload(self):
+        """Reload every held model in place so all holders see new weights"""
+        with self._lock:
+            if not self.models:
+                return False
+            for model in self.models.values():
+                model.load_models()
+            return True
+
+registry = ModelRegistry()
+
+def acquire_model(grid_size=DEFAULT_GRID_SIZE):
+    return registry.acquire(grid_size)
+
+def release_model(grid_size=DEFAULT_GRID_SIZE):
+    registry.release(grid_size)
+
+def reload_models():
+    return registry.reload()
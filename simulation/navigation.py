@@ -0,0 +1,393 @@
+import heapq
+from collections import OrderedDict
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from .utils import octile, SQRT2
+from .hpa import HierarchicalPathfinder
+
+# Neighbor directions, in the same order as RLAgent.actions
+DIRECTIONS = [
+    (0, 1), (1, 0), (0, -1), (-1, 0),
+    (1, 1), (1, -1), (-1, 1), (-1, -1)
+]
+
+# Direction indices encoded by each 8-bit neighbor mask
+MASK_DIRECTIONS = [
+    tuple(k for k in range(len(DIRECTIONS)) if mask >> k & 1)
+    for mask in range(256)
+]
+
+class Navigator:
+    """Navigation graph built once per CityGrid with cached path queries"""
+
+    def __init__(self, city, method="jps", cache_size=4096, hierarchy_threshold=250000):
+        self.city = city
+        self.method = method
+        self.cache_size = cache_size
+        self.path_cache = OrderedDict()
+        self.distance_fields = {}
+        self.listeners = []
+        self.hierarchy = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.expansions = 0
+        self.rebuild()
+        city.add_listener(self.update_cells)
+
+        # Large grids route through the HPA* abstraction
+        if city.width * city.height >= hierarchy_threshold:
+            self.use_hierarchy()
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def use_hierarchy(self, cluster_size=16):
+        """Route non-cached queries through a hierarchical abstraction"""
+        if self.hierarchy is not None:
+            self.listeners.remove(self.hierarchy.update_cells)
+        self.hierarchy = HierarchicalPathfinder(self, cluster_size)
+        return self.hierarchy
+
+    def rebuild(self):
+        """Recompute passability and neighbor lists from the city grid"""
+        width, height = self.city.width, self.city.height
+        self.width, self.height = width, height
+        self.passable = self.city.grid != 2
+
+        # Cells are addressed as flat integers in a grid padded by one
+        # impassable cell, so neighbors are plain offsets with no bounds checks
+        padded = np.zeros((width + 2, height + 2), dtype=bool)
+        padded[1:-1, 1:-1] = self.passable
+        self.stride = height + 2
+        self.offsets = [dx * self.stride + dy for dx, dy in DIRECTIONS]
+        self.costs = [1 if dx == 0 or dy == 0 else SQRT2 for dx, dy in DIRECTIONS]
+        self.open_cells = bytearray(padded.ravel().tobytes())
+
+        # Bit k of a cell's mask is set when DIRECTIONS[k] leads to a passable cell
+        mask = np.zeros((width + 2, height + 2), dtype=np.uint8)
+        for k, (dx, dy) in enumerate(DIRECTIONS):
+            mask[1:-1, 1:-1] |= (padded[1 + dx:width + 1 + dx,
+                                        1 + dy:height + 1 + dy].astype(np.uint8) << k)
+        self.neighbor_mask = mask[1:-1, 1:-1]
+        self.node_mask = bytearray(mask.ravel().tobytes())
+        self.reset_routes()
+
+    def reset_routes(self):
+        """Drop cached paths and recompute the registered distance fields"""
+        self.graph = None
+        self.path_cache.clear()
+        goals = list(self.distance_fields)
+        self.distance_fields = {}
+        for goal in goals:
+            self.precompute(goal)
+
+    def update_cells(self, cells=None):
+        """Refresh passability around changed cells (None rebuilds everything)"""
+        if cells is None:
+            self.rebuild()
+        else:
+            for cell in cells:
+                self.passable[cell] = self.city.grid[cell] != 2
+                self.open_cells[self.node(cell)] = bool(self.passable[cell])
+
+            # Neighbor bits change in the 3x3 block around each changed cell
+            touched = {(x + dx, y + dy) for x, y in cells
+                       for dx in (-1, 0, 1) for dy in (-1, 0, 1)}
+            for cell in touched:
+                if not self.in_bounds(cell):
+                    continue
+                bits = 0
+                for k, (dx, dy) in enumerate(DIRECTIONS):
+                    neighbor = (cell[0] + dx, cell[1] + dy)
+                    if self.in_bounds(neighbor) and self.passable[neighbor]:
+                        bits |= 1 << k
+                self.neighbor_mask[cell] = bits
+                self.node_mask[self.node(cell)] = bits
+            self.reset_routes()
+
+        for listener in self.listeners:
+            listener(cells)
+
+    def node(self, cell):
+        return (int(round(cell[0])) + 1) * self.stride + int(round(cell[1])) + 1
+
+    def cell(self, node):
+        x, y = divmod(node, self.stride)
+        return (x - 1, y - 1)
+
+    def clamp(self, cell):
+        """Nearest in-bounds cell to a (possibly fractional) position"""
+        return (min(max(int(round(cell[0])), 0), self.width - 1),
+                min(max(int(round(cell[1])), 0), self.height - 1))
+
+    def in_bounds(self, cell):
+        return 0 <= cell[0] < self.width and 0 <= cell[1] < self.height
+
+    def neighbors(self, node):
+        """Flat neighbor nodes and step costs of `node`"""
+        return [(node + self.offsets[k], self.costs[k])
+                for k in MASK_DIRECTIONS[self.node_mask[node]]]
+
+    def find_path(self, start, goal, method=None):
+        """Cell path from `start` to `goal` (start excluded), or None if unreachable
+
+        `method` forces a flat search backend ("astar" or "jps"); by default
+        large grids use the hierarchy and others use `self.method`.
+        """
+        start = self.clamp(start)
+        goal = (int(round(goal[0])), int(round(goal[1])))
+        if not self.in_bounds(goal) or not self.passable[goal]:
+            return None
+
+        key = (start, goal)
+        path = self.path_cache.get(key)
+        if path is not None:
+            self.path_cache.move_to_end(key)
+            self.cache_hits += 1
+            return list(path)
+        self.cache_misses += 1
+
+        if start == goal:
+            path = []
+        elif goal in self.distance_fields:
+            path = self.walk_distance_field(start, goal)
+        elif method is None and self.hierarchy is not None:
+            path = self.hierarchy.find_path(start, goal)
+        elif (method or self.method) == "jps":
+            path = self.jps(start, goal)
+        else:
+            path = self.astar(start, goal)
+        if path is None:
+            return None
+
+        self.path_cache[key] = tuple(path)
+        if len(self.path_cache) > self.cache_size:
+            self.path_cache.popitem(last=False)
+        return path
+
+    def astar(self, start, goal):
+        """A* over the flat graph"""
+        start_node = self.node(start)
+        goal_node = self.node(goal)
+        open_set = [(octile(start, goal), 0, start_node)]
+        g_score = {start_node: 0}
+        came_from = {}
+        closed_set = set()
+
+        while open_set:
+            _, g, current = heapq.heappop(open_set)
+            if current == goal_node:
+                path = []
+                while current in came_from:
+                    path.append(self.cell(current))
+                    current = came_from[current]
+                path.reverse()
+                return path
+
+            if current in closed_set:
+                continue
+            closed_set.add(current)
+            self.expansions += 1
+
+            for neighbor, cost in self.neighbors(current):
+                tentative_g = g + cost
+                if tentative_g < g_score.get(neighbor, float('inf')):
+                    came_from[neighbor] = current
+                    g_score[neighbor] = tentative_g
+                    f = tentative_g + octile(self.cell(neighbor), goal)
+                    heapq.heappush(open_set, (f, tentative_g, neighbor))
+        return None
+
+    def jump(self, node, dx, dy, goal_node):
+        """Follow direction (dx, dy) from `node` to the next jump point, or None"""
+        open_cells = self.open_cells
+        stride = self.stride
+        step = dx * stride + dy
+        while True:
+            node += step
+            if not open_cells[node]:
+                return None
+            if node == goal_node:
+                return node
+            if dx and dy:
+                # Forced neighbors behind a diagonal move
+                if ((open_cells[node - dx * stride + dy] and not open_cells[node - dx * stride]) or
+                        (open_cells[node + dx * stride - dy] and not open_cells[node - dy])):
+                    return node
+                # Straight moves branching off the diagonal
+                if (self.jump(node, dx, 0, goal_node) is not None or
+                        self.jump(node, 0, dy, goal_node) is not None):
+                    return node
+            elif dx:
+                if ((open_cells[node + dx * stride + 1] and not open_cells[node + 1]) or
+                        (open_cells[node + dx * stride - 1] and not open_cells[node - 1])):
+                    return node
+            else:
+                if ((open_cells[node + stride + dy] and not open_cells[node + stride]) or
+                        (open_cells[node - stride + dy] and not open_cells[node - stride])):
+                    return node
+
+    def pruned_directions(self, node, parent):
+        """Natural and forced successor directions for Jump Point Search"""
+        if parent is None:
+            return [DIRECTIONS[k] for k in MASK_DIRECTIONS[self.node_mask[node]]]
+
+        open_cells = self.open_cells
+        stride = self.stride
+        x, y = self.cell(node)
+        px, py = self.cell(parent)
+        dx = (x > px) - (x < px)
+        dy = (y > py) - (y < py)
+        directions = []
+        if dx and dy:
+            if open_cells[node + dy]:
+                directions.append((0, dy))
+            if open_cells[node + dx * stride]:
+                directions.append((dx, 0))
+            if open_cells[node + dx * stride + dy]:
+                directions.append((dx, dy))
+            if not open_cells[node - dx * stride]:
+                directions.append((-dx, dy))
+            if not open_cells[node - dy]:
+                directions.append((dx, -dy))
+        elif dx:
+            if open_cells[node + dx * stride]:
+                directions.append((dx, 0))
+            if not open_cells[node + 1]:
+                directions.append((dx, 1))
+            if not open_cells[node - 1]:
+                directions.append((dx, -1))
+        else:
+            if open_cells[node + dy]:
+                directions.append((0, dy))
+            if not open_cells[node + stride]:
+                directions.append((1, dy))
+            if not open_cells[node - stride]:
+                directions.append((-1, dy))
+        return directions
+
+    def jps(self, start, goal):
+        """Jump Point Search over the 8-connected uniform-cost grid"""
+        start_node = self.node(start)
+        goal_node = self.node(goal)
+
+        open_set = [(octile(start, goal), 0, start_node)]
+        g_score = {start_node: 0}
+        came_from = {}
+        closed_set = set()
+
+        while open_set:
+            _, g, current = heapq.heappop(open_set)
+            if current == goal_node:
+                jump_points = [self.cell(current)]
+                while current in came_from:
+                    current = came_from[current]
+                    jump_points.append(self.cell(current))
+                jump_points.reverse()
+
+                # Expand straight and diagonal runs between jump points
+                path = []
+                for (x0, y0), (x1, y1) in zip(jump_points, jump_points[1:]):
+                    dx = (x1 > x0) - (x1 < x0)
+                    dy = (y1 > y0) - (y1 < y0)
+                    while (x0, y0) != (x1, y1):
+                        x0 += dx
+                        y0 += dy
+                        path.append((x0, y0))
+                return path
+
+            if current in closed_set:
+                continue
+            closed_set.add(current)
+            self.expansions += 1
+
+            cell = self.cell(current)
+            for dx, dy in self.pruned_directions(current, came_from.get(current)):
+                jump_point = self.jump(current, dx, dy, goal_node)
+                if jump_point is None:
+                    continue
+                jump_cell = self.cell(jump_point)
+                tentative_g = g + octile(cell, jump_cell)
+                if tentative_g < g_score.get(jump_point, float('inf')):
+                    came_from[jump_point] = current
+                    g_score[jump_point] = tentative_g
+                    f = tentative_g + octile(jump_cell, goal)
+                    heapq.heappush(open_set, (f, tentative_g, jump_point))
+        return None
+
+    def build_graph(self):
+        """Reverse adjacency matrix: an edge v -> u for every move u -> v"""
+        width, height = self.width, self.height
+        cells = np.arange(width * height).reshape(width, height)
+        rows, cols, weights = [], [], []
+        for k, (dx, dy) in enumerate(DIRECTIONS):
+            has_move = (self.neighbor_mask >> k & 1).astype(bool)
+            src = cells[has_move]
+            xs, ys = np.nonzero(has_move)
+            dst = (xs + dx) * height + (ys + dy)
+            rows.append(dst)
+            cols.append(src)
+            weights.append(np.full(len(src), self.costs[k], dtype=np.float64))
+        self.graph = csr_matrix(
+            (np.concatenate(weights), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(width * height, width * height)
+        )
+
+    def precompute(self, goal):
+        """Single-source Dijkstra distance field towards a fixed goal cell"""
+        goal = (int(round(goal[0])), int(round(goal[1])))
+        if not self.in_bounds(goal):
+            return None
+        if self.graph is None:
+            self.build_graph()
+        field = dijkstra(self.graph, directed=True,
+                         indices=goal[0] * self.height + goal[1])
+        self.distance_fields[goal] = field.reshape(self.width, self.height)
+        return self.distance_fields[goal]
+
+    def has_distance_field(self, goal):
+        return (int(round(goal[0])), int(round(goal[1]))) in self.distance_fields
+
+    def distance_to(self, goal, cells):
+        """Path distances from each of `cells` to a precomputed goal"""
+        field = self.distance_fields[(int(round(goal[0])), int(round(goal[1])))]
+        cells = np.asarray(cells, dtype=np.float64).reshape(-1, 2)
+        xs = np.clip(np.rint(cells[:, 0]).astype(int), 0, self.width - 1)
+        ys = np.clip(np.rint(cells[:, 1]).astype(int), 0, self.height - 1)
+        return field[xs, ys]
+
+    def distance_matrix(self, cells):
+        """Pairwise path distances; entry [i, j] is the cost from cells[j] to cells[i]"""
+        if self.graph is None:
+            self.build_graph()
+        cells = [self.clamp(cell) for cell in cells]
+        nodes = [x * self.height + y for x, y in cells]
+        fields = dijkstra(self.graph, directed=True, indices=nodes)
+        return fields[:, nodes]
+
+    def walk_distance_field(self, start, goal):
+        """Descend a goal's distance field from `start`; O(path length)"""
+        field = self.distance_fields[goal]
+        if not np.isfinite(field[start]):
+            return None
+
+        path = []
+        current = start
+        while current != goal:
+            best = None
+            best_dist = float('inf')
+            for k in MASK_DIRECTIONS[self.neighbor_mask[current]]:
+                dx, dy = DIRECTIONS[k]
+                neighbor = (current[0] + dx, current[1] + dy)
+                dist = field[neighbor] + self.costs[k]
+                if dist < best_dist:
+                    best = neighbor
+                    best_dist = dist
+            if best is None or best_dist > field[current] + 1e-9:
+                return None
+            path.append(best)
+            current = best
+        return path
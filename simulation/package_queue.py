@@ -0,0 +1,99 @@
+import heapq
+import itertools
+
+PRIORITY_RANK = {'Urgent': 0, 'Express': 1, 'Normal': 2}
+
+class PackageQueue:
+    """Dispatch queue ordered by priority, then age, with O(log n) pop"""
+
+    def __init__(self):
+        self.heap = []          # (priority rank, sequence, package id)
+        self.entries = {}       # package id -> package, for every queued package
+        self.live = {}          # package id -> sequence of its current heap entry
+        self.sequence = itertools.count()
+        self.version = 0        # bumped on every change, for incremental consumers
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __bool__(self):
+        return bool(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries.values())
+
+    def __contains__(self, package_id):
+        return package_id in self.entries
+
+    def entry(self, package):
+        sequence = next(self.sequence)
+        self.live[package['id']] = sequence
+        return (PRIORITY_RANK.get(package['priority'], len(PRIORITY_RANK)),
+                sequence, package['id'])
+
+    def is_live(self, item):
+        """False for entries of removed packages and superseded entries of re-queued ones"""
+        return self.live.get(item[2]) == item[1]
+
+    def push(self, package):
+        self.version += 1
+        self.entries[package['id']] = package
+        heapq.heappush(self.heap, self.entry(package))
+
+    def extend(self, packages):
+        """Bulk enqueue; re-heapifies once when the batch is large"""
+        packages = list(packages)
+        self.version += 1
+        if len(packages) > len(self.heap) // 4:
+            for package in packages:
+                self.entries[package['id']] = package
+                self.heap.append(self.entry(package))
+            heapq.heapify(self.heap)
+        else:
+            for package in packages:
+                self.push(package)
+
+    def discard_stale(self):
+        """Drop heap entries that are no longer live"""
+        heap = self.heap
+        while heap and not self.is_live(heap[0]):
+            heapq.heappop(heap)
+
+    def peek(self):
+        self.discard_stale()
+        if not self.heap:
+            return None
+        return self.entries[self.heap[0][2]]
+
+    def pop(self):
+        """Highest-priority, oldest package, or None"""
+        self.discard_stale()
+        if not self.heap:
+            return None
+        _, _, package_id = heapq.heappop(self.heap)
+        self.version += 1
+        del self.live[package_id]
+        return self.entries.pop(package_id)
+
+    def candidates(self, k):
+        """Up to `k` packages in dispatch order, without removing them"""
+        taken = []
+        while self.heap and len(taken) < k:
+            item = heapq.heappop(self.heap)
+            if self.is_live(item):
+                taken.append(item)
+        for item in taken:
+            heapq.heappush(self.heap, item)
+        return [self.entries[item[2]] for item in taken]
+
+    def remove(self, package_id):
+        """Remove a package by id; its heap entry is skipped lazily"""
+        package = self.entries.pop(package_id, None)
+        if package is not None:
+            self.live.pop(package_id, None)
+            self.version += 1
+        # Compact once stale entries dominate the heap
+        if len(self.heap) > 2 * len(self.entries) + 64:
+            self.heap = [item for item in self.heap if self.is_live(item)]
+            heapq.heapify(self.heap)
+        return package
@@ -0,0 +1,124 @@
+import os
+import numpy as np
+
+def save_array(path, array):
+    """Write atomically, since the current table may be memory-mapped from `path`"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+class DenseQTable:
+    """Contiguous float32 Q-table with one row per integer-encoded state"""
+
+    def __init__(self, n_states, n_actions=8, values=None):
+        if values is None:
+            values = np.zeros((n_states, n_actions), dtype=np.float32)
+        self.values = values
+        self.n_actions = values.shape[1]
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+    def __setitem__(self, key, row):
+        self.values[key] = row
+
+    def __contains__(self, key):
+        return 0 <= key < len(self.values)
+
+    def get(self, key):
+        """Q-values of `key` without allocating anything"""
+        return self.values[key]
+
+    def rows(self, keys):
+        return self.values[keys]
+
+    def save(self, path):
+        save_array(path, self.values)
+
+    @classmethod
+    def from_array(cls, values):
+        return cls(len(values), values.shape[1], values)
+
+class HashedQTable:
+    """Sparse Q-table: a dict from state key to a row of one growable float32 array"""
+
+    def __init__(self, n_actions=8, capacity=1024):
+        self.n_actions = n_actions
+        self.index = {}
+        self.keys = np.empty(capacity, dtype=np.int64)
+        self.values = np.zeros((capacity, n_actions), dtype=np.float32)
+        self.size = 0
+        self.empty_row = np.zeros(n_actions, dtype=np.float32)
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def slot(self, key):
+        """Row index of `key`, allocating a zeroed row for new states"""
+        slot = self.index.get(key)
+        if slot is None:
+            if self.size == len(self.values):
+                self.grow(2 * len(self.values))
+            slot = self.size
+            self.size += 1
+            self.index[key] = slot
+            self.keys[slot] = key
+        return slot
+
+    def grow(self, capacity):
+        keys = np.empty(capacity, dtype=np.int64)
+        keys[:self.size] = self.keys[:self.size]
+        values = np.zeros((capacity, self.n_actions), dtype=np.float32)
+        values[:self.size] = self.values[:self.size]
+        self.keys, self.values = keys, values
+
+    def __getitem__(self, key):
+        # Take the slot first: allocating it may grow, and so replace, self.values
+        slot = self.slot(key)
+        return self.values[slot]
+
+    def __setitem__(self, key, row):
+        slot = self.slot(key)
+        self.values[slot] = row
+
+    def get(self, key):
+        """Q-values of `key` (zeros for unseen states) without allocating"""
+        slot = self.index.get(key)
+        if slot is None:
+            return self.empty_row
+        return self.values[slot]
+
+    def rows(self, keys):
+        slots = [self.slot(key) for key in keys]
+        return self.values[slots]
+
+    def save(self, path):
+        records = np.empty(self.size, dtype=[('key', np.int64),
+                                             ('q', np.float32, (self.n_actions,))])
+        records['key'] = self.keys[:self.size]
+        records['q'] = self.values[:self.size]
+        save_array(path, records)
+
+    @classmethod
+    def from_records(cls, records):
+        n_actions = records.dtype['q'].shape[0]
+        table = cls(n_actions, capacity=max(1024, len(records)))
+        table.size = len(records)
+        table.keys[:table.size] = records['key']
+        table.values[:table.size] = records['q']
+        table.index = dict(zip(table.keys[:table.size].tolist(), range(table.size)))
+        return table
+
+def load_q_table(path):
+    """Load a Q-table saved by either table type; dense tables are memory-mapped"""
+    array = np.load(path, mmap_mode='c')
+    if array.dtype.names:
+        return HashedQTable.from_records(array)
+    return DenseQTable.from_array(array)
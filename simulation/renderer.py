@@ -0,0 +1,64 @@
+import pygame
+
+from .utils import *
+
+class Renderer:
+    """Cached static city layer with dynamic sprites redrawn through dirty rectangles"""
+
+    def __init__(self, city, camera=None, size=(WIDTH, HEIGHT), max_rects=200):
+        self.city = city
+        self.camera = camera
+        self.size = size
+        self.max_rects = max_rects
+        self.static_layer = None
+        self.static_key = None
+        self.previous = []      # regions drawn last frame, erased at the start of this one
+        self.dirty = []
+        self.full_update = True
+        city.add_listener(self.invalidate)
+
+    def invalidate(self, cells=None):
+        """Layout changed: rebuild the static layer and refresh the whole screen"""
+        self.static_layer = None
+        self.full_update = True
+
+    def build_static_layer(self):
+        """Background, grid, roads and buildings rendered once per layout and view"""
+        layer = pygame.Surface(self.size)
+        if pygame.display.get_surface() is not None:
+            layer = layer.convert()
+        layer.fill(BACKGROUND)
+        self.city.draw(layer, self.camera)
+        return layer
+
+    def begin_frame(self, screen):
+        """Restore the static layer under last frame's sprites"""
+        key = self.camera.key() if self.camera else None
+        if self.static_layer is None or key != self.static_key:
+            self.static_layer = self.build_static_layer()
+            self.static_key = key
+            self.full_update = True
+        if self.full_update:
+            screen.blit(self.static_layer, (0, 0))
+        else:
+            for rect in self.previous:
+                screen.blit(self.static_layer, rect, rect)
+        self.dirty = []
+
+    def add(self, rect):
+        """Record a region drawn this frame"""
+        if rect:
+            self.dirty.append(rect)
+
+    def end_frame(self):
+        """Regions to pass to pygame.display.update: erased plus newly drawn"""
+        if self.full_update:
+            rects = [pygame.Rect((0, 0), self.size)]
+            self.full_update = False
+        else:
+            rects = self.previous + self.dirty
+            # Many small updates cost more than one bounding update
+            if len(rects) > self.max_rects:
+                rects = [rects[0].unionall(rects[1:])]
+        self.previous = self.dirty
+        return rects
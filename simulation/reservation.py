@@ -0,0 +1,177 @@
+import heapq
+from collections import defaultdict
+
+from .utils import octile
+
+class ReservationTable:
+    """(cell, time slot) occupancy shared by every drone, with expiry of past slots"""
+
+    def __init__(self, n_cells):
+        self.n_cells = n_cells
+        self.owners = {}                    # slot * n_cells + cell -> agent
+        self.by_slot = defaultdict(list)    # slot -> keys, for expiry
+        self.by_agent = defaultdict(list)   # agent -> keys, for release
+        self.oldest_slot = 0
+
+    def __len__(self):
+        return len(self.owners)
+
+    def key(self, cell, slot):
+        return slot * self.n_cells + cell
+
+    def owner(self, cell, slot):
+        return self.owners.get(slot * self.n_cells + cell)
+
+    def is_free(self, cell, slot, agent=None):
+        owner = self.owners.get(slot * self.n_cells + cell)
+        return owner is None or owner == agent
+
+    def reserve(self, agent, cells, start_slot):
+        """Reserve consecutive slots for a trajectory (None skips a slot), keeping others' slots"""
+        for offset, cell in enumerate(cells):
+            slot = start_slot + offset
+            if cell is None or slot < self.oldest_slot:
+                continue
+            key = slot * self.n_cells + cell
+            if key in self.owners:
+                continue
+            self.owners[key] = agent
+            self.by_slot[slot].append(key)
+            self.by_agent[agent].append(key)
+
+    def release(self, agent):
+        """Drop every reservation held by `agent`"""
+        for key in self.by_agent.pop(agent, ()):
+            if self.owners.get(key) == agent:
+                del self.owners[key]
+
+    def expire(self, current_slot):
+        """Forget slots that are already in the past"""
+        for slot in range(self.oldest_slot, current_slot):
+            for key in self.by_slot.pop(slot, ()):
+                self.owners.pop(key, None)
+        self.oldest_slot = max(self.oldest_slot, current_slot)
+
+class CooperativePlanner:
+    """Windowed hierarchical cooperative A* (WHCA*) over a Navigator and a ReservationTable"""
+
+    def __init__(self, navigator, window=16, max_expansions=20000, shared_cells=()):
+        self.navigator = navigator
+        self.window = window
+        self.max_expansions = max_expansions
+        nav = navigator
+        self.table = ReservationTable((nav.width + 2) * nav.stride)
+        # Depots (warehouse, stations) hold any number of drones and are never reserved
+        self.shared = {nav.node(cell) for cell in shared_cells}
+        # Time is counted in slots of one straight cell at the current cruise speed;
+        # a diagonal step takes sqrt(2) slots, a planned wait one slot
+        self.clock = 0.0
+        self.current_slot = 0
+        self.slot_duration = None
+        self.plans = 0
+        self.fallbacks = 0
+        self.waits = 0
+
+    def advance(self, delta_time, speed):
+        """Move the planner clock by the cells flown at `speed` and expire past slots"""
+        self.slot_duration = 1 / max(speed * 60, 1e-9)
+        self.clock += delta_time / self.slot_duration
+        self.current_slot = int(self.clock)
+        self.table.expire(self.current_slot)
+
+    def space_time_search(self, agent, start, goal):
+        """A* over (cell, slot) with waits, honoring reservations inside the window
+
+        Step costs are travel times in slots, so the time at a state is the
+        planner's offset into the current slot plus its path cost.
+        """
+        nav = self.navigator
+        table = self.table
+        start_node, goal_node = nav.node(start), nav.node(goal)
+        t0 = self.current_slot
+        offset = self.clock - t0
+        horizon = self.window
+
+        open_set = [(octile(start, goal), 0.0, 0, start_node)]
+        came_from = {}
+        g_score = {(start_node, 0): 0.0}
+        expansions = 0
+        while open_set:
+            _, g, t, node = heapq.heappop(open_set)
+            if node == goal_node:
+                path = [node]
+                state = (node, t)
+                while state in came_from:
+                    state = came_from[state]
+                    path.append(state[0])
+                path.reverse()
+                return [nav.cell(n) for n in path[1:]]
+            if g > g_score.get((node, t), float('inf')):
+                continue
+            expansions += 1
+            if expansions > self.max_expansions:
+                return None
+
+            # Beyond the window the search ignores other drones and time collapses
+            in_window = t < horizon
+            moves = nav.neighbors(node)
+            if in_window:
+                moves = moves + [(node, 1.0)]    # wait in place
+            for neighbor, cost in moves:
+                # The drone holds `neighbor` from the slot after it leaves until it arrives
+                arrival = int(offset + g + cost)
+                next_t = min(arrival, horizon)
+                if in_window and neighbor not in self.shared:
+                    slot = t0 + t + 1
+                    if not all(table.is_free(neighbor, s, agent)
+                               for s in range(slot, t0 + next_t + 1)):
+                        continue
+                    # No swapping cells with a drone coming the other way
+                    other = table.owner(node, slot)
+                    if other is not None and other != agent and table.owner(neighbor, slot - 1) == other:
+                        continue
+                state = (neighbor, next_t)
+                tentative_g = g + cost
+                if tentative_g < g_score.get(state, float('inf')):
+                    g_score[state] = tentative_g
+                    came_from[state] = (node, t)
+                    f = tentative_g + octile(nav.cell(neighbor), goal)
+                    heapq.heappush(open_set, (f, tentative_g, next_t, neighbor))
+        return None
+
+    def plan(self, agent, start, goal):
+        """Cooperative path (start excluded; repeated cells are waits), reserving its window"""
+        nav = self.navigator
+        start = nav.clamp(start)
+        goal = (int(round(goal[0])), int(round(goal[1])))
+        self.table.release(agent)
+        if not nav.in_bounds(goal) or not nav.passable[goal]:
+            return None
+
+        self.plans += 1
+        path = self.space_time_search(agent, start, goal)
+        if path is None:
+            # Crowded or unreachable within budget: plan alone
+            self.fallbacks += 1
+            path = nav.find_path(start, goal)
+            if path is None:
+                return None
+
+        cells = [start] + path
+        self.waits += sum(1 for a, b in zip(cells, cells[1:]) if a == b)
+        nodes = [nav.node(cell) for cell in self.occupancy(cells)]
+        self.table.reserve(agent, [node if node not in self.shared else None for node in nodes],
+                           self.current_slot)
+        return path
+
+    def occupancy(self, cells):
+        """Cell held in each slot of the window, from the travel times along `cells`"""
+        time = self.clock - self.current_slot
+        slots = [cells[0]]
+        for a, b in zip(cells, cells[1:]):
+            time += 1.0 if a == b else octile(a, b)
+            last = min(int(time), self.window)
+            slots.extend([b] * (last + 1 - len(slots)))
+            if len(slots) > self.window:
+                break
+        return slots
@@ -1,47 +1,77 @@
 import numpy as np
 import random
-from collections import defaultdict
 import joblib
 import os
+from .q_table import DenseQTable, HashedQTable, load_q_table
 
 class RLAgent:
     def __init__(self, grid_size, learning_rate=0.1, discount_factor=0.95, 
-                 exploration_rate=1.0, exploration_decay=0.995, min_exploration=0.01):
+                 exploration_rate=1.0, exploration_decay=0.995, min_exploration=0.01,
+                 battery_bucket=25, max_dense_bytes=256 * 1024 * 1024):
         self.grid_size = grid_size
         self.learning_rate = learning_rate
         self.discount_factor = discount_factor
         self.exploration_rate = exploration_rate
         self.exploration_decay = exploration_decay
         self.min_exploration = min_exploration
-        self.q_table = defaultdict(lambda: np.zeros(8))  # 8 possible actions
         self.actions = [
             (0, 1), (1, 0), (0, -1), (-1, 0),  # Up, Right, Down, Left
             (1, 1), (1, -1), (-1, 1), (-1, -1)  # Diagonals
         ]
-        self.model_path = "models/routing_model.pkl"
+        
+        # States are (cell, target cell, battery bucket) packed into one integer
+        self.battery_bucket = battery_bucket
+        self.n_buckets = 100 // battery_bucket + 1
+        self.n_cells = grid_size[0] * grid_size[1]
+        self.n_states = self.n_cells * self.n_cells * self.n_buckets
+        self.max_dense_bytes = max_dense_bytes
+        self.q_table = self.create_q_table()
+        self.trained = False        # True once a saved table is loaded
+        self.model_path = "models/routing_model.npy"
+        self.legacy_model_path = "models/routing_model.pkl"
+    
+    def create_q_table(self):
+        """Dense table when it fits in memory, hashed otherwise"""
+        if self.n_states * len(self.actions) * 4 <= self.max_dense_bytes:
+            return DenseQTable(self.n_states, len(self.actions))
+        return HashedQTable(len(self.actions))
+    
+    def cell_index(self, pos):
+        width, height = self.grid_size
+        x = min(max(int(round(pos[0])), 0), width - 1)
+        y = min(max(int(round(pos[1])), 0), height - 1)
+        return x * height + y
+    
+    def battery_index(self, battery):
+        return min(max(int(battery), 0), 100) // self.battery_bucket
         
     def state_to_key(self, state):
-        """Convert state to hashable key"""
+        """Encode state as an integer row index"""
         drone_pos, target_pos, battery = state
-        return (drone_pos[0], drone_pos[1], 
-                target_pos[0], target_pos[1], 
-                int(battery))
+        return ((self.cell_index(drone_pos) * self.n_cells + self.cell_index(target_pos))
+                * self.n_buckets + self.battery_index(battery))
     
     def choose_action(self, state, valid_moves):
-        """Choose action using epsilon-greedy strategy"""
+        """Choose action using epsilon-greedy strategy
+        
+        `valid_moves` is either a list of action indices or a boolean action mask.
+        """
         state_key = self.state_to_key(state)
         
+        if isinstance(valid_moves, np.ndarray) and valid_moves.dtype == bool:
+            if random.random() < self.exploration_rate:
+                return int(random.choice(np.flatnonzero(valid_moves)))
+            # Masked argmax over the Q-row
+            return int(np.where(valid_moves, self.q_table.get(state_key), -np.inf).argmax())
+        
         if random.random() < self.exploration_rate:
             # Exploration: choose random valid action
             return random.choice(valid_moves)
         else:
-            # Exploitation: choose best known action
-            q_values = self.q_table[state_key]
-            # Only consider valid moves
-            valid_q_values = [q_values[i] for i in valid_moves]
-            if valid_q_values:
-                best_index = np.argmax(valid_q_values)
-                return valid_moves[best_index]
+            # Exploitation: choose best known action among valid moves
+            q_values = self.q_table.get(state_key)
+            if valid_moves:
+                return valid_moves[int(np.argmax(q_values[valid_moves]))]
             return random.choice(valid_moves)  # Fallback
     
     def update_q_value(self, state, action, reward, next_state, next_valid_moves):
@@ -49,30 +79,31 @@ class RLAgent:
         state_key = self.state_to_key(state)
         next_state_key = self.state_to_key(next_state)
         
-        current_q = self.q_table[state_key][action]
-        
         # Calculate max Q for next state
-        if next_valid_moves:
-            next_q_values = [self.q_table[next_state_key][a] for a in next_valid_moves]
-            max_next_q = max(next_q_values) if next_q_values else 0
+        if isinstance(next_valid_moves, np.ndarray) and next_valid_moves.dtype == bool:
+            next_valid_moves = np.flatnonzero(next_valid_moves)
+        if len(next_valid_moves):
+            max_next_q = self.q_table.get(next_state_key)[next_valid_moves].max()
         else:
             max_next_q = 0
             
-        # Update Q-value
-        new_q = current_q + self.learning_rate * (
-            reward + self.discount_factor * max_next_q - current_q
+        # Update Q-value in place
+        q_values = self.q_table[state_key]
+        q_values[action] += self.learning_rate * (
+            reward + self.discount_factor * max_next_q - q_values[action]
         )
-        self.q_table[state_key][action] = new_q
         
         # Decay exploration rate
         self.exploration_rate = max(self.min_exploration, 
                                    self.exploration_rate * self.exploration_decay)
     
-    # Change the get_path method to:
     def get_path(self, start, end, battery, city):
         """Generate path using RL policy"""
+        action_mask = city.get_action_mask()
         path = []
-        current_pos = start
+        current_pos = (min(max(int(round(start[0])), 0), city.width - 1),
+                       min(max(int(round(start[1])), 0), city.height - 1))
+        end = (int(round(end[0])), int(round(end[1])))
         battery_left = battery
         
         # Max steps to prevent infinite loops
@@ -80,14 +111,9 @@ class RLAgent:
             if current_pos == end:
                 break
                 
-            # Get valid moves
-            valid_moves = []
-            for i, action in enumerate(self.actions):
-                new_pos = (current_pos[0] + action[0], current_pos[1] + action[1])
-                if city.is_valid_position(int(new_pos[0]), int(new_pos[1])):
-                    valid_moves.append(i)
-            
-            if not valid_moves:
+            # Get valid moves from the precomputed mask
+            valid_moves = action_mask[current_pos]
+            if not valid_moves.any():
                 break
                 
             # Get state
@@ -106,15 +132,30 @@ class RLAgent:
         return path
     
     def save_model(self):
-        """Save Q-table to file"""
+        """Save Q-table to a single .npy file"""
         os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-        joblib.dump(dict(self.q_table), self.model_path)
+        self.q_table.save(self.model_path)
     
     def load_model(self):
-        """Load Q-table from file"""
+        """Load Q-table from file (memory-mapped for dense tables)"""
         if os.path.exists(self.model_path):
-            q_table_dict = joblib.load(self.model_path)
-            self.q_table = defaultdict(lambda: np.zeros(8), q_table_dict)
-            self.exploration_rate = self.min_exploration  # Set to min for exploitation
-            return True
-        return False
\ No newline at end of file
+            q_table = load_q_table(self.model_path)
+            if isinstance(q_table, DenseQTable) and len(q_table) != self.n_states:
+                print(f"Ignoring {self.model_path}: trained for a different grid size")
+                return False
+            self.q_table = q_table
+        elif os.path.exists(self.legacy_model_path):
+            self.q_table = self.convert_legacy(joblib.load(self.legacy_model_path))
+        else:
+            return False
+        self.exploration_rate = self.min_exploration  # Set to min for exploitation
+        self.trained = True
+        return True
+    
+    def convert_legacy(self, q_table_dict):
+        """Import a pickled dict Q-table keyed by (x, y, tx, ty, battery)"""
+        q_table = self.create_q_table()
+        for (x, y, tx, ty, battery), q_values in q_table_dict.items():
+            key = self.state_to_key(((x, y), (tx, ty), battery))
+            q_table[key] = np.maximum(q_table.get(key), q_values)
+        return q_table
\ No newline at end of file
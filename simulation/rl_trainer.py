@@ -0,0 +1,211 @@
+import os
+import time
+import tempfile
+import multiprocessing
+
+import numpy as np
+
+from .city import CityGrid
+from .rl_agent import RLAgent
+from .q_table import DenseQTable, load_q_table
+
+class VectorizedTrainer:
+    """Steps many routing episodes in lockstep with batched Q-learning updates"""
+
+    def __init__(self, agent, city, n_envs=256, max_steps=None,
+                 goal_reward=100.0, seed=None):
+        if not isinstance(agent.q_table, DenseQTable):
+            raise ValueError("Vectorized training needs a dense Q-table")
+        self.agent = agent
+        self.city = city
+        self.n_envs = n_envs
+        self.max_steps = max_steps or 4 * (city.width + city.height)
+        self.goal_reward = goal_reward
+        self.rng = np.random.default_rng(seed)
+
+        # Valid-move masks for every cell, shared with path generation
+        navigator = city.get_navigator()
+        self.valid_moves = city.get_action_mask()
+        self.moves = np.array(agent.actions)
+        self.step_costs = np.array(navigator.costs, dtype=np.float32)
+        self.free_cells = np.argwhere(navigator.passable)
+
+        # Update counts per (state, action), used to merge worker tables
+        self.visits = np.zeros(agent.q_table.values.shape, dtype=np.float32)
+
+        self.position = np.zeros((n_envs, 2), dtype=np.int64)
+        self.target = np.zeros((n_envs, 2), dtype=np.int64)
+        self.battery = np.zeros(n_envs, dtype=np.float64)
+        self.steps = np.zeros(n_envs, dtype=np.int64)
+        self.reset(np.ones(n_envs, dtype=bool))
+
+        self.episodes = 0
+        self.successes = 0
+        self.episode_steps = 0
+        self.td_error = 0.0
+        self.updates = 0
+
+    def reset(self, envs):
+        """Start new episodes with random distinct start and target cells"""
+        n = int(envs.sum())
+        if n == 0:
+            return
+        starts = self.free_cells[self.rng.integers(len(self.free_cells), size=n)]
+        targets = self.free_cells[self.rng.integers(len(self.free_cells), size=n)]
+        same = np.all(starts == targets, axis=1)
+        while same.any() and len(self.free_cells) > 1:
+            targets[same] = self.free_cells[self.rng.integers(len(self.free_cells), size=same.sum())]
+            same = np.all(starts == targets, axis=1)
+        self.position[envs] = starts
+        self.target[envs] = targets
+        self.battery[envs] = self.rng.integers(20, 100, size=n)
+        self.steps[envs] = 0
+
+    def encode(self, position, target, battery):
+        """Vectorized RLAgent.state_to_key"""
+        agent = self.agent
+        height = agent.grid_size[1]
+        cells = position[:, 0] * height + position[:, 1]
+        targets = target[:, 0] * height + target[:, 1]
+        buckets = np.clip(battery.astype(np.int64), 0, 100) // agent.battery_bucket
+        return (cells * agent.n_cells + targets) * agent.n_buckets + buckets
+
+    def step(self):
+        """Advance every environment by one move and apply the TD updates"""
+        agent = self.agent
+        q_table = agent.q_table.values
+        envs = np.arange(self.n_envs)
+
+        keys = self.encode(self.position, self.target, self.battery)
+        mask = self.valid_moves[self.position[:, 0], self.position[:, 1]]
+        stuck = ~mask.any(axis=1)
+
+        # Batched epsilon-greedy over valid moves only
+        q_values = q_table[keys]
+        greedy = np.where(mask, q_values, -np.inf).argmax(axis=1)
+        random_moves = (self.rng.random(mask.shape) * mask).argmax(axis=1)
+        explore = self.rng.random(self.n_envs) < agent.exploration_rate
+        actions = np.where(explore, random_moves, greedy)
+
+        # Take actions
+        next_position = self.position + self.moves[actions]
+        next_position[stuck] = self.position[stuck]
+        next_battery = self.battery - 0.5
+        reached = np.all(next_position == self.target, axis=1)
+        rewards = -self.step_costs[actions] + self.goal_reward * reached
+
+        # Per-step Q-learning update
+        next_keys = self.encode(next_position, self.target, next_battery)
+        next_mask = self.valid_moves[next_position[:, 0], next_position[:, 1]]
+        next_q = np.where(next_mask, q_table[next_keys], -np.inf).max(axis=1)
+        next_q[reached | ~next_mask.any(axis=1)] = 0.0
+        td = rewards + agent.discount_factor * next_q - q_values[envs, actions]
+        td[stuck] = 0.0
+        np.add.at(q_table, (keys, actions), (agent.learning_rate * td).astype(np.float32))
+        np.add.at(self.visits, (keys, actions), 1.0)
+
+        self.position = next_position
+        self.battery = next_battery
+        self.steps += 1
+        self.td_error += float(np.abs(td).sum())
+        self.updates += self.n_envs
+
+        # Finish and restart episodes
+        done = reached | stuck | (self.steps >= self.max_steps)
+        n_done = int(done.sum())
+        if n_done:
+            self.episodes += n_done
+            self.successes += int(reached.sum())
+            self.episode_steps += int(self.steps[done].sum())
+            agent.exploration_rate = max(agent.min_exploration,
+                                         agent.exploration_rate * agent.exploration_decay ** n_done)
+            self.reset(done)
+        return n_done
+
+    def train(self, num_episodes, log_interval=1000):
+        """Run until `num_episodes` have finished; returns the logged metrics"""
+        history = []
+        start_time = time.time()
+        target = self.episodes + num_episodes
+        next_log = self.episodes + (log_interval or num_episodes)
+        window = (self.episodes, self.successes, self.episode_steps, self.td_error, self.updates)
+
+        while self.episodes < target:
+            self.step()
+            if self.episodes >= next_log or self.episodes >= target:
+                episodes, successes, steps, td_error, updates = window
+                finished = max(1, self.episodes - episodes)
+                metrics = {
+                    "episodes": self.episodes,
+                    "episodes_per_sec": self.episodes / max(time.time() - start_time, 1e-9),
+                    "success_rate": (self.successes - successes) / finished,
+                    "mean_steps": (self.episode_steps - steps) / finished,
+                    "mean_td_error": (self.td_error - td_error) / max(1, self.updates - updates),
+                    "exploration": self.agent.exploration_rate,
+                }
+                history.append(metrics)
+                if log_interval:
+                    print(f"Episode {metrics['episodes']} | "
+                          f"{metrics['episodes_per_sec']:.0f} ep/s | "
+                          f"Success: {metrics['success_rate']:.2%} | "
+                          f"Steps: {metrics['mean_steps']:.1f} | "
+                          f"|TD|: {metrics['mean_td_error']:.3f} | "
+                          f"Exploration: {metrics['exploration']:.3f}")
+                window = (self.episodes, self.successes, self.episode_steps, self.td_error, self.updates)
+                next_log = self.episodes + (log_interval or num_episodes)
+        return history
+
+def _train_worker(args):
+    """Train a private copy of the Q-table in a worker process"""
+    grid, table_path, exploration_rate, n_envs, num_episodes, seed = args
+    city = CityGrid.from_grid(grid)
+    agent = RLAgent(grid.shape)
+    # Copy-on-write map of the shared table: only pages this worker updates are copied
+    agent.q_table = load_q_table(table_path)
+    agent.exploration_rate = exploration_rate
+    trainer = VectorizedTrainer(agent, city, n_envs, seed=seed)
+    trainer.train(num_episodes, log_interval=None)
+
+    # Send back only the states this worker updated
+    rows = np.flatnonzero(trainer.visits.any(axis=1))
+    return (rows, np.asarray(agent.q_table.values[rows]), trainer.visits[rows],
+            trainer.episodes, trainer.successes, agent.exploration_rate)
+
+def train_parallel(agent, city, num_episodes, workers=None, n_envs=256, seed=None):
+    """Split training across processes and merge Q-tables weighted by visits"""
+    workers = workers or multiprocessing.cpu_count()
+    seeds = np.random.SeedSequence(seed).generate_state(workers)
+    per_worker = -(-num_episodes // workers)
+
+    start_time = time.time()
+    weighted = np.zeros(agent.q_table.values.shape, dtype=np.float64)
+    visits = np.zeros(agent.q_table.values.shape, dtype=np.float64)
+    episodes = successes = 0
+    exploration = agent.exploration_rate
+    with tempfile.TemporaryDirectory() as directory:
+        # Workers map the starting table from disk instead of each receiving a copy
+        table_path = os.path.join(directory, 'q_table.npy')
+        agent.q_table.save(table_path)
+        jobs = [(city.grid, table_path, agent.exploration_rate,
+                 n_envs, per_worker, int(s)) for s in seeds]
+        with multiprocessing.Pool(workers) as pool:
+            for result in pool.imap_unordered(_train_worker, jobs):
+                rows, q_values, worker_visits, done, reached, rate = result
+                weighted[rows] += q_values * worker_visits
+                visits[rows] += worker_visits
+                episodes += done
+                successes += reached
+                exploration = min(exploration, rate)
+
+    # States no worker touched keep their current values
+    visited = visits > 0
+    agent.q_table.values[visited] = (weighted[visited] / visits[visited]).astype(np.float32)
+    agent.exploration_rate = exploration
+
+    elapsed = time.time() - start_time
+    return {
+        "episodes": episodes,
+        "episodes_per_sec": episodes / max(elapsed, 1e-9),
+        "success_rate": successes / max(1, episodes),
+        "exploration": exploration,
+    }
@@ -0,0 +1,94 @@
+import io
+import pickle
+import random
+import struct
+import types
+import zlib
+
+import numpy as np
+import pygame
+
+from .model_registry import acquire_model
+
+# File layout: MAGIC, a little-endian uint32 version, then a zlib-compressed pickle
+MAGIC = b'DSNP'
+VERSION = 3
+HEADER = struct.Struct('<4sI')
+
+# Engine attributes rebuilt on restore instead of saved: they hold threads,
+# open files and display surfaces, and none of them feeds back into the state.
+# The anomaly monitor is saved, so alerts after a restore match the full run.
+SERVICES = ('renderer', 'data_collector', 'trajectory')
+
+class SnapshotPickler(pickle.Pickler):
+    """Pickler that leaves out the shared model, surfaces and engine services"""
+
+    def __init__(self, file, engine):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.model = engine.ml_system
+        self.grid_size = engine.grid_size
+        self.services = {id(getattr(engine, name)) for name in SERVICES
+                         if getattr(engine, name, None) is not None}
+
+    def persistent_id(self, obj):
+        if obj is self.model:
+            return ('model', self.grid_size)
+        if isinstance(obj, pygame.Surface):
+            return 'surface'
+        if id(obj) in self.services:
+            return 'service'
+        # Callbacks registered by a service, e.g. the renderer's city listener
+        if isinstance(obj, types.MethodType) and id(obj.__self__) in self.services:
+            return 'service'
+        return None
+
+class SnapshotUnpickler(pickle.Unpickler):
+    """Reattach the shared model; surfaces and services come back as None"""
+
+    def __init__(self, file):
+        super().__init__(file)
+        self.model = None
+
+    def persistent_load(self, pid):
+        if isinstance(pid, tuple) and pid[0] == 'model':
+            # One reference for the restored engine, however many objects point at it
+            if self.model is None:
+                self.model = acquire_model(pid[1])
+            return self.model
+        return None
+
+def save_snapshot(engine, path, level=6):
+    """Write the complete simulation state, RNG states included; returns the file size"""
+    buffer = io.BytesIO()
+    SnapshotPickler(buffer, engine).dump({
+        'engine': engine,
+        'random': random.getstate(),
+        'numpy': np.random.get_state(),
+    })
+    data = HEADER.pack(MAGIC, VERSION) + zlib.compress(buffer.getvalue(), level)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+def load_snapshot(path, trajectory_path=None):
+    """Engine restored from a snapshot, with fresh services, ready to keep stepping"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a simulation snapshot")
+    if version != VERSION:
+        raise ValueError(f"Unsupported snapshot version {version} in {path}")
+    state = SnapshotUnpickler(io.BytesIO(zlib.decompress(data[HEADER.size:]))).load()
+
+    # Random draws continue exactly where the saved run left off
+    random.setstate(state['random'])
+    np.random.set_state(state['numpy'])
+
+    engine = state['engine']
+
+    # Drop the callbacks of services that were left out
+    engine.city.listeners = [listener for listener in engine.city.listeners
+                             if listener is not None]
+    engine.start_services(trajectory_path)
+    return engine
@@ -0,0 +1,39 @@
+def route_length(dist, route):
+    """Length of a route through a distance matrix ([i, j] is the cost from j to i)"""
+    return sum(dist[b, a] for a, b in zip(route, route[1:]))
+
+def order_stops(dist, start=0, end=1):
+    """Visit order for every other node from `start` to `end`: nearest neighbor, then 2-opt"""
+    stops = [node for node in range(len(dist)) if node not in (start, end)]
+
+    # Nearest-neighbor construction
+    route = [start]
+    remaining = set(stops)
+    while remaining:
+        current = route[-1]
+        nearest = min(remaining, key=lambda node: dist[node, current])
+        route.append(nearest)
+        remaining.remove(nearest)
+    route.append(end)
+
+    # 2-opt: reverse inner segments while that shortens the route
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, len(route) - 2):
+            for j in range(i + 1, len(route) - 1):
+                a, b = route[i - 1], route[i]
+                c, d = route[j], route[j + 1]
+                before = dist[b, a] + dist[d, c]
+                after = dist[c, a] + dist[d, b]
+                if after < before - 1e-9:
+                    route[i:j + 1] = reversed(route[i:j + 1])
+                    improved = True
+    return route
+
+def plan_sortie(navigator, start, home, packages):
+    """Order packages into one round trip; returns (ordered packages, trip length)"""
+    cells = [start, home] + [package['destination'] for package in packages]
+    dist = navigator.distance_matrix(cells)
+    route = order_stops(dist)
+    return [packages[node - 2] for node in route[1:-1]], route_length(dist, route)
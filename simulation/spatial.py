@@ -0,0 +1,129 @@
+import heapq
+import math
+
+class SpatialIndex:
+    """Uniform-grid bucket index over city coordinates"""
+
+    def __init__(self, cell_size=4.0, items=()):
+        self.cell_size = cell_size
+        self.buckets = {}       # (bx, by) -> {item: None}, insertion-ordered for repeatable ties
+        self.positions = {}     # item -> (x, y)
+        self.item_buckets = {}  # item -> (bx, by)
+        self.bounds = None      # (min bx, min by, max bx, max by) of occupied buckets
+        for item in items:
+            self.insert(item, item.x, item.y)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __iter__(self):
+        return iter(self.positions)
+
+    def __contains__(self, item):
+        return item in self.positions
+
+    def bucket(self, x, y):
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def place(self, item, key):
+        self.buckets.setdefault(key, {})[item] = None
+        self.item_buckets[item] = key
+        if self.bounds is None:
+            self.bounds = (key[0], key[1], key[0], key[1])
+        else:
+            x0, y0, x1, y1 = self.bounds
+            self.bounds = (min(x0, key[0]), min(y0, key[1]), max(x1, key[0]), max(y1, key[1]))
+
+    def unplace(self, item):
+        key = self.item_buckets.pop(item)
+        bucket = self.buckets[key]
+        del bucket[item]
+        if not bucket:
+            del self.buckets[key]
+
+    def insert(self, item, x, y):
+        if item in self.positions:
+            self.move(item, x, y)
+            return
+        self.positions[item] = (x, y)
+        self.place(item, self.bucket(x, y))
+
+    def remove(self, item):
+        if item in self.positions:
+            del self.positions[item]
+            self.unplace(item)
+
+    def move(self, item, x, y):
+        """Update an item's position; it only changes bucket when it crosses a boundary"""
+        self.positions[item] = (x, y)
+        key = self.bucket(x, y)
+        if self.item_buckets[item] != key:
+            self.unplace(item)
+            self.place(item, key)
+
+    def ring(self, center, r):
+        """Bucket keys at Chebyshev distance `r` from `center`"""
+        cx, cy = center
+        if r == 0:
+            yield center
+            return
+        for dx in range(-r, r + 1):
+            yield (cx + dx, cy - r)
+            yield (cx + dx, cy + r)
+        for dy in range(-r + 1, r):
+            yield (cx - r, cy + dy)
+            yield (cx + r, cy + dy)
+
+    def max_ring(self, center):
+        """Last ring that can still contain an occupied bucket"""
+        if self.bounds is None:
+            return -1
+        x0, y0, x1, y1 = self.bounds
+        return max(abs(center[0] - x0), abs(center[0] - x1),
+                   abs(center[1] - y0), abs(center[1] - y1))
+
+    def nearest(self, x, y, k=1, predicate=None, max_distance=float('inf')):
+        """Up to `k` (distance, item) pairs closest to (x, y) that satisfy `predicate`"""
+        center = self.bucket(x, y)
+        found = []          # max-heap of (-distance, order, item)
+        order = 0
+        last_ring = self.max_ring(center)
+        r = 0
+        while r <= last_ring:
+            for key in self.ring(center, r):
+                for item in self.buckets.get(key, ()):
+                    px, py = self.positions[item]
+                    dist = math.hypot(px - x, py - y)
+                    if dist > max_distance or (predicate and not predicate(item)):
+                        continue
+                    order += 1
+                    if len(found) < k:
+                        heapq.heappush(found, (-dist, order, item))
+                    elif dist < -found[0][0]:
+                        heapq.heapreplace(found, (-dist, order, item))
+            # Anything in later rings is at least r whole buckets away
+            reach = r * self.cell_size
+            if (len(found) == k and -found[0][0] <= reach) or reach > max_distance:
+                break
+            r += 1
+        return [(-d, item) for d, _, item in sorted(found, reverse=True)]
+
+    def nearest_one(self, x, y, predicate=None, max_distance=float('inf')):
+        """Closest item satisfying `predicate`, or None"""
+        result = self.nearest(x, y, 1, predicate, max_distance)
+        return result[0][1] if result else None
+
+    def within(self, x, y, radius, predicate=None):
+        """All (distance, item) pairs within `radius` of (x, y), closest first"""
+        x0, y0 = self.bucket(x - radius, y - radius)
+        x1, y1 = self.bucket(x + radius, y + radius)
+        result = []
+        for bx in range(x0, x1 + 1):
+            for by in range(y0, y1 + 1):
+                for item in self.buckets.get((bx, by), ()):
+                    px, py = self.positions[item]
+                    dist = math.hypot(px - x, py - y)
+                    if dist <= radius and (predicate is None or predicate(item)):
+                        result.append((dist, item))
+        result.sort(key=lambda pair: pair[0])
+        return result
@@ -1,5 +1,6 @@
 import pygame
 from .utils import *
+from .text_cache import render_text
 
 class ChargingStation:
     def __init__(self, x, y, id):
@@ -24,21 +25,18 @@ class ChargingStation:
         if drone in self.drones_charging:
             self.drones_charging.remove(drone)
     
-    def draw(self, surface, cell_size, font_small):
+    def draw(self, surface, camera, font_small, labels=True):
+        sx, sy = camera.to_screen(self.x, self.y)
+        
         # Draw station
-        pygame.draw.circle(surface, self.color, 
-                          (self.x * cell_size, self.y * cell_size), 
-                          self.radius)
+        rect = pygame.draw.circle(surface, self.color, (sx, sy), self.radius)
         
         # Draw lightning symbol
-        points = [
-            (self.x * cell_size, self.y * cell_size - 5),
-            (self.x * cell_size + 3, self.y * cell_size),
-            (self.x * cell_size - 3, self.y * cell_size),
-            (self.x * cell_size, self.y * cell_size + 5)
-        ]
+        points = [(sx, sy - 5), (sx + 3, sy), (sx - 3, sy), (sx, sy + 5)]
         pygame.draw.lines(surface, (255, 255, 200), False, points, 2)
         
         # Draw capacity
-        text = font_small.render(f"ST{self.id}: {len(self.drones_charging)}/{self.capacity}", True, TEXT_COLOR)
-        surface.blit(text, (self.x * cell_size - 15, self.y * cell_size - 15))
\ No newline at end of file
+        if labels:
+            text = render_text(font_small, f"ST{self.id}: {len(self.drones_charging)}/{self.capacity}", TEXT_COLOR)
+            rect.union_ip(surface.blit(text, (sx - 15, sy - 15)))
+        return rect
\ No newline at end of file
@@ -0,0 +1,179 @@
+import os
+import glob
+import queue
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+EXTENSIONS = {'parquet': '.parquet', 'arrow': '.arrow', 'csv': '.csv'}
+
+def default_format():
+    """Parquet when pyarrow is installed, CSV otherwise"""
+    return 'parquet' if pa is not None else 'csv'
+
+# Timestamps are stored as seconds since this naive datetime
+EPOCH = datetime(1970, 1, 1)
+
+def to_seconds(moment):
+    """Naive datetime (e.g. the simulated clock) to float seconds since EPOCH"""
+    return (moment - EPOCH).total_seconds()
+
+def to_datetime(seconds):
+    """Seconds since EPOCH back to naive timestamps"""
+    return pd.to_datetime(np.asarray(seconds), unit='s')
+
+class ColumnBuffer:
+    """Typed record array filled row by row and handed off as row groups"""
+
+    def __init__(self, schema, capacity=4096):
+        self.dtype = np.dtype(schema)   # [(name, dtype), ...]; each field is a column
+        self.capacity = capacity
+        self.reset()
+
+    def __len__(self):
+        return self.size
+
+    def reset(self):
+        self.rows = np.empty(self.capacity, dtype=self.dtype)
+        self.size = 0
+
+    def append(self, *values):
+        """Add one row; returns True once the buffer is full"""
+        self.rows[self.size] = values
+        self.size += 1
+        return self.size == self.capacity
+
+    def take(self):
+        """Filled rows as a record array; the buffer starts over with a fresh one"""
+        batch = self.rows[:self.size]
+        self.reset()
+        return batch
+
+class TelemetryWriter:
+    """Background thread writing row groups per stream behind a bounded queue"""
+
+    def __init__(self, directory="data", format=None, max_pending=8):
+        format = format or default_format()
+        if format not in EXTENSIONS:
+            raise ValueError(f"Unknown telemetry format: {format}")
+        if format != 'csv' and pa is None:
+            print(f"pyarrow is not installed; writing telemetry as CSV instead of {format}")
+            format = 'csv'
+        self.directory = directory
+        self.format = format
+        self.session = time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+        self.files = {}                 # stream -> open Parquet / Arrow writer
+        self.rows_written = 0
+        self.error = None               # first write failure, raised by flush() / close()
+        self.queue = queue.Queue(maxsize=max_pending)
+        os.makedirs(directory, exist_ok=True)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def path(self, stream):
+        """CSV streams append to one file; Parquet and Arrow write one part per session"""
+        if self.format == 'csv':
+            return os.path.join(self.directory, stream + ".csv")
+        return os.path.join(self.directory, stream, f"part-{self.session}{EXTENSIONS[self.format]}")
+
+    def submit(self, stream, batch):
+        """Queue a row group; blocks while the writer is max_pending groups behind"""
+        self.queue.put((stream, batch))
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    self.close_files()
+                else:
+                    self.write(*item)
+            except Exception as e:
+                # Keep the first failure for the caller's thread
+                if self.error is None:
+                    self.error = e
+            finally:
+                self.queue.task_done()
+            if item is None:
+                return
+
+    def write(self, stream, batch):
+        frame = pd.DataFrame(batch)
+        if 'timestamp' in frame:
+            frame['timestamp'] = to_datetime(frame['timestamp'])
+        path = self.path(stream)
+
+        if self.format == 'csv':
+            frame.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+        else:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            writer = self.files.get(stream)
+            if writer is None:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if self.format == 'parquet':
+                    writer = pq.ParquetWriter(path, table.schema)
+                else:
+                    writer = pa.ipc.new_file(path, table.schema)
+                self.files[stream] = writer
+            writer.write_table(table)
+        self.rows_written += len(frame)
+
+    def close_files(self):
+        for writer in self.files.values():
+            writer.close()
+        self.files = {}
+
+    def check(self):
+        """Re-raise a write failure from the writer thread, once"""
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def flush(self):
+        """Wait until every queued row group is on disk"""
+        self.queue.join()
+        self.check()
+
+    def close(self):
+        """Write what is queued, close the files and stop the thread"""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        self.check()
+
+def read_table(path):
+    """Load a telemetry stream in any format, from its path with or without extension"""
+    base, ext = os.path.splitext(path)
+    if ext not in EXTENSIONS.values():
+        base = path
+
+    frames = []
+    if os.path.isfile(base + ".csv"):
+        frames.append(pd.read_csv(base + ".csv"))
+    parts = sorted(glob.glob(os.path.join(base, "part-*")))
+    if parts and pa is None:
+        raise ImportError(f"pyarrow is needed to read {base}/")
+    for part in parts:
+        if part.endswith(".parquet"):
+            frames.append(pq.read_table(part).to_pandas())
+        elif part.endswith(".arrow"):
+            with pa.memory_map(part) as source:
+                frames.append(pa.ipc.open_file(source).read_pandas())
+    if not frames:
+        raise FileNotFoundError(f"No telemetry found for {path}")
+
+    df = pd.concat(frames, ignore_index=True)
+    if 'timestamp' in df:
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        df = df.sort_values('timestamp', kind='stable', ignore_index=True)
+    return df
@@ -0,0 +1,42 @@
+from collections import OrderedDict
+
+class TextCache:
+    """Bounded LRU of rendered text surfaces keyed by (font, text, color)"""
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.surfaces)
+
+    def render(self, font, text, color, antialias=True):
+        """Cached equivalent of font.render(text, antialias, color)"""
+        key = (font, text, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self):
+        self.surfaces.clear()
+
+# Shared by every draw method
+text_cache = TextCache()
+
+def render_text(font, text, color):
+    return text_cache.render(font, text, color)
@@ -0,0 +1,90 @@
+import csv
+import os
+
+import numpy as np
+import pandas as pd
+
+class TimeSeriesBuffer:
+    """Fixed-capacity columnar ring buffer with O(1) append and zero-copy windows"""
+
+    def __init__(self, columns, capacity=1024, spill_path=None, spill_chunk=256):
+        # `columns` maps a name to a dtype, or to (dtype, row_shape) for vector columns
+        self.capacity = capacity
+        self.columns = {}
+        for name, spec in columns.items():
+            dtype, shape = spec if isinstance(spec, tuple) else (spec, ())
+            # Each row is written twice so any window is one contiguous slice
+            self.columns[name] = np.zeros((2 * capacity,) + tuple(shape), dtype=dtype)
+        self.position = 0
+        self.size = 0
+        self.total = 0
+
+        # Rows pushed out of the ring are appended to a CSV file, if given
+        self.spill_path = spill_path
+        self.spill_chunk = spill_chunk
+        self.pending = []
+
+    def __len__(self):
+        return self.size
+
+    def append(self, **values):
+        """Add one row, evicting (and optionally spilling) the oldest when full"""
+        position = self.position
+        if self.size == self.capacity and self.spill_path:
+            self.pending.append([self.columns[name][position].tolist() for name in self.columns])
+
+        for name, column in self.columns.items():
+            value = values[name]
+            column[position] = value
+            column[position + self.capacity] = value
+
+        self.position = (position + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        self.total += 1
+        if len(self.pending) >= self.spill_chunk:
+            self.spill()
+
+    def window(self, name, n=None, step=1):
+        """Last `n` values of a column (all buffered rows by default), oldest first, as a view
+
+        With `step` > 1 only every step-th row back from the newest is included.
+        """
+        available = (self.size + step - 1) // step
+        n = available if n is None else min(n, available)
+        end = self.position + self.capacity
+        start = end - (n - 1) * step - 1 if n else end
+        return self.columns[name][start:end:step]
+
+    def last(self, name):
+        return self.columns[name][self.position + self.capacity - 1]
+
+    def spill(self):
+        """Append evicted rows to the spill file"""
+        if not self.pending:
+            return
+        directory = os.path.dirname(self.spill_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        new_file = not os.path.exists(self.spill_path)
+        with open(self.spill_path, 'a', newline='') as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(list(self.columns))
+            writer.writerows(self.pending)
+        self.pending = []
+
+    def close(self):
+        """Spill everything still buffered, e.g. at shutdown"""
+        if self.spill_path:
+            end = self.position + self.capacity
+            start = end - self.size
+            for i in range(start, end):
+                self.pending.append([self.columns[name][i].tolist() for name in self.columns])
+            self.spill()
+            self.size = 0
+
+    def to_frame(self, n=None):
+        """Copy the last `n` rows into a DataFrame"""
+        return pd.DataFrame({name: self.window(name, n).tolist() if column.ndim > 1
+                             else self.window(name, n)
+                             for name, column in self.columns.items()})
@@ -0,0 +1,270 @@
+import mmap
+import os
+
+import numpy as np
+
+# File layout: one FILE_HEADER, then frames of FRAME_HEADER + DELTA records + ABSOLUTE records
+FILE_HEADER = np.dtype([('magic', 'S4'), ('version', '<u4'), ('keyframe_interval', '<u4'),
+                        ('position_scale', '<f4'), ('battery_scale', '<f4')])
+FRAME_HEADER = np.dtype([('tick', '<u4'), ('keyframe', '<u4'), ('deltas', '<u4'), ('absolutes', '<u4')])
+DELTA = np.dtype([('drone', '<u4'), ('dx', '<i2'), ('dy', '<i2'), ('dbattery', '<i2'),
+                  ('status', 'u1')])
+ABSOLUTE = np.dtype([('drone', '<u4'), ('x', '<f4'), ('y', '<f4'), ('battery', '<f4'),
+                     ('status', 'u1')])
+INDEX = np.dtype([('tick', '<u4'), ('offset', '<u8'), ('keyframe', 'u1')])
+MAGIC = b'DTRJ'
+VERSION = 1
+DELTA_LIMIT = np.iinfo(np.int16).max
+
+class TrajectoryWriter:
+    """Per-tick fleet log in a growing memory-mapped file: keyframes plus quantized deltas"""
+
+    def __init__(self, path, keyframe_interval=600, position_scale=1024, battery_scale=256,
+                 initial_size=1 << 20):
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.position_scale = position_scale    # powers of two keep the decoded sums exact
+        self.battery_scale = battery_scale
+        self.file = open(path, 'w+b')
+        self.capacity = max(initial_size, FILE_HEADER.itemsize)
+        self.file.truncate(self.capacity)
+        self.mm = mmap.mmap(self.file.fileno(), self.capacity)
+        header = np.array([(MAGIC, VERSION, keyframe_interval, position_scale, battery_scale)],
+                          dtype=FILE_HEADER)
+        self.size = 0
+        self.write_bytes(header.tobytes())
+
+        # Decoded state as a reader will see it, per fleet slot; deltas are taken against it
+        self.ids = np.empty(0, dtype=np.uint32)
+        self.x = np.empty(0)
+        self.y = np.empty(0)
+        self.battery = np.empty(0)
+        self.status = np.empty(0, dtype=np.uint8)
+        self.last_keyframe = None
+        self.index = []
+
+    def write_bytes(self, data):
+        end = self.size + len(data)
+        if end > self.capacity:
+            while end > self.capacity:
+                self.capacity *= 2
+            self.mm.resize(self.capacity)
+        self.mm[self.size:end] = data
+        self.size = end
+
+    def record(self, tick, fleet):
+        """Append one frame with the fleet's positions, battery and status at `tick`"""
+        n = fleet.size
+        if len(self.ids) != n:
+            self.ids = np.array([drone.id for drone in fleet.drones], dtype=np.uint32)
+        x, y = fleet.x[:n], fleet.y[:n]
+        battery, status = fleet.battery[:n], fleet.status[:n].astype(np.uint8)
+        keyframe = self.last_keyframe is None or tick - self.last_keyframe >= self.keyframe_interval
+
+        absolute = np.ones(n, dtype=bool)
+        delta = np.zeros(n, dtype=bool)
+        known = len(self.x)
+        if not keyframe and known:
+            # Quantize against the decoded state, so rounding never accumulates
+            dx = np.round((x[:known] - self.x) * self.position_scale)
+            dy = np.round((y[:known] - self.y) * self.position_scale)
+            db = np.round((battery[:known] - self.battery) * self.battery_scale)
+            overflow = np.maximum(np.maximum(np.abs(dx), np.abs(dy)), np.abs(db)) > DELTA_LIMIT
+            changed = (dx != 0) | (dy != 0) | (db != 0) | (status[:known] != self.status)
+            absolute[:known] = overflow
+            delta[:known] = changed & ~overflow
+
+        # Grow the decoded state for drones added since the last frame
+        if known < n:
+            self.x = np.concatenate([self.x, np.zeros(n - known)])
+            self.y = np.concatenate([self.y, np.zeros(n - known)])
+            self.battery = np.concatenate([self.battery, np.zeros(n - known)])
+            self.status = np.concatenate([self.status, np.zeros(n - known, dtype=np.uint8)])
+
+        d = np.flatnonzero(delta)
+        deltas = np.empty(len(d), dtype=DELTA)
+        if len(d):
+            deltas['drone'] = self.ids[d]
+            deltas['dx'] = dx[d]
+            deltas['dy'] = dy[d]
+            deltas['dbattery'] = db[d]
+            deltas['status'] = status[d]
+            self.x[d] += deltas['dx'] / self.position_scale
+            self.y[d] += deltas['dy'] / self.position_scale
+            self.battery[d] += deltas['dbattery'] / self.battery_scale
+            self.status[d] = status[d]
+
+        a = np.flatnonzero(absolute)
+        absolutes = np.empty(len(a), dtype=ABSOLUTE)
+        absolutes['drone'] = self.ids[a]
+        absolutes['x'] = x[a]
+        absolutes['y'] = y[a]
+        absolutes['battery'] = battery[a]
+        absolutes['status'] = status[a]
+        self.x[a] = absolutes['x']
+        self.y[a] = absolutes['y']
+        self.battery[a] = absolutes['battery']
+        self.status[a] = status[a]
+
+        if keyframe:
+            self.last_keyframe = tick
+        self.index.append((tick, self.size, keyframe))
+        header = np.array([(tick, keyframe, len(deltas), len(absolutes))], dtype=FRAME_HEADER)
+        self.write_bytes(header.tobytes() + deltas.tobytes() + absolutes.tobytes())
+
+    def flush(self):
+        """Make the frames so far durable and readable, index included"""
+        self.mm.flush()
+        np.array(self.index, dtype=INDEX).tofile(self.path + ".idx")
+
+    def close(self):
+        if self.mm is None:
+            return
+        self.flush()
+        self.mm.close()
+        self.mm = None
+        self.file.truncate(self.size)
+        self.file.close()
+
+class TrajectoryReader:
+    """Random access to a trajectory log: seek to any tick from the nearest keyframe"""
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        header = np.frombuffer(self.mm, FILE_HEADER, 1)[0]
+        if header['magic'] != MAGIC:
+            raise ValueError(f"{path} is not a trajectory log")
+        self.keyframe_interval = int(header['keyframe_interval'])
+        self.position_scale = float(header['position_scale'])
+        self.battery_scale = float(header['battery_scale'])
+
+        index_path = path + ".idx"
+        if os.path.exists(index_path):
+            self.index = np.fromfile(index_path, dtype=INDEX)
+        else:
+            self.index = self.scan()
+        self.keyframes = np.flatnonzero(self.index['keyframe'])
+        self.reset()
+
+    def scan(self):
+        """Rebuild the frame index by walking the frame headers (e.g. after a crash)"""
+        frames = []
+        offset = FILE_HEADER.itemsize
+        while offset + FRAME_HEADER.itemsize <= len(self.mm):
+            tick, keyframe, deltas, absolutes = np.frombuffer(self.mm, FRAME_HEADER, 1, offset)[0].tolist()
+            if not (tick or keyframe or deltas or absolutes):
+                break   # zeroed space past the last frame
+            end = offset + FRAME_HEADER.itemsize + deltas * DELTA.itemsize + absolutes * ABSOLUTE.itemsize
+            if end > len(self.mm):
+                break   # frame cut short
+            frames.append((tick, offset, keyframe))
+            offset = end
+        return np.array(frames, dtype=INDEX)
+
+    @property
+    def ticks(self):
+        return self.index['tick']
+
+    def __len__(self):
+        return len(self.index)
+
+    def reset(self):
+        self.x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.battery = np.zeros(0)
+        self.status = np.zeros(0, dtype=np.uint8)
+        self.present = np.zeros(0, dtype=bool)
+        self.position = -1      # index entry the state currently reflects
+
+    def grow(self, max_id):
+        size = len(self.present)
+        if max_id < size:
+            return
+        extra = max_id + 1 - size
+        self.x = np.concatenate([self.x, np.zeros(extra)])
+        self.y = np.concatenate([self.y, np.zeros(extra)])
+        self.battery = np.concatenate([self.battery, np.zeros(extra)])
+        self.status = np.concatenate([self.status, np.zeros(extra, dtype=np.uint8)])
+        self.present = np.concatenate([self.present, np.zeros(extra, dtype=bool)])
+
+    def apply(self, position):
+        """Apply the frame at index entry `position` to the current state"""
+        offset = int(self.index['offset'][position])
+        _, _, n_deltas, n_absolutes = np.frombuffer(self.mm, FRAME_HEADER, 1, offset)[0].tolist()
+        offset += FRAME_HEADER.itemsize
+        deltas = np.frombuffer(self.mm, DELTA, n_deltas, offset)
+        absolutes = np.frombuffer(self.mm, ABSOLUTE, n_absolutes, offset + n_deltas * DELTA.itemsize)
+
+        ids = deltas['drone']
+        self.x[ids] += deltas['dx'] / self.position_scale
+        self.y[ids] += deltas['dy'] / self.position_scale
+        self.battery[ids] += deltas['dbattery'] / self.battery_scale
+        self.status[ids] = deltas['status']
+
+        ids = absolutes['drone']
+        if len(ids):
+            self.grow(int(ids.max()))
+        self.x[ids] = absolutes['x']
+        self.y[ids] = absolutes['y']
+        self.battery[ids] = absolutes['battery']
+        self.status[ids] = absolutes['status']
+        self.present[ids] = True
+        self.position = position
+
+    def seek(self, tick):
+        """Bring the state to the last frame at or before `tick`"""
+        position = int(np.searchsorted(self.index['tick'], tick, 'right')) - 1
+        if position < 0:
+            raise ValueError(f"Tick {tick} is before the start of the log")
+        keyframe = self.keyframes[np.searchsorted(self.keyframes, position, 'right') - 1]
+        # Replay from the keyframe, or keep going when already between it and the target
+        if not keyframe <= self.position <= position:
+            self.reset()
+            self.position = keyframe - 1
+        for p in range(self.position + 1, position + 1):
+            self.apply(p)
+        return int(self.index['tick'][position])
+
+    def snapshot(self):
+        """Current state as arrays over the drones present, ordered by drone id"""
+        ids = np.flatnonzero(self.present)
+        return {'tick': int(self.index['tick'][self.position]), 'id': ids,
+                'x': self.x[ids].copy(), 'y': self.y[ids].copy(),
+                'battery': self.battery[ids].copy(), 'status': self.status[ids].copy()}
+
+    def state(self, tick):
+        """Fleet state at `tick`"""
+        self.seek(tick)
+        return self.snapshot()
+
+    def positions(self, start=None, end=None):
+        """Index entries from the frame at or before `start` through `end`, state at the first"""
+        ticks = self.index['tick']
+        self.seek(ticks[0] if start is None else start)
+        last = int(np.searchsorted(ticks, ticks[-1] if end is None else end, 'right'))
+        return range(self.position, last)
+
+    def replay(self, start=None, end=None):
+        """Yield the fleet state frame by frame between two ticks"""
+        for position in self.positions(start, end):
+            if position != self.position:
+                self.apply(position)
+            yield self.snapshot()
+
+    def track(self, drone_id, start=None, end=None):
+        """(ticks, x, y, battery, status) of one drone between two ticks"""
+        rows = []
+        for position in self.positions(start, end):
+            if position != self.position:
+                self.apply(position)
+            if drone_id < len(self.present) and self.present[drone_id]:
+                rows.append((self.index['tick'][position], self.x[drone_id], self.y[drone_id],
+                             self.battery[drone_id], self.status[drone_id]))
+        ticks, xs, ys, battery, status = (np.array(column) for column in zip(*rows)) if rows else \
+            (np.empty(0),) * 5
+        return ticks, xs, ys, battery, status
+
+    def close(self):
+        self.mm.close()
+        self.file.close()
@@ -23,10 +23,18 @@ FONT_SMALL_SIZE = 14
 FONT_MEDIUM_SIZE = 18
 FONT_LARGE_SIZE = 24
 
+SQRT2 = math.sqrt(2)
+
 def heuristic(a, b):
     """Manhattan distance heuristic"""
     return abs(a[0] - b[0]) + abs(a[1] - b[1])
 
 def distance(a, b):
     """Euclidean distance between two points"""
-    return math.sqrt((a[0]-b[0])**2 + (a[1]-b[1])**2)
\ No newline at end of file
+    return math.sqrt((a[0]-b[0])**2 + (a[1]-b[1])**2)
+
+def octile(a, b):
+    """Octile distance heuristic for 8-connected grids with diagonal cost sqrt(2)"""
+    dx = abs(a[0] - b[0])
+    dy = abs(a[1] - b[1])
+    return max(dx, dy) + (SQRT2 - 1) * min(dx, dy)
\ No newline at end of file
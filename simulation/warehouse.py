@@ -1,100 +1,102 @@
 import random
+import itertools
 import pygame
 import numpy as np
 from datetime import datetime
 from .utils import *
-from .ml_model import MLModel
+from .text_cache import render_text
+from .timeseries import TimeSeriesBuffer
+from .forecast import HISTORY_COLUMNS
+from .package_queue import PackageQueue
 
 class Warehouse:
-    def __init__(self, x, y, id, city, area_population=1000):
+    def __init__(self, x, y, id, city, ml_model, area_population=1000,
+                 history_capacity=4096, history_spill_path=None, demand_interval=3600):
         self.x = x
         self.y = y
         self.id = id
-        self.packages = []
+        self.packages = PackageQueue()
+        self.package_ids = itertools.count(1)
         self.color = WAREHOUSE_COLOR
         self.radius = 15
         self.area_population = area_population
-        self.ml_model = MLModel()
-        self.ml_model.load_models()
-        self.historical_data = pd.DataFrame(columns=[
-            'timestamp', 'demand', 'weather_impact'
-        ])
+        self.demand_interval = demand_interval      # simulated seconds between demand updates
+        self.ml_model = ml_model      # shared model, held by the engine
+        self.historical_data = TimeSeriesBuffer(HISTORY_COLUMNS, capacity=history_capacity,
+                                                spill_path=history_spill_path)
         self.city = city
         self.valid_destinations = self.find_valid_destinations()
         
     def find_valid_destinations(self):
-        """Find all valid delivery locations in the city"""
+        """Find all valid delivery locations in the city that can be reached from here"""
+        navigator = self.city.get_navigator()
+        field = navigator.distance_fields.get((self.x, self.y))
+        if field is None:
+            field = navigator.precompute((self.x, self.y))
         destinations = []
         for i in range(self.city.width):
             for j in range(self.city.height):
-                if self.city.is_valid_position(i, j):
+                if self.city.is_valid_position(i, j) and np.isfinite(field[i, j]):
                     destinations.append((i, j))
         return destinations
     
-    def generate_packages(self, weather_impact):
+    def generate_packages(self, weather_impact, current_time=None):
         """Generate packages based on ML demand prediction"""
-        current_time = datetime.now()
+        if current_time is None:
+            current_time = datetime.now()
         
         # Add current demand to historical data
-        new_row = pd.DataFrame([{
-            'timestamp': current_time,
-            'demand': len(self.packages),
-            'weather_impact': weather_impact
-        }])
-        self.historical_data = pd.concat(
-            [self.historical_data, new_row], ignore_index=True
+        self.historical_data.append(
+            timestamp=current_time,
+            demand=len(self.packages),
+            weather_impact=weather_impact,
+            hour=current_time.hour,
+            day_of_week=current_time.weekday()
         )
         
-        # Predict demand
-        predicted_demand = self.ml_model.predict_demand(
-            self.historical_data, weather_impact
-        )
+        # Predict demand from views of the latest history
+        predicted_demand = self.ml_model.forecaster.predict_one(self.historical_data,
+                                                                self.demand_interval)
         
         # Generate packages based on prediction
         num_packages = max(0, int(predicted_demand) - len(self.packages))
-        for _ in range(num_packages):
-            self.add_package()
+        self.packages.extend(self.create_package(current_time)
+                             for _ in range(num_packages)
+                             if self.valid_destinations)
+    
+    def create_package(self, created_at=None):
+        """New package with a valid destination and a never-reused id"""
+        return {
+            'id': next(self.package_ids),
+            'destination': random.choice(self.valid_destinations),
+            'priority': random.choices(
+                ['Normal', 'Express', 'Urgent'], 
+                weights=[0.7, 0.2, 0.1]
+            )[0],
+            'weight': random.uniform(0.1, 3.0),
+            'created_at': created_at or datetime.now()
+        }
     
-    def add_package(self):
+    def add_package(self, created_at=None):
         # Add a new package with valid destination
         if self.valid_destinations:
-            destination = random.choice(self.valid_destinations)
-            self.packages.append({
-                'id': len(self.packages) + 1,
-                'destination': destination,
-                'priority': random.choices(
-                    ['Normal', 'Express', 'Urgent'], 
-                    weights=[0.7, 0.2, 0.1]
-                )[0],
-                'weight': random.uniform(0.1, 3.0),
-                'created_at': datetime.now()
-            })
+            self.packages.push(self.create_package(created_at))
     
     def get_next_package(self):
-        if self.packages:
-            # Prioritize urgent packages
-            for i, pkg in enumerate(self.packages):
-                if pkg['priority'] == 'Urgent':
-                    return self.packages.pop(i)
-            
-            # Then express
-            for i, pkg in enumerate(self.packages):
-                if pkg['priority'] == 'Express':
-                    return self.packages.pop(i)
-            
-            # Then normal
-            return self.packages.pop(0)
-        return None
+        # Urgent first, then express, then normal; oldest first within each
+        return self.packages.pop()
     
-    def draw(self, surface, cell_size, font_small):
+    def draw(self, surface, camera, font_small, labels=True):
+        sx, sy = camera.to_screen(self.x, self.y)
+        
         # Draw warehouse
-        pygame.draw.circle(surface, self.color, 
-                          (self.x * cell_size, self.y * cell_size), 
-                          self.radius)
+        rect = pygame.draw.circle(surface, self.color, (sx, sy), self.radius)
         
         # Draw package count
-        text = font_small.render(f"WH{self.id}", True, TEXT_COLOR)
-        surface.blit(text, (self.x * cell_size - 15, self.y * cell_size - 30))
-        
-        text = font_small.render(f"Packages: {len(self.packages)}", True, TEXT_COLOR)
-        surface.blit(text, (self.x * cell_size - 25, self.y * cell_size - 15))
\ No newline at end of file
+        if labels:
+            text = render_text(font_small, f"WH{self.id}", TEXT_COLOR)
+            rect.union_ip(surface.blit(text, (sx - 15, sy - 30)))
+            
+            text = render_text(font_small, f"Packages: {len(self.packages)}", TEXT_COLOR)
+            rect.union_ip(surface.blit(text, (sx - 25, sy - 15)))
+        return rect
\ No newline at end of file
@@ -2,6 +2,7 @@ import random
 import math
 import pygame
 from .utils import *
+from .text_cache import render_text
 
 class WeatherSimulator:
     def __init__(self):
@@ -46,6 +47,6 @@ class WeatherSimulator:
         return 1.0
     
     def draw(self, surface, font_medium):
-        text = font_medium.render(f"Weather: {self.conditions} | Wind: {int(self.wind_speed)} km/h | Temp: {self.temperature}°C", 
-                                True, TEXT_COLOR)
-        surface.blit(text, (10, HEIGHT - 30))
\ No newline at end of file
+        text = render_text(font_medium, f"Weather: {self.conditions} | Wind: {int(self.wind_speed)} km/h | Temp: {self.temperature}°C", 
+                           TEXT_COLOR)
+        return surface.blit(text, (10, HEIGHT - 30))
\ No newline at end of file
@@ -0,0 +1,30 @@
+import pytest
+
+from simulation.engine import SimulationEngine
+
+class Engines:
+    """Seeded headless engines for one test, shut down when it ends"""
+
+    def __init__(self):
+        self.started = []
+
+    def __call__(self, **kwargs):
+        kwargs.setdefault('seed', 3)
+        kwargs.setdefault('headless', True)
+        engine = SimulationEngine(**kwargs)
+        engine.anomaly_monitor.refit_interval = 0     # no forest to score against
+        return self.adopt(engine)
+
+    def adopt(self, engine):
+        """Shut down an engine made elsewhere too, e.g. one restored from a snapshot"""
+        self.started.append(engine)
+        return engine
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    """Engine factory writing telemetry under a temporary directory"""
+    monkeypatch.chdir(tmp_path)
+    engines = Engines()
+    yield engines
+    for started in engines.started:
+        started.shutdown()
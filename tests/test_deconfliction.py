@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from simulation.deconfliction import Deconfliction
+from simulation.fleet import DELIVERING, FleetState
+
+def flying_fleet(*flights):
+    """Delivering drones at speed 0.04 (2.4 cells per second), one per (start, waypoint)"""
+    fleet = FleetState(capacity=len(flights))
+    for start, target in flights:
+        i = fleet.add(None, *start)
+        fleet.status[i] = DELIVERING
+        fleet.target_x[i], fleet.target_y[i] = target
+        fleet.has_target[i] = True
+    return fleet
+
+def test_broad_phase_finds_every_close_pair_once():
+    deconfliction = Deconfliction()
+    rng = np.random.default_rng(4)
+    positions = rng.random((300, 2)) * [40, 25] - [10, 5]
+    reach = 1.7
+    i, j = deconfliction.candidate_pairs(positions, reach)
+    pairs = {tuple(sorted(pair)) for pair in zip(i.tolist(), j.tolist())}
+    assert len(pairs) == len(i)     # no pair twice, nobody paired with itself
+    assert all(a != b for a, b in pairs)
+
+    gaps = np.hypot(*(positions[:, None, :] - positions[None, :, :]).transpose(2, 0, 1))
+    close = {(a, b) for a, b in zip(*np.nonzero(np.triu(gaps < reach, 1)))}
+    assert close <= pairs
+    # Only the same and adjacent buckets are paired
+    assert max(gaps[a, b] for a, b in pairs) < 2 * np.sqrt(2) * reach
+
+def test_closest_approach_is_clipped_to_the_horizon():
+    deconfliction = Deconfliction(horizon=1.0)
+    p = np.array([[4.0, 0.0], [4.0, 1.0], [4.0, 0.0], [1.0, 1.0]])
+    v = np.array([[-2.0, 0.0], [-8.0, 0.0], [1.0, 0.0], [0.0, 0.0]])
+    t, d = deconfliction.closest_approach(p, v)
+    np.testing.assert_allclose(t, [1.0, 0.5, 0.0, 0.0])
+    np.testing.assert_allclose(d, [2.0, 1.0, 4.0, np.sqrt(2)])
+
+@pytest.mark.parametrize("flights, expected", [
+    # Head-on, 2 cells apart and closing at 4.8 cells per second
+    ([((0, 0), (10, 0)), ((2, 0), (-10, 0))], 2 / 4.8),
+    # Crossing: both reach (1, 0) at the same moment
+    ([((0, 0), (10, 0)), ((1, -1), (1, 10))], 1 / 2.4),
+])
+def test_converging_drones_are_detected(flights, expected):
+    deconfliction = Deconfliction()
+    a, b, t, d = deconfliction.detect(flying_fleet(*flights))
+    assert (a.tolist(), b.tolist()) in (([0], [1]), ([1], [0]))
+    assert t[0] == pytest.approx(expected)
+    assert d[0] == pytest.approx(0.0, abs=1e-9)
+    assert deconfliction.losses == 0
+
+def test_separated_drones_in_the_same_bucket_do_not_conflict():
+    deconfliction = Deconfliction()
+    fleet = flying_fleet(((0, 0), (10, 0)), ((0, 0.6), (10, 0.6)), ((0.3, 1.2), (0.3, 10)))
+    positions = np.stack([fleet.x[:3], fleet.y[:3]], axis=1)
+    assert len(deconfliction.candidate_pairs(positions, 5.0)[0]) == 3
+    assert len(deconfliction.detect(fleet)[0]) == 0
+
+    # Drones on different altitude layers never conflict
+    head_on = flying_fleet(((0, 0), (10, 0)), ((2, 0), (-10, 0)))
+    head_on.altitude[1] = 1
+    assert len(deconfliction.detect(head_on)[0]) == 0
+
+def test_the_later_drone_yields_by_slowing_climbing_or_holding():
+    flights = [((0, 0), (10, 0)), ((4, 0), (-10, 0)),      # conflict in ~0.83 s
+               ((0, 9), (10, 9)), ((1, 9), (-10, 9))]       # conflict in ~0.2 s
+    fleet = flying_fleet(*flights)
+    deconfliction = Deconfliction()
+    assert deconfliction.update(fleet) == 2
+    assert fleet.speed_scale[:4].tolist() == [1.0, 0.5, 1.0, 1.0]
+    assert fleet.altitude[:4].tolist() == [0, 0, 0, 1]
+    assert deconfliction.detect(fleet)[0].tolist() == [0]
+
+    # Without spare layers an imminent conflict holds the drone instead
+    fleet = flying_fleet(*flights[2:])
+    Deconfliction(layers=1).update(fleet)
+    assert fleet.speed_scale[:2].tolist() == [1.0, 0.0]
+    assert fleet.resolve_timer[1] == 1.0
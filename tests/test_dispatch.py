@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+
+from simulation.dispatch import Dispatcher, INFEASIBLE
+from simulation.fleet import IDLE
+
+def farthest_destination(engine):
+    """Reachable destination with the longest path back to the warehouse"""
+    navigator = engine.city.get_navigator()
+    home = (engine.warehouse.x, engine.warehouse.y)
+    cells = np.array(engine.warehouse.valid_destinations, dtype=np.float64)
+    back = navigator.distance_to(home, cells)
+    return engine.warehouse.valid_destinations[int(np.argmax(back))], float(back.max())
+
+def package(engine, destination, weight=1.0, priority='Normal'):
+    new = engine.warehouse.create_package(engine.now)
+    new.update(destination=destination, weight=weight, priority=priority)
+    return new
+
+def test_out_of_range_package_is_assigned_with_a_charging_stop(engine):
+    sim = engine(num_drones=3)
+    sim.warehouse.packages = type(sim.warehouse.packages)()
+    destination, back = farthest_destination(sim)
+    dispatcher = sim.dispatcher
+    per_cell = sim.fleet.battery_consumption[0] / sim.fleet.speed[0]
+    assert 2 * back * per_cell > 100 - dispatcher.battery_reserve   # beyond one charge
+
+    sim.warehouse.packages.push(package(sim, destination))
+    assert dispatcher.dispatch(sim.fleet) == 1
+    assert len(sim.warehouse.packages) == 0
+
+def test_unservable_packages_do_not_block_the_queue(engine):
+    sim = engine(num_drones=1)
+    sim.warehouse.packages = type(sim.warehouse.packages)()
+    destination = sim.warehouse.valid_destinations[0]
+    max_payload = sim.drones[0].max_payload
+    for _ in range(sim.dispatcher.candidate_factor + 1):
+        sim.warehouse.packages.push(package(sim, destination, max_payload + 1, 'Urgent'))
+    sim.warehouse.packages.push(package(sim, destination))
+
+    assert sim.dispatcher.dispatch(sim.fleet) == 1
+    assert len(sim.warehouse.packages) == sim.dispatcher.candidate_factor + 1
+    assert all(p['weight'] > max_payload for p in sim.warehouse.packages)
+
+def test_refused_assignment_keeps_packages_queued(engine):
+    sim = engine(num_drones=1)
+    sim.warehouse.packages = type(sim.warehouse.packages)()
+    queued = package(sim, sim.warehouse.valid_destinations[0])
+    sim.warehouse.packages.push(queued)
+    sim.drones[0].payload = 0.25       # a drone that still thinks it is loaded refuses
+
+    assert sim.dispatcher.dispatch(sim.fleet) == 0
+    assert queued['id'] in sim.warehouse.packages
+    assert sim.drones[0].package is None
+
+def test_finished_sortie_leaves_no_payload_behind(engine):
+    sim = engine(num_drones=1)
+    drone = sim.drones[0]
+    destination = sim.warehouse.valid_destinations[0]
+    sortie = [package(sim, destination, weight) for weight in (0.1, 0.2, 0.7)]
+    assert drone.assign_packages(sortie)
+    drone.start_delivery(sim.city)
+    for _ in sortie:
+        sim.deliver(drone)
+    assert drone.payload == 0 and drone.package is None and not drone.manifest
+
+    # Charging between sorties also leaves an empty hold
+    drone.payload = 0.3
+    drone.status = "CHARGING"
+    drone.finish_charging(sim.city)
+    assert drone.payload == 0
+
+def test_seeded_fleet_keeps_delivering(engine):
+    # Used to stall: every drone idle at full battery behind out-of-range packages
+    sim = engine(num_drones=10, dt=0.1)
+    sim.run(1800)
+    assert sim.packages_delivered >= 15
+    assert len(sim.warehouse.packages) < 10
+    n = sim.fleet.size
+    assert sim.fleet.battery[:n].min() >= 0
+    assert np.count_nonzero(sim.fleet.status[:n] != IDLE) or len(sim.warehouse.packages) == 0
+
+def test_charging_stops_cover_the_shortfall():
+    dispatcher = Dispatcher(None, None, battery_reserve=20)
+    battery = np.array([100.0, 100.0, 100.0, 50.0])
+    energy = np.array([80.0, 80.5, 241.0, 10.0])
+    assert dispatcher.charging_stops(battery, energy).tolist() == [0, 1, 3, 0]
+
+def test_feasibility_of_each_drone_package_pair(engine):
+    sim = engine(num_drones=3)
+    fleet, dispatcher = sim.fleet, sim.dispatcher
+    idle = np.arange(3)
+    navigator = sim.city.get_navigator()
+    home = (sim.warehouse.x, sim.warehouse.y)
+    destinations = sim.warehouse.valid_destinations
+
+    # Cut off one destination entirely
+    walled = destinations[len(destinations) // 2]
+    x, y = walled
+    ring = [(x + dx, y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+            if (dx or dy) and navigator.in_bounds((x + dx, y + dy))]
+    for cell in ring:
+        sim.city.grid[cell] = 2
+    navigator.update_cells(ring)
+
+    back = navigator.distance_to(home, np.array(destinations, dtype=np.float64))
+    reachable = np.flatnonzero(np.isfinite(back) & (back > 0))
+    near = destinations[reachable[np.argmin(back[reachable])]]
+    far = destinations[reachable[np.argmax(back[reachable])]]
+    max_payload = sim.drones[0].max_payload
+    packages = [package(sim, near), package(sim, far), package(sim, near, max_payload + 1),
+                package(sim, walled)]
+    fleet.battery[2] = dispatcher.battery_reserve
+    cost = dispatcher.cost_matrix(fleet, idle, packages)
+    assert (cost[:2, :2] < INFEASIBLE).all()
+    assert cost[0, 1] > cost[0, 0]      # the far trip needs more energy, maybe a stop
+    assert (cost[:, 2:] == INFEASIBLE).all()
+    assert (cost[2] == INFEASIBLE).all()
@@ -0,0 +1,13 @@
+def test_lockers_are_emptied_on_the_pickup_interval(engine):
+    sim = engine(num_drones=2, dt=1.0, pickup_interval=30)
+    # Full lockers turn every delivery away
+    for locker in sim.lockers:
+        while locker.add_package({'id': -1}):
+            pass
+
+    for _ in range(30):
+        sim.step()
+    assert all(len(locker.packages) == locker.capacity for locker in sim.lockers)
+    sim.step()
+    assert all(locker.packages == [] for locker in sim.lockers)
+    assert sim.tick == 31 and sim.sim_time == 31.0
@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from simulation.drone import Drone
+from simulation.fleet import CHARGING, DELIVERING, IDLE, FleetState
+
+def fleet_of(count, capacity=2):
+    fleet = FleetState(capacity=capacity)
+    warehouse = SimpleNamespace(x=0, y=0, ml_model=None)
+    drones = [Drone(i + 1, i, 2 * i, warehouse, fleet) for i in range(count)]
+    return fleet, drones
+
+def test_drone_attributes_are_views_of_the_fleet_columns():
+    fleet, drones = fleet_of(5)
+    assert fleet.size == 5 and fleet.capacity >= 5
+    assert [drone.index for drone in drones] == list(range(5))
+
+    # Views keep working after the columns were reallocated to grow the fleet
+    assert fleet.x[:5].tolist() == [0, 1, 2, 3, 4]
+    assert (drones[3].x, drones[3].y) == (3.0, 6.0)
+    drones[3].battery = 42.5
+    fleet.payload[3] = 1.5
+    assert fleet.battery[3] == 42.5 and drones[3].payload == 1.5
+    assert isinstance(drones[3].battery, float)
+
+    drones[1].status = "CHARGING"
+    assert fleet.status[1] == CHARGING
+    assert fleet.indices(CHARGING).tolist() == [1]
+    assert fleet.status_counts() == {"IDLE": 4, "LOADING": 0, "DELIVERING": 0,
+                                     "RETURNING": 0, "CHARGING": 1}
+
+    # Optional points are backed by a flag column
+    assert drones[2].current_target is None
+    drones[2].current_target = (7, 8)
+    assert drones[2].current_target == (7.0, 8.0) and fleet.has_target[2]
+    drones[2].current_target = None
+    assert drones[2].current_target is None and not fleet.has_target[2]
+
+def test_batched_update_moves_and_drains_only_flying_drones():
+    fleet, drones = fleet_of(3)
+    for drone in drones[:2]:
+        drone.status = "DELIVERING"
+        drone.current_target = (drone.x + 10, drone.y)
+    fleet.update(None, (), 1.0, indices=[0, 2])
+
+    step = 0.04 * 60
+    np.testing.assert_allclose(fleet.x[:3], [step, 1, 2])
+    np.testing.assert_allclose(fleet.battery[:3], [100 - 0.05 * 60, 100, 100])
+    assert fleet.status[2] == IDLE and fleet.status[0] == DELIVERING
+    assert fleet.battery_decrease_rate[0] == 0.05 * 60
+
+    # A drone within the radius of its destination has arrived
+    drones[0].destination = (step + 0.2, 0)
+    drones[1].destination = (40, 40)
+    assert fleet.arrivals(0.5).tolist() == [0]
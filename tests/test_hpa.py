@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from simulation.city import CityGrid
+from simulation.hpa import HierarchicalPathfinder
+from simulation.navigation import Navigator
+from simulation.utils import octile
+
+from test_navigation import path_cost, queries, random_city
+
+CLUSTER = 8
+
+def hierarchy(seed, density=0.25):
+    navigator = Navigator(random_city(seed, 64, 48, density))
+    return navigator, navigator.use_hierarchy(CLUSTER)
+
+def optimal(navigator, start, goal):
+    cost = navigator.precompute(goal)[start]
+    navigator.distance_fields.clear()
+    return cost
+
+@pytest.mark.parametrize("seed", range(4))
+def test_paths_are_valid_complete_and_near_optimal(seed):
+    navigator, hpa = hierarchy(seed)
+    for start, goal in queries(navigator, seed, count=80):
+        expected = optimal(navigator, start, goal)
+        path = hpa.find_path(start, goal)
+        # Reachable exactly when the flat search says so
+        if not np.isfinite(expected):
+            assert path is None
+            continue
+        assert path is not None
+        assert path[-1:] == ([goal] if start != goal else [])
+        cost = path_cost(navigator, start, path)
+
+        # Entrances cost at most a couple of clusters of detour, and little on long trips
+        assert cost <= expected + 2 * CLUSTER
+        if octile(start, goal) >= 2 * CLUSTER:
+            assert cost <= 1.3 * expected
+
+def test_navigator_routes_large_grids_through_the_hierarchy():
+    navigator = Navigator(random_city(5, 64, 48), hierarchy_threshold=64 * 48)
+    assert navigator.hierarchy is not None
+    for start, goal in queries(navigator, 5, count=20):
+        path = navigator.find_path(start, goal)
+        assert (path is None) == (not np.isfinite(optimal(navigator, start, goal)))
+
+def test_blocking_cells_updates_the_abstraction_in_place():
+    navigator, hpa = hierarchy(2, density=0.1)
+    start, goal = (2, 20), (60, 20)
+    assert hpa.find_path(start, goal) is not None
+
+    # A wall across x = 30 with a three-cell gap, cutting through several clusters
+    wall = [(30, y) for y in range(48) if not 40 <= y <= 42]
+    for cell in wall:
+        navigator.city.grid[cell] = 2
+    navigator.city.grid[29:32, 40:43] = 0
+    navigator.update_cells(wall + [(x, y) for x in range(29, 32) for y in range(40, 43)])
+
+    path = hpa.find_path(start, goal)
+    assert {cell[1] for cell in path if cell[0] == 30} in ({40}, {41}, {42})
+    assert path_cost(navigator, start, path) <= optimal(navigator, start, goal) + 2 * CLUSTER
+
+    # The incremental update matches an abstraction built from scratch
+    city = CityGrid(64, 48)
+    city.grid = navigator.city.grid.copy()
+    fresh = HierarchicalPathfinder(Navigator(city), CLUSTER)
+    assert hpa.borders == fresh.borders
+    assert hpa.intra_edges == fresh.intra_edges
+
+    # Closing the gap leaves the far side unreachable
+    navigator.city.grid[30, 40:43] = 2
+    navigator.update_cells([(30, 40), (30, 41), (30, 42)])
+    assert hpa.find_path(start, goal) is None
@@ -0,0 +1,38 @@
+from simulation.model_registry import ModelRegistry
+
+class CountingModel:
+    """Stands in for MLModel, counting how often its weights are loaded"""
+
+    def __init__(self, grid_size):
+        self.grid_size = grid_size
+        self.loads = 0
+
+    def load_models(self):
+        self.loads += 1
+
+def test_models_are_shared_per_grid_size_until_released():
+    registry = ModelRegistry(factory=CountingModel)
+    first = registry.acquire((30, 20))
+    assert registry.acquire([30, 20]) is first
+    other = registry.acquire((60, 40))
+    assert other is not first
+    assert first.loads == 1 and registry.ref_counts == {(30, 20): 2, (60, 40): 1}
+
+    # The model outlives its first holder, and is freed with the last one
+    registry.release((30, 20))
+    assert registry.models[(30, 20)] is first
+    registry.release((30, 20))
+    assert (30, 20) not in registry.models and (30, 20) not in registry.ref_counts
+    registry.release((30, 20))
+    assert (30, 20) not in registry.ref_counts
+
+    # A later holder loads a fresh model
+    again = registry.acquire((30, 20))
+    assert again is not first and again.loads == 1
+
+def test_reload_refreshes_held_models_in_place():
+    registry = ModelRegistry(factory=CountingModel)
+    assert not registry.reload()
+    model = registry.acquire((30, 20))
+    assert registry.reload()
+    assert registry.acquire((30, 20)) is model and model.loads == 2
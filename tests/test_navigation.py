@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from simulation.city import CityGrid
+from simulation.navigation import DIRECTIONS, Navigator
+from simulation.utils import SQRT2
+
+def random_city(seed, width=24, height=17, density=0.3):
+    rng = np.random.default_rng(seed)
+    return CityGrid.from_grid(np.where(rng.random((width, height)) < density, 2, 0))
+
+def path_cost(navigator, start, path):
+    """Cost of a cell path, checking every step is a legal move onto a free cell"""
+    cost = 0.0
+    current = start
+    for cell in path:
+        step = (cell[0] - current[0], cell[1] - current[1])
+        assert step in DIRECTIONS
+        assert navigator.passable[cell]
+        cost += 1.0 if 0 in step else SQRT2
+        current = cell
+    return cost
+
+def queries(navigator, seed, count=60):
+    rng = np.random.default_rng(seed)
+    free = [tuple(int(v) for v in cell) for cell in np.argwhere(navigator.passable)]
+    for _ in range(count):
+        i, j = rng.integers(len(free), size=2)
+        yield free[i], free[j]
+
+@pytest.mark.parametrize("method", ["astar", "jps"])
+@pytest.mark.parametrize("seed", range(4))
+def test_searches_match_dijkstra_costs(method, seed):
+    navigator = Navigator(random_city(seed))
+    for start, goal in queries(navigator, seed):
+        expected = navigator.precompute(goal)[start]
+        navigator.distance_fields.clear()
+        navigator.path_cache.clear()
+
+        path = navigator.find_path(start, goal, method=method)
+        if not np.isfinite(expected):
+            assert path is None
+            continue
+        assert path is not None
+        assert path[-1:] == ([goal] if start != goal else [])
+        assert path_cost(navigator, start, path) == pytest.approx(expected)
+
+def test_distance_field_walk_and_matrix_agree_with_search():
+    navigator = Navigator(random_city(7))
+    pairs = list(queries(navigator, 7, count=20))
+    cells = [cell for pair in pairs for cell in pair]
+    matrix = navigator.distance_matrix(cells)
+    for i, (start, goal) in enumerate(pairs):
+        field = navigator.precompute(goal)
+        assert matrix[2 * i + 1, 2 * i] == field[start]
+        path = navigator.find_path(start, goal)
+        if np.isfinite(field[start]):
+            assert path_cost(navigator, start, path) == pytest.approx(field[start])
+            assert navigator.distance_to(goal, [start])[0] == field[start]
+        else:
+            assert path is None
+
+def test_blocking_a_cell_reroutes_cached_paths():
+    city = CityGrid.from_grid(np.zeros((9, 5), dtype=int))
+    navigator = Navigator(city)
+    assert navigator.find_path((0, 2), (8, 2)) == [(x, 2) for x in range(1, 9)]
+
+    # A wall across the middle with a gap at the top
+    for y in range(4):
+        city.grid[4, y] = 2
+    navigator.update_cells([(4, y) for y in range(4)])
+    for method in ("astar", "jps"):
+        navigator.path_cache.clear()
+        path = navigator.find_path((0, 2), (8, 2), method=method)
+        assert (4, 4) in path
+        assert path_cost(navigator, (0, 2), path) == pytest.approx(4 + 4 * SQRT2)
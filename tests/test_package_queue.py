@@ -0,0 +1,79 @@
+from simulation.package_queue import PackageQueue
+
+def package(package_id, priority='Normal'):
+    return {'id': package_id, 'priority': priority}
+
+def drain(queue):
+    order = []
+    while queue:
+        order.append(queue.pop()['id'])
+    return order
+
+def test_pops_by_priority_then_age():
+    queue = PackageQueue()
+    queue.push(package(1))
+    queue.push(package(2, 'Urgent'))
+    queue.extend([package(3, 'Express'), package(4, 'Urgent'), package(5)])
+
+    assert queue.peek()['id'] == 2
+    assert drain(queue) == [2, 4, 3, 1, 5]
+    assert queue.pop() is None
+
+def test_candidates_leave_the_queue_unchanged():
+    queue = PackageQueue()
+    queue.extend(package(i, 'Express' if i % 3 == 0 else 'Normal') for i in range(10))
+
+    assert [p['id'] for p in queue.candidates(4)] == [0, 3, 6, 9]
+    assert len(queue) == 10
+    assert drain(queue) == [0, 3, 6, 9, 1, 2, 4, 5, 7, 8]
+
+def test_removed_packages_are_skipped_lazily():
+    queue = PackageQueue()
+    queue.extend(package(i) for i in range(5))
+
+    assert queue.remove(0)['id'] == 0
+    assert queue.remove(0) is None
+    assert 0 not in queue and len(queue) == 4
+    assert len(queue.heap) == 5         # the stale entry is still in the heap
+    assert queue.peek()['id'] == 1
+    assert [p['id'] for p in queue.candidates(2)] == [1, 2]
+    assert drain(queue) == [1, 2, 3, 4]
+
+def test_requeued_package_keeps_only_its_new_entry():
+    queue = PackageQueue()
+    queue.extend(package(i) for i in range(3))
+
+    # Re-queue package 0 behind the others, as a full locker does
+    queue.push(queue.remove(0))
+    assert len(queue) == 3
+    assert drain(queue) == [1, 2, 0]
+
+    queue.push(package(7))
+    queue.push(package(7, 'Urgent'))
+    assert drain(queue) == [7]
+
+def test_heap_is_compacted_when_stale_entries_dominate():
+    queue = PackageQueue()
+    queue.extend(package(i) for i in range(200))
+    for i in range(190):
+        queue.remove(i)
+
+    assert len(queue.heap) <= 2 * len(queue) + 64
+    assert drain(queue) == list(range(190, 200))
+
+def test_version_changes_with_every_mutation():
+    queue = PackageQueue()
+    versions = [queue.version]
+    queue.push(package(1))
+    versions.append(queue.version)
+    queue.extend([package(2), package(3)])
+    versions.append(queue.version)
+    queue.pop()
+    versions.append(queue.version)
+    queue.remove(2)
+    versions.append(queue.version)
+    queue.candidates(5)
+    versions.append(queue.version)
+
+    assert versions[:5] == sorted(set(versions[:5]))
+    assert versions[5] == versions[4]   # reading candidates is not a change
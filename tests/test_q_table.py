@@ -0,0 +1,83 @@
+import numpy as np
+
+from simulation.city import CityGrid
+from simulation.q_table import DenseQTable, HashedQTable, load_q_table
+from simulation.rl_agent import RLAgent
+from simulation.rl_trainer import _train_worker, train_parallel
+
+def test_dense_table_is_memory_mapped_copy_on_write(tmp_path):
+    path = str(tmp_path / 'q.npy')
+    table = DenseQTable(6, 4)
+    table[2] = [1, 2, 3, 4]
+    table.save(path)
+
+    loaded = load_q_table(path)
+    assert isinstance(loaded, DenseQTable)
+    assert isinstance(loaded.values, np.memmap)
+    assert loaded.values.dtype == np.float32
+    np.testing.assert_array_equal(loaded.values, table.values)
+
+    # Updates stay in memory until the table is saved again
+    loaded[2, 0] = 9
+    assert np.load(path)[2, 0] == 1
+    loaded.save(path)
+    assert np.load(path)[2, 0] == 9
+    assert not (tmp_path / 'q.npy.tmp').exists()
+
+def test_hashed_table_round_trip(tmp_path):
+    path = str(tmp_path / 'q.npy')
+    table = HashedQTable(3, capacity=2)
+    for key in (10**12, 5, 77):
+        table[key] = [key % 7, 1, 2]
+    assert table.get(123).tolist() == [0, 0, 0]
+    assert 123 not in table
+    table.save(path)
+
+    loaded = load_q_table(path)
+    assert isinstance(loaded, HashedQTable)
+    assert len(loaded) == 3
+    for key in (10**12, 5, 77):
+        assert loaded.get(key).tolist() == [key % 7, 1, 2]
+    assert loaded.rows([77, 5]).tolist() == [[0, 1, 2], [5, 1, 2]]
+
+def test_agent_ignores_a_table_for_another_grid(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    agent = RLAgent((3, 2))
+    agent.q_table[4] = 1.0
+    agent.save_model()
+
+    restored = RLAgent((3, 2))
+    assert not restored.trained
+    assert restored.load_model() and restored.trained
+    np.testing.assert_array_equal(restored.q_table.values, agent.q_table.values)
+    assert not RLAgent((2, 3), battery_bucket=50).load_model()
+
+def test_parallel_training_merges_worker_tables_by_visits(tmp_path):
+    city = CityGrid.from_grid(np.zeros((4, 3), dtype=int))
+    agent = RLAgent((4, 3))
+    agent.q_table.values[:] = 7.0
+    workers, episodes, seed = 2, 40, 11
+
+    # The same worker jobs, run in this process
+    path = str(tmp_path / 'start.npy')
+    agent.q_table.save(path)
+    results = [_train_worker((city.grid, path, agent.exploration_rate,
+                              8, episodes // workers, int(s)))
+               for s in np.random.SeedSequence(seed).generate_state(workers)]
+    weighted = np.zeros(agent.q_table.values.shape)
+    visits = np.zeros(agent.q_table.values.shape)
+    for rows, q, worker_visits, *_ in results:
+        # Only updated rows come back
+        assert len(rows) < len(visits) and (worker_visits.sum(axis=1) > 0).all()
+        weighted[rows] += q * worker_visits
+        visits[rows] += worker_visits
+    assert (np.load(path) == 7.0).all()
+
+    metrics = train_parallel(agent, city, episodes, workers, n_envs=8, seed=seed)
+    assert metrics['episodes'] == sum(done for _, _, _, done, _, _ in results)
+
+    values = agent.q_table.values
+    visited = visits > 0
+    assert visited.any() and not visited.all()
+    np.testing.assert_allclose(values[visited], weighted[visited] / visits[visited], rtol=1e-6)
+    assert (values[~visited] == 7.0).all()
@@ -0,0 +1,88 @@
+import numpy as np
+
+from simulation.city import CityGrid
+from simulation.navigation import Navigator
+from simulation.reservation import CooperativePlanner, ReservationTable
+
+def planner_for(rows, **kwargs):
+    """Planner over a map drawn top row first, '#' for buildings"""
+    grid = np.array([[2 if c == '#' else 0 for c in row] for row in reversed(rows)]).T
+    return CooperativePlanner(Navigator(CityGrid.from_grid(grid)), **kwargs)
+
+def assert_no_conflicts(planner, first, second):
+    """Neither two drones in one cell in a slot, nor two drones swapping cells"""
+    a, b = planner.occupancy(first), planner.occupancy(second)
+    for slot in range(1, min(len(a), len(b))):
+        assert a[slot] != b[slot]
+        assert (a[slot - 1], a[slot]) != (b[slot], b[slot - 1])
+
+def test_table_keeps_the_first_owner_and_expires_past_slots():
+    table = ReservationTable(100)
+    table.reserve('a', [5, 6, None, 7], start_slot=2)
+    table.reserve('b', [6, 6, 7], start_slot=3)
+    assert [table.owner(cell, slot) for cell, slot in ((5, 2), (6, 3), (6, 4), (7, 5))] == \
+        ['a', 'a', 'b', 'a']
+    assert table.owner(7, 4) is None
+    assert table.is_free(6, 3, 'a') and not table.is_free(6, 3, 'b')
+
+    table.release('a')
+    assert table.owner(6, 3) is None and table.owner(6, 4) == 'b'
+    table.expire(5)
+    assert len(table) == 0
+    table.reserve('c', [1, 2], start_slot=4)
+    assert table.owner(1, 4) is None and table.owner(2, 5) == 'c'
+
+def test_drone_waits_for_a_reserved_corridor_cell():
+    planner = planner_for(["......"])
+    planner.table.reserve('parked', [planner.navigator.node((2, 0))] * 3, 0)
+    path = planner.plan('b', (0, 0), (5, 0))
+    assert path == [(1, 0), (1, 0), (2, 0), (3, 0), (4, 0), (5, 0)]
+    assert planner.waits == 1
+    assert planner.occupancy([(0, 0)] + path)[3] == (2, 0)
+
+def test_crossing_drone_keeps_clear_of_the_junction():
+    planner = planner_for([
+        "###.###",
+        "###.###",
+        "###.###",
+        ".......",
+        "###.###",
+        "###.###",
+    ])
+    across = planner.plan('a', (0, 2), (6, 2))
+    assert across == [(x, 2) for x in range(1, 7)]
+
+    # Going straight down would meet 'a' at the junction (3, 2) in slot 3
+    down = planner.plan('b', (3, 5), (3, 0))
+    assert down[-1] == (3, 0) and planner.fallbacks == 0
+    assert planner.occupancy([(3, 5)] + down)[3] != (3, 2)
+    assert_no_conflicts(planner, [(0, 2)] + across, [(3, 5)] + down)
+
+def test_oncoming_drone_steps_aside_instead_of_swapping():
+    planner = planner_for([
+        "......",
+        "......",
+    ])
+    east = planner.plan('a', (2, 0), (5, 0))
+    assert east == [(3, 0), (4, 0), (5, 0)]
+    # Moving straight into (2, 0) as 'a' leaves it would swap the two drones
+    west = planner.plan('b', (3, 0), (0, 0))
+    assert west[0] != (2, 0) and west[-1] == (0, 0)
+    assert_no_conflicts(planner, [(2, 0)] + east, [(3, 0)] + west)
+
+def test_falls_back_to_a_solo_path_when_the_search_gives_up():
+    planner = planner_for([
+        "....",
+        "....",
+    ], max_expansions=2)
+    path = planner.plan('a', (0, 0), (3, 1))
+    assert planner.fallbacks == 1
+    assert path == planner.navigator.find_path((0, 0), (3, 1))
+
+    # A corridor held by a parked drone for the whole window: plans wait it out
+    planner = planner_for(["......"], window=4)
+    planner.table.reserve('parked', [planner.navigator.node((2, 0))] * 5, 0)
+    path = planner.plan('b', (0, 0), (5, 0))
+    assert path[-1] == (5, 0) and planner.fallbacks == 0
+    occupancy = planner.occupancy([(0, 0)] + path)
+    assert (2, 0) not in occupancy[:planner.window]
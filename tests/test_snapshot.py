@@ -0,0 +1,72 @@
+import hashlib
+
+import numpy as np
+import pytest
+
+from simulation.snapshot import HEADER, MAGIC, load_snapshot, save_snapshot
+
+SETTINGS = dict(width=24, height=18, num_drones=12, dt=0.5, seed=7,
+                demand_interval=20, pickup_interval=60)
+
+def digest(engine):
+    """Hash of the fleet columns and delivery counters"""
+    fleet = engine.fleet
+    n = fleet.size
+    h = hashlib.sha1()
+    for column in (fleet.x, fleet.y, fleet.battery, fleet.status, fleet.payload):
+        h.update(np.ascontiguousarray(column[:n]).tobytes())
+    h.update(repr((engine.tick, engine.packages_delivered, len(engine.warehouse.packages),
+                   sorted(p['id'] for p in engine.warehouse.packages))).encode())
+    return h.hexdigest()
+
+def steps(engine, count):
+    """Digest after `count` steps, with the alerts raised on the way"""
+    alerts = []
+    for _ in range(count):
+        engine.step()
+        alerts += [(engine.tick, alert) for alert in engine.anomalies]
+    return digest(engine), alerts
+
+def refitting(engine):
+    """Refit the anomaly forest every simulated minute; one is in flight at tick 600"""
+    monitor = engine.anomaly_monitor
+    monitor.interval = 10.0
+    monitor.refit_interval = 60.0
+    monitor.refit_delay = 50.0
+    monitor.min_refit_samples = 200
+    return engine
+
+def test_restored_run_matches_the_uninterrupted_run(engine, tmp_path):
+    path = str(tmp_path / 'snap.bin')
+    original = refitting(engine(**SETTINGS))
+    steps(original, 600)
+    assert original.anomaly_monitor.refit_sample is not None
+    assert save_snapshot(original, path) > HEADER.size
+    expected = steps(original, 600)
+    assert original.packages_delivered > 0
+    assert original.anomaly_monitor.refits >= 3
+
+    restored = engine.adopt(load_snapshot(path))
+    assert restored.tick == 600
+    assert restored.ml_system is original.ml_system
+    assert all(drone.ml_model is restored.ml_system for drone in restored.drones)
+    assert steps(restored, 600) == expected
+    assert restored.anomaly_monitor.forest[1] == original.anomaly_monitor.forest[1]
+
+    # The same seed replays the whole run
+    replay = refitting(engine(**SETTINGS))
+    steps(replay, 600)
+    assert steps(replay, 600) == expected
+
+def test_rejects_other_files_and_versions(engine, tmp_path):
+    path = tmp_path / 'snap.bin'
+    sim = engine(**SETTINGS)
+    save_snapshot(sim, str(path))
+    data = path.read_bytes()
+
+    path.write_bytes(b'XXXX' + data[4:])
+    with pytest.raises(ValueError, match="not a simulation snapshot"):
+        load_snapshot(str(path))
+    path.write_bytes(HEADER.pack(MAGIC, 999) + data[HEADER.size:])
+    with pytest.raises(ValueError, match="Unsupported snapshot version"):
+        load_snapshot(str(path))
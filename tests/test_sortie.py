@@ -0,0 +1,49 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from simulation.city import CityGrid
+from simulation.navigation import Navigator
+from simulation.sortie import order_stops, plan_sortie, route_length
+
+def nearest_neighbor_length(dist, start=0, end=1):
+    route, remaining = [start], set(range(len(dist))) - {start, end}
+    while remaining:
+        route.append(min(remaining, key=lambda node: dist[node, route[-1]]))
+        remaining.remove(route[-1])
+    return route_length(dist, route + [end])
+
+@pytest.mark.parametrize("seed", range(20))
+def test_two_opt_keeps_every_stop_and_never_lengthens_the_tour(seed):
+    rng = np.random.default_rng(seed)
+    points = rng.random((2 + int(rng.integers(1, 7)), 2)) * 20
+    dist = np.hypot(*(points[:, None, :] - points[None, :, :]).transpose(2, 0, 1))
+
+    route = order_stops(dist)
+    assert route[0] == 0 and route[-1] == 1
+    assert sorted(route[1:-1]) == list(range(2, len(points)))
+    length = route_length(dist, route)
+    assert length <= nearest_neighbor_length(dist) + 1e-9
+
+    # and stays close to the brute-force optimum on these small tours
+    optimum = min(route_length(dist, [0, *order, 1])
+                  for order in itertools.permutations(range(2, len(points))))
+    assert length <= 1.5 * optimum + 1e-9
+
+def test_two_opt_undoes_a_crossing_nearest_neighbor_tour():
+    # Nearest neighbor goes (3, 5), (5, 2), then out to (0, 2) and back across to (5, 3)
+    points = np.array([(6, 5), (5, 3), (5, 2), (3, 5), (0, 2)], dtype=float)
+    dist = np.hypot(*(points[:, None, :] - points[None, :, :]).transpose(2, 0, 1))
+    route = order_stops(dist)
+    assert route == [0, 3, 4, 2, 1]
+    assert route_length(dist, route) < nearest_neighbor_length(dist) - 3
+
+def test_plan_sortie_orders_packages_along_path_distances():
+    city = CityGrid.from_grid(np.zeros((12, 6), dtype=int))
+    navigator = Navigator(city)
+    packages = [{'id': i, 'destination': cell}
+                for i, cell in enumerate([(9, 1), (3, 1), (6, 1)])]
+    ordered, length = plan_sortie(navigator, (0, 1), (0, 1), packages)
+    assert [package['id'] for package in ordered] in ([1, 2, 0], [0, 2, 1])
+    assert length == pytest.approx(18)
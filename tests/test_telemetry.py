@@ -0,0 +1,87 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from simulation.data_collector import DataCollector
+from simulation.telemetry import ColumnBuffer, TelemetryWriter, read_table
+
+SCHEMA = [('timestamp', np.float64), ('drone_id', np.int32), ('battery', np.float32)]
+
+def batch(start, count):
+    buffer = ColumnBuffer(SCHEMA, capacity=count)
+    for i in range(start, start + count):
+        full = buffer.append(1.7e9 + i, i, 100 - i / 2)
+    assert full
+    return buffer.take()
+
+def test_column_buffer_hands_off_row_groups():
+    buffer = ColumnBuffer(SCHEMA, capacity=3)
+    assert not buffer.append(1.0, 1, 50.0)
+    assert not buffer.append(2.0, 2, 49.5)
+    rows = buffer.take()
+    assert len(buffer) == 0
+    assert rows['drone_id'].tolist() == [1, 2]
+
+    # The handed-off rows are not overwritten by later appends
+    buffer.append(3.0, 3, 49.0)
+    assert rows['drone_id'].tolist() == [1, 2]
+    assert buffer.append(4.0, 4, 48.5) is False and buffer.append(5.0, 5, 48.0) is True
+
+@pytest.mark.parametrize("format", ["csv", "parquet", "arrow"])
+def test_flushed_streams_read_back_in_every_format(tmp_path, format):
+    if format != 'csv':
+        pytest.importorskip("pyarrow")
+    writer = TelemetryWriter(str(tmp_path / 'new' / 'data'), format=format)
+    writer.submit('battery_data', batch(0, 4))
+    writer.submit('battery_data', batch(4, 3))
+    writer.flush()
+    assert writer.rows_written == 7
+
+    writer.close()
+    df = read_table(str(tmp_path / 'new' / 'data' / 'battery_data'))
+    assert df['drone_id'].tolist() == list(range(7))
+    assert df['battery'].tolist() == pytest.approx([100 - i / 2 for i in range(7)])
+    assert pd.api.types.is_datetime64_any_dtype(df['timestamp'])
+    assert (df['timestamp'].diff().dropna() == pd.Timedelta(seconds=1)).all()
+
+def test_read_table_merges_formats_in_time_order(tmp_path):
+    pytest.importorskip("pyarrow")
+    directory = str(tmp_path / 'data')
+    for format, start in (('csv', 6), ('parquet', 0), ('arrow', 3)):
+        writer = TelemetryWriter(directory, format=format)
+        writer.submit('anomaly_data', batch(start, 3))
+        writer.close()
+
+    df = read_table(directory + '/anomaly_data.parquet')
+    assert df['drone_id'].tolist() == list(range(9))
+
+def test_read_table_without_telemetry_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        read_table(str(tmp_path / 'missing'))
+
+def test_write_errors_are_raised_on_flush(tmp_path):
+    writer = TelemetryWriter(str(tmp_path), format='csv')
+    writer.submit('battery_data', "not a record array")
+    with pytest.raises(ValueError):
+        writer.flush()
+
+    # The writer keeps going after a failed row group
+    writer.submit('battery_data', batch(0, 2))
+    writer.close()
+    assert read_table(str(tmp_path / 'battery_data'))['drone_id'].tolist() == [0, 1]
+
+def test_records_carry_the_simulated_time_and_tick(tmp_path):
+    collector = DataCollector(str(tmp_path), format='csv')
+    now = datetime(2024, 1, 1, 8, 30, 15)
+    collector.record_routing(now, 1815, (2, 2), (7, 9), [(3, 3)] * 9, 12, 100, 93.5, 0.8)
+    collector.record_demand(now, 1815, 4, 3.5, 0.8)
+    collector.close()
+
+    routing = read_table(str(tmp_path / 'routing_data'))
+    assert routing['timestamp'].tolist() == [pd.Timestamp(now)]
+    assert routing['tick'].tolist() == [1815]
+    assert routing['path_length'].tolist() == [9]
+    demand = read_table(str(tmp_path / 'demand_data'))
+    assert demand[['tick', 'hour', 'day_of_week']].values.tolist() == [[1815, 8, 0]]
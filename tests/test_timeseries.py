@@ -0,0 +1,60 @@
+import csv
+
+import numpy as np
+
+from simulation.timeseries import TimeSeriesBuffer
+
+def filled(count, capacity=5, **kwargs):
+    buffer = TimeSeriesBuffer({'value': np.int64, 'pair': (np.float64, (2,))},
+                              capacity, **kwargs)
+    for i in range(count):
+        buffer.append(value=i, pair=(i, -i))
+    return buffer
+
+def test_empty_and_partly_filled_windows():
+    assert filled(0).window('value').tolist() == []
+    buffer = filled(3)
+    assert len(buffer) == 3
+    assert buffer.window('value').tolist() == [0, 1, 2]
+    assert buffer.window('value', 2).tolist() == [1, 2]
+    assert buffer.window('value', 10).tolist() == [0, 1, 2]
+    assert buffer.last('value') == 2
+
+def test_windows_stay_contiguous_across_the_wrap():
+    for count in range(5, 13):
+        buffer = filled(count)
+        expected = list(range(count - 5, count))
+        assert len(buffer) == 5 and buffer.total == count
+        assert buffer.window('value').tolist() == expected
+        assert buffer.window('pair')[:, 0].tolist() == expected
+        assert buffer.last('value') == count - 1
+
+def test_windows_are_views_into_the_ring():
+    buffer = filled(7)
+    window = buffer.window('value', 3)
+    assert np.shares_memory(window, buffer.columns['value'])
+    assert window.flags['C_CONTIGUOUS']
+
+def test_strided_windows_end_at_the_newest_row():
+    buffer = filled(13, capacity=8)     # holds 5..12
+    assert buffer.window('value', step=3).tolist() == [6, 9, 12]
+    assert buffer.window('value', 2, step=3).tolist() == [9, 12]
+    assert buffer.window('value', step=4).tolist() == [8, 12]
+    assert np.shares_memory(buffer.window('value', step=3), buffer.columns['value'])
+
+def test_evicted_rows_spill_in_order(tmp_path):
+    path = tmp_path / 'history' / 'spill.csv'
+    buffer = filled(12, spill_path=str(path), spill_chunk=3)
+    assert path.exists()                # 6 evicted rows, spilled in chunks of 3
+
+    buffer.close()
+    with open(path, newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ['value', 'pair']
+    assert [int(row[0]) for row in rows[1:]] == list(range(12))
+    assert len(buffer) == 0
+
+def test_to_frame_copies_the_last_rows():
+    frame = filled(8).to_frame(2)
+    assert frame['value'].tolist() == [6, 7]
+    assert frame['pair'].tolist() == [[6.0, -6.0], [7.0, -7.0]]
@@ -0,0 +1,102 @@
+import os
+import shutil
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from simulation.trajectory import TrajectoryReader, TrajectoryWriter
+
+def recorded_run(path, ticks=250, keyframe_interval=40, seed=0):
+    """Record a random fleet walk; returns the true state per tick"""
+    rng = np.random.default_rng(seed)
+    n = 5
+    fleet = SimpleNamespace(size=3, drones=[SimpleNamespace(id=i + 1) for i in range(n)],
+                            x=rng.random(n) * 30, y=rng.random(n) * 20,
+                            battery=np.full(n, 100.0), status=np.zeros(n, dtype=np.int8))
+    writer = TrajectoryWriter(path, keyframe_interval, initial_size=4096)
+    truth = {}
+    for tick in range(ticks):
+        if tick == 100:
+            fleet.size = n      # drones join between keyframes
+        moving = rng.random(n) < 0.7
+        fleet.x += moving * rng.normal(0, 0.2, n)
+        fleet.y += moving * rng.normal(0, 0.2, n)
+        fleet.battery -= moving * 0.05
+        if tick % 37 == 0:
+            fleet.x[0] += 50    # too far for a delta record
+            fleet.status[1] = (fleet.status[1] + 1) % 4
+        writer.record(tick, fleet)
+        size = fleet.size
+        truth[tick] = (np.arange(1, size + 1), fleet.x[:size].copy(), fleet.y[:size].copy(),
+                       fleet.battery[:size].copy(), fleet.status[:size].copy())
+    return writer, truth
+
+def assert_state(state, truth):
+    ids, x, y, battery, status = truth
+    np.testing.assert_array_equal(state['id'], ids)
+    np.testing.assert_allclose(state['x'], x, atol=1e-3)
+    np.testing.assert_allclose(state['y'], y, atol=1e-3)
+    np.testing.assert_allclose(state['battery'], battery, atol=1e-2)
+    np.testing.assert_array_equal(state['status'], status)
+
+def test_seeks_in_any_order_match_the_recorded_state(tmp_path):
+    path = str(tmp_path / 'run.traj')
+    writer, truth = recorded_run(path)
+    writer.close()
+
+    reader = TrajectoryReader(path)
+    assert len(reader) == 250
+    assert reader.ticks[reader.keyframes].tolist() == list(range(0, 250, 40))
+    for tick in np.random.default_rng(1).permutation(250)[:80].tolist() + [249, 0, 120, 121]:
+        assert reader.seek(tick) == tick
+        assert_state(reader.snapshot(), truth[tick])
+
+    # Replay walks forward from the frame at the start tick
+    for state in reader.replay(95, 130):
+        assert_state(state, truth[state['tick']])
+    ticks, xs, _, _, _ = reader.track(5, 90, 110)
+    assert ticks.tolist() == list(range(100, 111))
+    np.testing.assert_allclose(xs, [truth[t][1][4] for t in range(100, 111)], atol=1e-3)
+    with pytest.raises(ValueError):
+        reader.seek(-1)
+    reader.close()
+
+def test_scan_rebuilds_the_index_without_the_idx_file(tmp_path):
+    path = str(tmp_path / 'run.traj')
+    writer, truth = recorded_run(path)
+    writer.close()
+    with_index = TrajectoryReader(path)
+    expected = with_index.index.copy()
+    with_index.close()
+
+    os.remove(path + '.idx')
+    reader = TrajectoryReader(path)
+    np.testing.assert_array_equal(reader.index, expected)
+    assert_state(reader.state(173), truth[173])
+    reader.close()
+
+def test_scan_recovers_the_frames_of_an_unclosed_log(tmp_path):
+    path = str(tmp_path / 'run.traj')
+    writer, truth = recorded_run(path, ticks=120)
+    writer.mm.flush()       # crashed before close: no index, zeroed space after the frames
+
+    crashed = str(tmp_path / 'crashed.traj')
+    shutil.copyfile(path, crashed)
+    reader = TrajectoryReader(crashed)
+    assert os.path.getsize(crashed) > writer.size
+    assert reader.ticks.tolist() == list(range(120))
+    assert_state(reader.state(119), truth[119])
+    reader.close()
+
+    # A frame cut short by the crash is dropped
+    cut = str(tmp_path / 'cut.traj')
+    with open(path, 'rb') as f:
+        data = f.read(writer.size - 3)
+    with open(cut, 'wb') as f:
+        f.write(data)
+    reader = TrajectoryReader(cut)
+    assert reader.ticks.tolist() == list(range(119))
+    assert_state(reader.state(118), truth[118])
+    reader.close()
+    writer.close()
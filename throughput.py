@@ -0,0 +1,70 @@
+import argparse
+import time
+from simulation.engine import SimulationEngine
+
+
+def measure(size, args):
+    """Deliveries per simulated hour for one fleet size"""
+    engine = SimulationEngine(args.width, args.height, num_drones=size, headless=True,
+                              cooperative=args.cooperative,
+                              pickup_interval=args.pickup_interval)
+
+    # Offered load on top of the forecast demand, so the fleet can saturate
+    arrivals = {"due": 0.0}
+    def add_arrivals(engine):
+        arrivals["due"] += args.arrivals * engine.dt / 3600
+        while arrivals["due"] >= 1:
+            engine.add_package()
+            arrivals["due"] -= 1
+
+    # Stop the engine's services and flush its telemetry after every size
+    try:
+        engine.run(args.hours * 3600, add_arrivals)
+        return engine.throughput(), engine.deconfliction.total_conflicts
+    finally:
+        engine.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deliveries/hour versus fleet size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 10, 20, 40, 80],
+                        help="fleet sizes to simulate")
+    parser.add_argument("--hours", type=float, default=1.0,
+                        help="simulated hours per fleet size")
+    parser.add_argument("--width", type=int, default=30)
+    parser.add_argument("--height", type=int, default=20)
+    parser.add_argument("--arrivals", type=float, default=600,
+                        help="extra packages per simulated hour")
+    parser.add_argument("--pickup-interval", type=float, default=60,
+                        help="simulated seconds between locker pickups")
+    parser.add_argument("--cooperative", action="store_true",
+                        help="use the reservation-based cooperative planner")
+    parser.add_argument("--gain", type=float, default=0.05,
+                        help="marginal gain per added drone below which the warehouse is saturated")
+    args = parser.parse_args()
+
+    print(f"{'drones':>7} {'deliveries/h':>13} {'per drone':>10} {'conflicts':>10} {'wall s':>7}")
+    previous = None
+    saturation = None
+    for size in sorted(args.sizes):
+        start_time = time.time()
+        rate, conflicts = measure(size, args)
+        print(f"{size:>7} {rate:>13.1f} {rate / size:>10.2f} {conflicts:>10} "
+              f"{time.time() - start_time:>7.1f}")
+
+        # Saturated once extra drones add less than `gain` of a drone's share
+        if previous and saturation is None:
+            prev_size, prev_rate = previous
+            marginal = (rate - prev_rate) / (size - prev_size)
+            if marginal < args.gain * prev_rate / prev_size:
+                saturation = prev_size
+        previous = (size, rate)
+
+    if saturation:
+        print(f"Warehouse saturates at about {saturation} drones")
+    else:
+        print("No saturation within the tested fleet sizes")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,58 +1,51 @@
+import argparse
+import random
+import time
 import numpy as np
 from simulation.city import CityGrid
 from simulation.rl_agent import RLAgent
-import time
+from simulation.rl_trainer import VectorizedTrainer, train_parallel
 
-# Initialize city grid
-city = CityGrid(30, 20)
+parser = argparse.ArgumentParser(description="Train the RL routing agent")
+parser.add_argument("--width", type=int, default=30, help="city width in cells")
+parser.add_argument("--height", type=int, default=20, help="city height in cells")
+parser.add_argument("--episodes", type=int, default=10000, help="training episodes")
+parser.add_argument("--envs", type=int, default=256,
+                    help="environments stepped in lockstep per process")
+parser.add_argument("--workers", type=int, default=1,
+                    help="worker processes whose Q-tables are merged")
+parser.add_argument("--log-interval", type=int, default=1000)
+parser.add_argument("--seed", type=int, default=None, help="seed for the city layout and training")
+args = parser.parse_args()
 
-# Initialize RL agent
-rl_agent = RLAgent(grid_size=(30, 20))
+if args.seed is not None:
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+
+# Initialize city grid
+city = CityGrid(args.width, args.height)
 
-# Training parameters
-num_episodes = 10000
-log_interval = 1000
+# Initialize RL agent, continuing from a saved model if there is one
+rl_agent = RLAgent(grid_size=(args.width, args.height))
+rl_agent.load_model()
+rl_agent.exploration_rate = 1.0
 
 # Start training
 print("Starting RL training...")
 start_time = time.time()
 
-for episode in range(num_episodes):
-    # Random start and end points
-    start = (np.random.randint(0, 30), np.random.randint(0, 20))
-    while not city.is_valid_position(start[0], start[1]):
-        start = (np.random.randint(0, 30), np.random.randint(0, 20))
-        
-    end = (np.random.randint(0, 30), np.random.randint(0, 20))
-    while not city.is_valid_position(end[0], end[1]) or end == start:
-        end = (np.random.randint(0, 30), np.random.randint(0, 20))
-    
-    # Battery level (0-100)
-    battery = np.random.randint(20, 100)
-    
-    # Generate path with RL
-    path = rl_agent.get_path(start, end, battery, city)
-    
-    # Calculate optimal path length (Manhattan distance)
-    optimal_length = abs(start[0]-end[0]) + abs(start[1]-end[1])
-    
-    # Update Q-values based on path performance
-    # (In a real implementation, we'd update at each step)
-    if path and path[-1] == end:
-        reward = 100 - len(path)  # Reward efficient paths
-    else:
-        reward = -50  # Penalty for failure
-        
-    # Simplified update for this example
-    # In a real implementation, we'd update at each step
-    rl_agent.q_table[rl_agent.state_to_key((start, end, battery))] += reward
-    
-    # Log progress
-    if (episode + 1) % log_interval == 0:
-        print(f"Episode {episode+1}/{num_episodes} | "
-              f"Exploration: {rl_agent.exploration_rate:.3f}")
+if args.workers > 1:
+    metrics = train_parallel(rl_agent, city, args.episodes, args.workers,
+                             args.envs, args.seed)
+    print(f"Episodes: {metrics['episodes']} | "
+          f"{metrics['episodes_per_sec']:.0f} ep/s | "
+          f"Success: {metrics['success_rate']:.2%} | "
+          f"Exploration: {metrics['exploration']:.3f}")
+else:
+    trainer = VectorizedTrainer(rl_agent, city, args.envs, seed=args.seed)
+    trainer.train(args.episodes, args.log_interval)
 
 # Save trained model
 rl_agent.save_model()
 print(f"Training completed in {time.time()-start_time:.2f} seconds")
-print("Model saved to models/routing_model.pkl")
\ No newline at end of file
+print(f"Model saved to {rl_agent.model_path}")